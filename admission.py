@@ -0,0 +1,155 @@
+import asyncio
+import math
+import time
+from collections import deque
+from contextlib import asynccontextmanager
+from typing import AsyncIterator, Deque, Optional
+
+
+class AdmissionRejectedError(RuntimeError):
+    """Raised when a request cannot be queued; `retry_after` is a hint in seconds."""
+
+    def __init__(self, message: str, retry_after: int):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+
+class Ticket:
+    """An admitted request, holding one in-flight slot until released"""
+
+    def __init__(self, controller: "AdmissionController"):
+        self.controller = controller
+        self.admitted_at = time.monotonic()
+        self.released = False
+
+    def release(self):
+        if not self.released:
+            self.released = True
+            self.controller._release(self)
+
+
+class AdmissionController:
+    """
+    Limits how many conversion requests run at once and how many may wait.
+
+    Up to `max_in_flight` requests are admitted; up to `max_queue` more wait
+    for a slot, for at most `max_wait` seconds. Anything beyond that is
+    rejected right away with an AdmissionRejectedError, whose `retry_after`
+    is estimated from the throughput observed over the last `window` seconds:
+    the time the current queue needs to drain at that rate.
+
+    Tickets are plain objects rather than only a context manager, so that a
+    streaming response can keep its slot until the stream is done.
+    """
+
+    def __init__(
+        self,
+        max_in_flight: int,
+        max_queue: int = 0,
+        max_wait: Optional[float] = None,
+        window: float = 60.0,
+        max_retry_after: int = 300,
+    ):
+        if max_in_flight < 1:
+            raise ValueError("Admission control needs at least one in-flight slot")
+        self.max_in_flight = max_in_flight
+        self.max_queue = max_queue
+        self.max_wait = max_wait
+        self.window = window
+        self.max_retry_after = max_retry_after
+        self.in_flight = 0
+        self.queued = 0
+        self.admitted = 0
+        self.rejected = 0
+        self._finished: Deque[float] = deque()
+        self._mean_duration: Optional[float] = None
+        self._slots: Optional[asyncio.Semaphore] = None
+
+    def _semaphore(self) -> asyncio.Semaphore:
+        # Created lazily so it binds to the running event loop
+        if self._slots is None:
+            self._slots = asyncio.Semaphore(self.max_in_flight)
+        return self._slots
+
+    def throughput(self) -> Optional[float]:
+        """
+        Requests finished per second.
+
+        The rate observed over the window, or the rate all slots sustain at the
+        recent mean request duration, whichever is higher (the latter is what a
+        saturated server drains its queue at).
+        """
+        now = time.monotonic()
+        while self._finished and now - self._finished[0] > self.window:
+            self._finished.popleft()
+        rates = []
+        if self._finished:
+            span = min(self.window, max(now - self._finished[0], 1.0))
+            rates.append(len(self._finished) / span)
+        if self._mean_duration:
+            rates.append(self.max_in_flight / self._mean_duration)
+        return max(rates) if rates else None
+
+    def retry_after(self) -> int:
+        """Seconds until the queue is expected to have room again"""
+        throughput = self.throughput()
+        if not throughput:
+            return 1
+        seconds = math.ceil((self.queued + 1) / throughput)
+        return max(1, min(seconds, self.max_retry_after))
+
+    def _reject(self, message: str):
+        self.rejected += 1
+        raise AdmissionRejectedError(message, self.retry_after())
+
+    async def acquire(self) -> Ticket:
+        """
+        Wait for an in-flight slot.
+
+        Raises:
+            AdmissionRejectedError: If the wait queue is full or the wait exceeds `max_wait`
+        """
+        slots = self._semaphore()
+        if slots.locked() and self.queued >= self.max_queue:
+            self._reject("Server is at capacity, retry later")
+
+        self.queued += 1
+        try:
+            await asyncio.wait_for(slots.acquire(), timeout=self.max_wait)
+        except asyncio.TimeoutError:
+            self._reject(f"No conversion slot became free within {self.max_wait} seconds")
+        finally:
+            self.queued -= 1
+
+        self.in_flight += 1
+        self.admitted += 1
+        return Ticket(self)
+
+    def _release(self, ticket: Ticket):
+        now = time.monotonic()
+        duration = now - ticket.admitted_at
+        self._mean_duration = duration if self._mean_duration is None else 0.8 * self._mean_duration + 0.2 * duration
+        self._finished.append(now)
+        self.in_flight -= 1
+        self._semaphore().release()
+
+    @asynccontextmanager
+    async def admit(self) -> AsyncIterator[Ticket]:
+        """Hold an in-flight slot for the duration of the block"""
+        ticket = await self.acquire()
+        try:
+            yield ticket
+        finally:
+            ticket.release()
+
+    def stats(self) -> dict:
+        throughput = self.throughput()
+        return {
+            "max_in_flight": self.max_in_flight,
+            "max_queue": self.max_queue,
+            "in_flight": self.in_flight,
+            "queued": self.queued,
+            "admitted": self.admitted,
+            "rejected": self.rejected,
+            "throughput_per_second": round(throughput, 3) if throughput else None,
+        }
@@ -0,0 +1,187 @@
+import argparse
+import asyncio
+import json
+import os
+from datetime import datetime
+from pathlib import Path
+
+from benchmarks.corpus import FORMATS, SIZES, generate_corpus, iter_corpus, load_corpus
+from benchmarks.parity import MIN_LAYOUT_F1, MIN_MARKDOWN_SIMILARITY, MIN_TABLE_AGREEMENT
+
+# Endpoints the load generator can drive (see benchmarks.load)
+ENDPOINTS = ("convert", "upload-convert")
+
+DEFAULT_CORPUS = Path(__file__).parent / "corpus"
+DEFAULT_RESULTS = Path(__file__).parent / "results"
+
+
+def _corpus(args) -> list:
+    if not (args.corpus / "corpus.json").exists():
+        print(f"Generating the benchmark corpus in {args.corpus}...")
+        generate_corpus(args.corpus, seed=args.seed)
+    documents = list(iter_corpus(load_corpus(args.corpus), args.formats, args.sizes))
+    if not documents:
+        raise SystemExit("No corpus document matches the selected formats and sizes")
+    return documents
+
+
+def corpus_command(args):
+    documents = generate_corpus(args.corpus, args.formats or FORMATS, args.sizes or tuple(SIZES), args.seed)
+    for document in documents:
+        print(f"{document.format:12} {document.size:7} {document.pages:3} page(s)  {document.path}")
+
+
+def run_command(args):
+    if args.target == "inprocess" and not args.cache:
+        # Read by main at import: measure conversions, not cache hits
+        os.environ.setdefault("RESULT_CACHE_ENABLED", "0")
+
+    from benchmarks.load import RunConfig, run_load, save_results
+
+    config = RunConfig(
+        target=args.target,
+        endpoints=args.endpoints,
+        concurrency=args.concurrency,
+        requests=args.requests,
+        warmup=args.warmup,
+        output_format=args.output_format,
+        query=dict(pair.split("=", 1) for pair in args.query),
+    )
+    results = asyncio.run(run_load(config, _corpus(args)))
+    output = args.output or DEFAULT_RESULTS / f"{datetime.now().strftime('%Y%m%d_%H%M%S')}_{results['commit'] or 'run'}.json"
+    save_results(results, output)
+
+    for endpoint, summary in results["endpoints"].items():
+        print(
+            f"{endpoint:16} p50={summary['p50']}s p95={summary['p95']}s p99={summary['p99']}s "
+            f"pages/s={summary['pages_per_second']} errors={summary['errors']}"
+        )
+    if results["peak_rss_bytes"]:
+        print(f"peak RSS: {results['peak_rss_bytes'] / 2**20:.1f} MB")
+    print(f"Results saved to {output}")
+
+
+def compare_command(args):
+    from benchmarks.load import compare
+
+    for line in compare(json.loads(args.baseline.read_text()), json.loads(args.candidate.read_text())):
+        print(line)
+
+
+def importtime_command(args):
+    from benchmarks.importtime import digest, format_digest, profile_imports
+
+    summary = digest(profile_imports(args.module), top=args.top)
+    for line in format_digest(summary):
+        print(line)
+    if args.output:
+        args.output.parent.mkdir(parents=True, exist_ok=True)
+        args.output.write_text(json.dumps(summary, indent=2))
+        print(f"Digest saved to {args.output}")
+
+
+def parity_command(args):
+    from benchmarks.parity import ConverterSpec, run_parity
+    from model_artifacts import resolve_models_path
+
+    if args.formats is None:
+        # Only PDFs and images go through the layout and table models
+        args.formats = ["pdf", "scanned_pdf", "png"]
+    reference = ConverterSpec("reference", json.loads(args.reference_options))
+    candidate_options = json.loads(args.candidate_options)
+    if args.quantized_path:
+        candidate_options.setdefault("precision", "int8")
+    if args.onnx_path:
+        name = "onnx"
+    elif candidate_options.get("precision") == "int8":
+        name = "int8"
+    else:
+        name = "candidate"
+    candidate = ConverterSpec(name, candidate_options, args.onnx_path, args.quantized_path)
+    results = run_parity(_corpus(args), reference, candidate, resolve_models_path(args.models_path))
+
+    for document in results["documents"]:
+        print(
+            f"{document['document']:20} layout_f1={document['layout_f1']} iou={document['layout_mean_iou']} "
+            f"tables={document['table_agreement']} markdown={document['markdown_similarity']}"
+        )
+    print(
+        f"{results['candidate']} vs {results['reference']} on {results['pages']} page(s): "
+        f"layout_f1={results['layout_f1']} tables={results['table_agreement']} "
+        f"markdown>={results['markdown_similarity']} speedup={results['speedup']}x "
+        f"pages/s={results['pages_per_second']}"
+    )
+    if args.output:
+        args.output.parent.mkdir(parents=True, exist_ok=True)
+        args.output.write_text(json.dumps(results, indent=2))
+
+    failures = [
+        f"{metric} {results[metric]} < {minimum}"
+        for metric, minimum in (
+            ("layout_f1", args.min_layout_f1),
+            ("table_agreement", args.min_table_agreement),
+            ("markdown_similarity", args.min_markdown_similarity),
+        )
+        if results[metric] is not None and results[metric] < minimum
+    ]
+    if failures:
+        raise SystemExit("Parity check failed: " + ", ".join(failures))
+
+
+def main():
+    parser = argparse.ArgumentParser(prog="python -m benchmarks", description="Benchmark the docling API")
+    subparsers = parser.add_subparsers(required=True)
+
+    def corpus_options(subparser):
+        subparser.add_argument("--corpus", type=Path, default=DEFAULT_CORPUS, help="Corpus directory")
+        subparser.add_argument("--formats", nargs="+", choices=FORMATS, help="Only these formats")
+        subparser.add_argument("--sizes", nargs="+", choices=list(SIZES), help="Only these size classes")
+        subparser.add_argument("--seed", type=int, default=0, help="Seed of the generated content")
+
+    corpus = subparsers.add_parser("corpus", help="Generate the synthetic corpus")
+    corpus_options(corpus)
+    corpus.set_defaults(command=corpus_command)
+
+    run = subparsers.add_parser("run", help="Drive the API and save latency / throughput results")
+    corpus_options(run)
+    run.add_argument("--target", default="inprocess", help="Server URL (e.g. http://localhost:8000) or inprocess")
+    run.add_argument("--endpoints", nargs="+", default=list(ENDPOINTS), choices=ENDPOINTS)
+    run.add_argument("--concurrency", type=int, default=4, help="Requests in flight at once")
+    run.add_argument("--requests", type=int, default=50, help="Measured requests per endpoint")
+    run.add_argument("--warmup", type=int, default=1, help="Unmeasured passes over the corpus per endpoint")
+    run.add_argument("--output-format", default="markdown", choices=["markdown", "json", "all"])
+    run.add_argument("--query", nargs="*", default=[], metavar="NAME=VALUE", help="Extra query parameters, e.g. do_ocr=false")
+    run.add_argument("--cache", action="store_true", help="Keep the result cache enabled (inprocess only)")
+    run.add_argument("--output", type=Path, help="Results file (default: benchmarks/results/<time>_<commit>.json)")
+    run.set_defaults(command=run_command)
+
+    diff = subparsers.add_parser("compare", help="Compare two saved runs")
+    diff.add_argument("baseline", type=Path)
+    diff.add_argument("candidate", type=Path)
+    diff.set_defaults(command=compare_command)
+
+    parity = subparsers.add_parser("parity", help="Compare the output and speed of two converter configurations")
+    corpus_options(parity)
+    parity.add_argument("--models-path", type=Path, help="Model snapshot or cache (default: Hugging Face cache)")
+    parity.add_argument("--onnx-path", type=Path, help="Run the candidate on these ONNX exports")
+    parity.add_argument("--quantized-path", type=Path, help="Run the candidate on these int8 models (precision int8)")
+    parity.add_argument("--reference-options", default="{}", help="ConversionOptions of the reference, as JSON")
+    parity.add_argument("--candidate-options", default="{}", help="ConversionOptions of the candidate, as JSON")
+    parity.add_argument("--min-layout-f1", type=float, default=MIN_LAYOUT_F1)
+    parity.add_argument("--min-table-agreement", type=float, default=MIN_TABLE_AGREEMENT)
+    parity.add_argument("--min-markdown-similarity", type=float, default=MIN_MARKDOWN_SIMILARITY)
+    parity.add_argument("--output", type=Path, help="Save the comparison as JSON")
+    parity.set_defaults(command=parity_command)
+
+    imports = subparsers.add_parser("importtime", help="Profile the import time of a module (-X importtime digest)")
+    imports.add_argument("--module", default="main", help="Module to import in a fresh interpreter")
+    imports.add_argument("--top", type=int, default=20, help="Packages and direct imports to list")
+    imports.add_argument("--output", type=Path, help="Save the digest as JSON")
+    imports.set_defaults(command=importtime_command)
+
+    args = parser.parse_args()
+    args.command(args)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,224 @@
+import json
+import random
+from dataclasses import asdict, dataclass
+from pathlib import Path
+from typing import Iterator, List
+
+# Words the synthetic documents are made of, so every run converts the same content
+WORDS = (
+    "document conversion pipeline layout table figure section paragraph model page text "
+    "structure heading caption reference result value metric analysis report summary data "
+    "sample method performance latency throughput memory worker request response batch"
+).split()
+
+# Pages (or slides, or screens of text) per size class
+SIZES = {"small": 1, "medium": 5, "large": 20}
+
+FORMATS = ("pdf", "scanned_pdf", "png", "docx", "pptx", "html", "md")
+
+
+@dataclass
+class CorpusDocument:
+    path: str
+    format: str
+    size: str
+    pages: int
+
+
+def _sentence(rng: random.Random, words: int = 12) -> str:
+    text = " ".join(rng.choice(WORDS) for _ in range(words))
+    return text[0].upper() + text[1:] + "."
+
+
+def _paragraph(rng: random.Random, sentences: int = 5) -> str:
+    return " ".join(_sentence(rng) for _ in range(sentences))
+
+
+def _table(rng: random.Random, rows: int = 5, columns: int = 4) -> List[List[str]]:
+    header = [rng.choice(WORDS).title() for _ in range(columns)]
+    return [header] + [[f"{rng.uniform(0, 1000):.2f}" for _ in range(columns)] for _ in range(rows)]
+
+
+def _pdf_escape(text: str) -> str:
+    return text.replace("\\", "\\\\").replace("(", "\\(").replace(")", "\\)")
+
+
+def write_text_pdf(path: Path, pages: int, rng: random.Random):
+    """Write a PDF with real text objects (born-digital, no OCR needed)"""
+    objects = [b"<< /Type /Catalog /Pages 2 0 R >>", None, b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>"]
+    page_ids = []
+    for page in range(pages):
+        lines = [f"Section {page + 1}: {rng.choice(WORDS).title()} {rng.choice(WORDS)}"]
+        for _ in range(4):
+            lines.extend(_paragraph(rng, 1) for _ in range(6))
+            lines.append("")
+        commands = ["BT", "/F1 10 Tf", "12 TL", "56 780 Td"]
+        commands += [f"({_pdf_escape(line[:95])}) '" for line in lines]
+        commands.append("ET")
+        # Ruled table at the bottom of the page
+        table = _table(rng)
+        top = 780 - 12 * (len(lines) + 2)
+        for row, cells in enumerate(table):
+            y = top - 16 * row
+            commands.append(f"56 {y - 4} m 540 {y - 4} l S")
+            for column, cell in enumerate(cells):
+                commands.append(f"BT /F1 9 Tf {60 + 120 * column} {y} Td ({_pdf_escape(cell)}) Tj ET")
+        stream = "\n".join(commands).encode("latin-1")
+        objects.append(b"<< /Length %d >>\nstream\n" % len(stream) + stream + b"\nendstream")
+        content_id = len(objects)
+        objects.append(
+            b"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 595 842] "
+            b"/Resources << /Font << /F1 3 0 R >> >> /Contents %d 0 R >>" % content_id
+        )
+        page_ids.append(len(objects))
+    kids = " ".join(f"{page_id} 0 R" for page_id in page_ids).encode()
+    objects[1] = b"<< /Type /Pages /Kids [" + kids + b"] /Count %d >>" % pages
+
+    out = bytearray(b"%PDF-1.4\n")
+    offsets = []
+    for number, body in enumerate(objects, start=1):
+        offsets.append(len(out))
+        out += b"%d 0 obj\n" % number + body + b"\nendobj\n"
+    xref = len(out)
+    out += b"xref\n0 %d\n0000000000 65535 f \n" % (len(objects) + 1)
+    out += b"".join(b"%010d 00000 n \n" % offset for offset in offsets)
+    out += b"trailer\n<< /Size %d /Root 1 0 R >>\nstartxref\n%d\n%%%%EOF\n" % (len(objects) + 1, xref)
+    path.write_bytes(bytes(out))
+
+
+def _scanned_pages(pages: int, rng: random.Random) -> list:
+    """Page images with rendered text, slightly rotated and noisy like a scan"""
+    from PIL import Image, ImageDraw, ImageFilter, ImageFont
+
+    font = ImageFont.load_default(size=22)
+    images = []
+    for page in range(pages):
+        image = Image.new("L", (1240, 1754), 255)
+        draw = ImageDraw.Draw(image)
+        y = 100
+        draw.text((100, y), f"Section {page + 1}", fill=0, font=font)
+        while y < 1600:
+            y += 34
+            draw.text((100, y), _sentence(rng, 9), fill=0, font=font)
+        noise = Image.effect_noise(image.size, 12)
+        image = Image.blend(image, noise, 0.08).rotate(rng.uniform(-1, 1), fillcolor=255)
+        images.append(image.filter(ImageFilter.SMOOTH).convert("RGB"))
+    return images
+
+
+def write_scanned_pdf(path: Path, pages: int, rng: random.Random):
+    """Write an image-only PDF, so every page needs OCR"""
+    first, *rest = _scanned_pages(pages, rng)
+    first.save(path, "PDF", resolution=150, save_all=True, append_images=rest)
+
+
+def write_png(path: Path, pages: int, rng: random.Random):
+    _scanned_pages(1, rng)[0].save(path, "PNG")
+
+
+def write_docx(path: Path, pages: int, rng: random.Random):
+    import docx
+
+    document = docx.Document()
+    for page in range(pages):
+        document.add_heading(f"Section {page + 1}", level=1)
+        for _ in range(4):
+            document.add_paragraph(_paragraph(rng))
+        rows = _table(rng)
+        table = document.add_table(rows=len(rows), cols=len(rows[0]))
+        for r, cells in enumerate(rows):
+            for c, cell in enumerate(cells):
+                table.cell(r, c).text = cell
+        document.add_page_break()
+    document.save(path)
+
+
+def write_pptx(path: Path, pages: int, rng: random.Random):
+    import pptx
+    from pptx.util import Inches
+
+    presentation = pptx.Presentation()
+    for slide_number in range(pages):
+        slide = presentation.slides.add_slide(presentation.slide_layouts[1])
+        slide.shapes.title.text = f"Slide {slide_number + 1}: {rng.choice(WORDS).title()}"
+        body = slide.placeholders[1].text_frame
+        body.text = _sentence(rng, 8)
+        for _ in range(4):
+            body.add_paragraph().text = _sentence(rng, 8)
+        if slide_number % 2:
+            rows = _table(rng, rows=3)
+            shape = slide.shapes.add_table(len(rows), len(rows[0]), Inches(1), Inches(5), Inches(8), Inches(1.5))
+            for r, cells in enumerate(rows):
+                for c, cell in enumerate(cells):
+                    shape.table.cell(r, c).text = cell
+    presentation.save(path)
+
+
+def write_html(path: Path, pages: int, rng: random.Random):
+    parts = ["<!DOCTYPE html><html><head><title>Benchmark document</title></head><body>"]
+    for page in range(pages):
+        parts.append(f"<h1>Section {page + 1}</h1>")
+        parts.extend(f"<p>{_paragraph(rng)}</p>" for _ in range(4))
+        header, *rows = _table(rng)
+        parts.append("<table><tr>" + "".join(f"<th>{cell}</th>" for cell in header) + "</tr>")
+        parts.extend("<tr>" + "".join(f"<td>{cell}</td>" for cell in row) + "</tr>" for row in rows)
+        parts.append("</table>")
+    parts.append("</body></html>")
+    path.write_text("\n".join(parts), encoding="utf-8")
+
+
+def write_markdown(path: Path, pages: int, rng: random.Random):
+    parts = []
+    for page in range(pages):
+        parts.append(f"# Section {page + 1}\n")
+        parts.extend(f"{_paragraph(rng)}\n" for _ in range(4))
+        header, *rows = _table(rng)
+        parts.append("| " + " | ".join(header) + " |")
+        parts.append("|" + "---|" * len(header))
+        parts.extend("| " + " | ".join(row) + " |" for row in rows)
+        parts.append("")
+    path.write_text("\n".join(parts), encoding="utf-8")
+
+
+WRITERS = {
+    "pdf": (".pdf", write_text_pdf),
+    "scanned_pdf": (".pdf", write_scanned_pdf),
+    "png": (".png", write_png),
+    "docx": (".docx", write_docx),
+    "pptx": (".pptx", write_pptx),
+    "html": (".html", write_html),
+    "md": (".md", write_markdown),
+}
+
+
+def generate_corpus(directory: Path, formats=FORMATS, sizes=tuple(SIZES), seed: int = 0) -> List[CorpusDocument]:
+    """
+    Write the synthetic corpus to `directory` and a `corpus.json` manifest.
+
+    The content is generated from `seed`, so a corpus is identical across runs
+    and machines. Images are a single page whatever the size class.
+    """
+    directory.mkdir(parents=True, exist_ok=True)
+    documents = []
+    for format in formats:
+        suffix, writer = WRITERS[format]
+        for size in sizes:
+            pages = 1 if format == "png" else SIZES[size]
+            if format == "png" and size != "small":
+                continue
+            path = directory / f"{format}_{size}{suffix}"
+            writer(path, pages, random.Random(f"{seed}-{format}-{size}"))
+            documents.append(CorpusDocument(str(path.resolve()), format, size, pages))
+    (directory / "corpus.json").write_text(json.dumps([asdict(d) for d in documents], indent=2))
+    return documents
+
+
+def load_corpus(directory: Path) -> List[CorpusDocument]:
+    """Read the manifest of a corpus written by `generate_corpus`"""
+    return [CorpusDocument(**entry) for entry in json.loads((directory / "corpus.json").read_text())]
+
+
+def iter_corpus(documents: List[CorpusDocument], formats=None, sizes=None) -> Iterator[CorpusDocument]:
+    for document in documents:
+        if (formats is None or document.format in formats) and (sizes is None or document.size in sizes):
+            yield document
@@ -0,0 +1,105 @@
+import re
+import subprocess
+import sys
+import time
+from collections import defaultdict
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Dict, List, Optional
+
+# One line of `python -X importtime` output: self and cumulative microseconds,
+# then the module name indented by two spaces per nesting level
+IMPORT_LINE = re.compile(r"^import time:\s+(\d+) \|\s+(\d+) \| ( *)(\S+)$")
+
+# Modules that should only be imported by the components that need them
+HEAVY_MODULES = ("torch", "docling.document_converter", "docling_ibm_models", "easyocr", "curl_cffi", "pypdfium2")
+
+
+@dataclass
+class ImportRecord:
+    module: str
+    self_us: int
+    cumulative_us: int
+    depth: int
+
+
+def parse_importtime(output: str) -> List[ImportRecord]:
+    """Records of the `-X importtime` lines in `output`, in import completion order"""
+    records = []
+    for line in output.splitlines():
+        match = IMPORT_LINE.match(line)
+        if match:
+            self_us, cumulative_us, indent, module = match.groups()
+            records.append(ImportRecord(module, int(self_us), int(cumulative_us), (len(indent) - 1) // 2))
+    return records
+
+
+def profile_imports(module: str = "main", python: str = sys.executable, env: Optional[Dict[str, str]] = None) -> dict:
+    """
+    Import `module` in a fresh interpreter under `-X importtime`.
+
+    Runs from the repository root, so `main` is the API module. Returns the
+    wall time of the interpreter and the parsed records, without the modules
+    the interpreter imports at startup anyway.
+    """
+
+    def run(code: str) -> subprocess.CompletedProcess:
+        return subprocess.run(
+            [python, "-X", "importtime", "-c", code],
+            cwd=Path(__file__).parent.parent, env=env, capture_output=True, text=True,
+        )
+
+    startup = {record.module for record in parse_importtime(run("pass").stderr)}
+    started = time.perf_counter()
+    completed = run(f"import {module}")
+    wall_seconds = time.perf_counter() - started
+    if completed.returncode != 0:
+        raise RuntimeError(f"Importing {module} failed:\n{completed.stderr[-2000:]}")
+    records = [record for record in parse_importtime(completed.stderr) if record.module not in startup]
+    return {"module": module, "wall_seconds": wall_seconds, "records": records}
+
+
+def digest(profile: dict, top: int = 20) -> dict:
+    """
+    Summarize an import profile: total import time, the top-level packages
+    that cost the most (self time summed over their modules), the direct
+    imports of the profiled module with their cumulative time, and which of
+    HEAVY_MODULES got imported.
+    """
+    records: List[ImportRecord] = profile["records"]
+    packages = defaultdict(lambda: [0, 0])
+    for record in records:
+        package = packages[record.module.split(".")[0]]
+        package[0] += record.self_us
+        package[1] += 1
+    imported = {record.module for record in records}
+    return {
+        "module": profile["module"],
+        "wall_seconds": round(profile["wall_seconds"], 3),
+        "import_seconds": round(sum(r.self_us for r in records) / 1e6, 3),
+        "modules": len(records),
+        "packages": [
+            {"package": name, "seconds": round(self_us / 1e6, 4), "modules": count}
+            for name, (self_us, count) in sorted(packages.items(), key=lambda item: -item[1][0])[:top]
+        ],
+        "direct": [
+            {"module": r.module, "seconds": round(r.cumulative_us / 1e6, 4)}
+            for r in sorted((r for r in records if r.depth == 0), key=lambda r: -r.cumulative_us)[:top]
+        ],
+        "heavy": {name: name in imported for name in HEAVY_MODULES},
+    }
+
+
+def format_digest(summary: dict) -> List[str]:
+    lines = [
+        f"import {summary['module']}: {summary['import_seconds']}s in {summary['modules']} modules "
+        f"({summary['wall_seconds']}s interpreter wall time)",
+        "",
+        "Slowest packages (self time):",
+    ]
+    lines += [f"  {p['package']:32} {p['seconds']:>8.3f}s  {p['modules']:4} modules" for p in summary["packages"]]
+    lines += ["", "Direct imports (cumulative):"]
+    lines += [f"  {d['module']:32} {d['seconds']:>8.3f}s" for d in summary["direct"]]
+    lines += ["", "Heavy modules:"]
+    lines += [f"  {name:32} {'imported' if loaded else 'deferred'}" for name, loaded in summary["heavy"].items()]
+    return lines
@@ -0,0 +1,210 @@
+import asyncio
+import itertools
+import json
+import os
+import platform
+import re
+import subprocess
+import time
+from contextlib import asynccontextmanager
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import AsyncIterator, Dict, List, Optional
+
+import httpx
+
+from benchmarks.corpus import CorpusDocument
+
+# Worker RSS samples are read from the server's own /metrics
+RSS_METRIC = re.compile(r'^docling_api_worker_rss_bytes\{worker="[^"]*"\} (\S+)$', re.MULTILINE)
+
+
+@dataclass
+class Sample:
+    endpoint: str
+    format: str
+    size: str
+    pages: int
+    status: int
+    seconds: float
+    bytes: int
+
+
+@dataclass
+class RunConfig:
+    target: str
+    endpoints: List[str]
+    concurrency: int
+    requests: int
+    warmup: int = 1
+    output_format: str = "markdown"
+    timeout: float = 600.0
+    query: Dict[str, str] = field(default_factory=dict)
+
+
+def percentile(values: List[float], q: float) -> Optional[float]:
+    """Percentile with linear interpolation between the closest ranks"""
+    if not values:
+        return None
+    ordered = sorted(values)
+    rank = (len(ordered) - 1) * q / 100
+    low = int(rank)
+    high = min(low + 1, len(ordered) - 1)
+    return ordered[low] + (ordered[high] - ordered[low]) * (rank - low)
+
+
+def summarize(samples: List[Sample], wall_seconds: float) -> dict:
+    """Latency percentiles and throughput of a group of samples"""
+    ok = [s for s in samples if s.status == 200]
+    latencies = [s.seconds for s in ok]
+    pages = sum(s.pages for s in ok)
+    return {
+        "requests": len(samples),
+        "errors": len(samples) - len(ok),
+        "p50": _round(percentile(latencies, 50)),
+        "p95": _round(percentile(latencies, 95)),
+        "p99": _round(percentile(latencies, 99)),
+        "mean": _round(sum(latencies) / len(latencies)) if latencies else None,
+        "max": _round(max(latencies)) if latencies else None,
+        "requests_per_second": _round(len(ok) / wall_seconds) if wall_seconds else None,
+        "pages_per_second": _round(pages / wall_seconds) if wall_seconds else None,
+        "response_bytes": sum(s.bytes for s in ok),
+    }
+
+
+def _round(value: Optional[float]) -> Optional[float]:
+    return round(value, 4) if value is not None else None
+
+
+@asynccontextmanager
+async def open_client(config: RunConfig) -> AsyncIterator[httpx.AsyncClient]:
+    """
+    HTTP client for the target: a server URL, or "inprocess" to load `main.app`
+    in this process (startup and shutdown handlers included) and call it
+    without a socket.
+    """
+    timeout = httpx.Timeout(config.timeout)
+    if config.target != "inprocess":
+        limits = httpx.Limits(max_connections=config.concurrency + 1)
+        async with httpx.AsyncClient(base_url=config.target, timeout=timeout, limits=limits) as client:
+            yield client
+        return
+
+    from main import app
+
+    async with app.router.lifespan_context(app):
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://benchmark", timeout=timeout) as client:
+            yield client
+
+
+async def _request(client: httpx.AsyncClient, config: RunConfig, endpoint: str, document: CorpusDocument) -> Sample:
+    params = {"output_format": config.output_format, **config.query}
+    started = time.perf_counter()
+    if endpoint == "convert":
+        response = await client.post("/convert", params={**params, "url": document.path})
+    else:
+        with open(document.path, "rb") as f:
+            content = f.read()
+        files = {"file": (Path(document.path).name, content)}
+        response = await client.post("/upload-convert", params=params, files=files)
+    seconds = time.perf_counter() - started
+    return Sample(endpoint, document.format, document.size, document.pages, response.status_code, seconds, len(response.content))
+
+
+async def _sample_rss(client: httpx.AsyncClient, interval: float, peak: dict):
+    """Track the peak summed RSS of the server processes until cancelled"""
+    while True:
+        try:
+            response = await client.get("/metrics")
+            total = sum(float(value) for value in RSS_METRIC.findall(response.text))
+            peak["bytes"] = max(peak["bytes"], int(total))
+        except httpx.HTTPError:
+            pass
+        await asyncio.sleep(interval)
+
+
+async def run_load(config: RunConfig, documents: List[CorpusDocument], rss_interval: float = 0.5) -> dict:
+    """
+    Send `config.requests` requests per endpoint, `config.concurrency` at a
+    time, cycling through `documents`, and summarize latency and throughput.
+
+    Every document is first sent `config.warmup` times per endpoint without
+    being measured, so lazily built converters do not skew the percentiles.
+    """
+    if not documents:
+        raise ValueError("The benchmark corpus is empty")
+
+    async with open_client(config) as client:
+        for endpoint in config.endpoints:
+            for document in documents * config.warmup:
+                await _request(client, config, endpoint, document)
+
+        peak = {"bytes": 0}
+        sampler = asyncio.create_task(_sample_rss(client, rss_interval, peak))
+        results = {}
+        try:
+            for endpoint in config.endpoints:
+                work = iter(itertools.islice(itertools.cycle(documents), config.requests))
+                samples: List[Sample] = []
+
+                async def worker():
+                    for document in work:
+                        samples.append(await _request(client, config, endpoint, document))
+
+                started = time.perf_counter()
+                await asyncio.gather(*(worker() for _ in range(config.concurrency)))
+                wall_seconds = time.perf_counter() - started
+
+                by_format = {}
+                for key, group in itertools.groupby(
+                    sorted(samples, key=lambda s: (s.format, s.size)), key=lambda s: f"{s.format}/{s.size}"
+                ):
+                    group = list(group)
+                    # Throughput per format is not meaningful while other formats share the server
+                    by_format[key] = {k: v for k, v in summarize(group, wall_seconds).items() if not k.endswith("_per_second")}
+                results[endpoint] = {"wall_seconds": round(wall_seconds, 3), **summarize(samples, wall_seconds), "by_format": by_format}
+        finally:
+            sampler.cancel()
+
+    return {
+        "commit": _git_commit(),
+        "timestamp": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "host": {"platform": platform.platform(), "python": platform.python_version(), "cpus": os.cpu_count()},
+        "config": config.__dict__,
+        "corpus": [f"{d.format}/{d.size}" for d in documents],
+        "peak_rss_bytes": peak["bytes"] or None,
+        "endpoints": results,
+    }
+
+
+def _git_commit() -> Optional[str]:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            cwd=Path(__file__).parent, capture_output=True, text=True, check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def compare(baseline: dict, candidate: dict) -> List[str]:
+    """Lines comparing the headline numbers of two saved runs"""
+    lines = [f"baseline {baseline.get('commit')} ({baseline.get('timestamp')}) -> candidate {candidate.get('commit')} ({candidate.get('timestamp')})"]
+    metrics = ("p50", "p95", "p99", "requests_per_second", "pages_per_second", "errors")
+    for endpoint in sorted(set(baseline["endpoints"]) & set(candidate["endpoints"])):
+        for metric in metrics:
+            old = baseline["endpoints"][endpoint].get(metric)
+            new = candidate["endpoints"][endpoint].get(metric)
+            change = f"{(new - old) / old:+.1%}" if old and new is not None else "n/a"
+            lines.append(f"{endpoint:16} {metric:20} {old!s:>10} -> {new!s:>10}  {change}")
+    old_rss, new_rss = baseline.get("peak_rss_bytes"), candidate.get("peak_rss_bytes")
+    if old_rss and new_rss:
+        lines.append(f"{'peak_rss_mb':37} {old_rss / 2**20:>10.1f} -> {new_rss / 2**20:>10.1f}  {(new_rss - old_rss) / old_rss:+.1%}")
+    return lines
+
+
+def save_results(results: dict, path: Path):
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text(json.dumps(results, indent=2))
@@ -0,0 +1,171 @@
+import difflib
+import time
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Dict, List, Optional
+
+from benchmarks.corpus import CorpusDocument
+
+# Layout clusters (and tables) of the two runs match when they overlap this much
+MATCH_IOU = 0.5
+
+# Agreement below which a candidate fails the comparison
+MIN_LAYOUT_F1 = 0.95
+MIN_TABLE_AGREEMENT = 0.9
+MIN_MARKDOWN_SIMILARITY = 0.95
+
+
+@dataclass
+class ConverterSpec:
+    """One side of a comparison: pipeline options and, optionally, ONNX exports or other model artifacts"""
+
+    name: str
+    options: dict
+    onnx_path: Optional[Path] = None
+    artifacts_path: Optional[Path] = None
+
+
+def _build(spec: ConverterSpec, artifacts_path: Optional[Path]):
+    from docling.datamodel.base_models import InputFormat
+
+    from conversion import ConversionOptions
+    from converter_pool import PooledConverter
+
+    slot = PooledConverter(
+        0, [InputFormat.PDF, InputFormat.IMAGE], ConversionOptions(**spec.options),
+        spec.artifacts_path or artifacts_path, spec.onnx_path,
+    )
+    slot.build()
+    return slot.converter
+
+
+def _edges(bbox) -> tuple:
+    """(left, top, right, bottom) whatever the coordinate origin of the box"""
+    return bbox.l, min(bbox.t, bbox.b), bbox.r, max(bbox.t, bbox.b)
+
+
+def _iou(a, b) -> float:
+    al, at, ar, ab = _edges(a)
+    bl, bt, br, bb = _edges(b)
+    width = min(ar, br) - max(al, bl)
+    height = min(ab, bb) - max(at, bt)
+    if width <= 0 or height <= 0:
+        return 0.0
+    intersection = width * height
+    return intersection / ((ar - al) * (ab - at) + (br - bl) * (bb - bt) - intersection)
+
+
+def _match(reference: list, candidate: list, key) -> List[tuple]:
+    """Greedy one-to-one matching of two lists of elements by bounding box overlap"""
+    pairs = sorted(
+        ((_iou(key(r).bbox, key(c).bbox), i, j) for i, r in enumerate(reference) for j, c in enumerate(candidate)),
+        reverse=True,
+    )
+    used_reference, used_candidate, matches = set(), set(), []
+    for iou, i, j in pairs:
+        if iou < MATCH_IOU:
+            break
+        if i not in used_reference and j not in used_candidate:
+            used_reference.add(i)
+            used_candidate.add(j)
+            matches.append((reference[i], candidate[j], iou))
+    return matches
+
+
+def compare_results(reference, candidate) -> Dict[str, float]:
+    """
+    Agreement between two ConversionResults of the same document.
+
+    Layout clusters match when they have the same label and overlap by at
+    least MATCH_IOU; tables match when they overlap and have the same number
+    of rows and columns. Counts are summed so documents can be aggregated.
+    """
+    counts = {
+        "reference_clusters": 0, "candidate_clusters": 0, "matched_clusters": 0, "matched_iou": 0.0,
+        "reference_tables": 0, "candidate_tables": 0, "matched_tables": 0,
+    }
+    for ref_page, cand_page in zip(reference.pages, candidate.pages):
+        ref_clusters = ref_page.predictions.layout.clusters if ref_page.predictions.layout else []
+        cand_clusters = cand_page.predictions.layout.clusters if cand_page.predictions.layout else []
+        counts["reference_clusters"] += len(ref_clusters)
+        counts["candidate_clusters"] += len(cand_clusters)
+        for ref, cand, iou in _match(ref_clusters, cand_clusters, key=lambda cluster: cluster):
+            if ref.label == cand.label:
+                counts["matched_clusters"] += 1
+                counts["matched_iou"] += iou
+
+        ref_tables = list(ref_page.predictions.tablestructure.table_map.values()) if ref_page.predictions.tablestructure else []
+        cand_tables = list(cand_page.predictions.tablestructure.table_map.values()) if cand_page.predictions.tablestructure else []
+        counts["reference_tables"] += len(ref_tables)
+        counts["candidate_tables"] += len(cand_tables)
+        for ref, cand, _ in _match(ref_tables, cand_tables, key=lambda table: table.cluster):
+            if (ref.num_rows, ref.num_cols) == (cand.num_rows, cand.num_cols):
+                counts["matched_tables"] += 1
+    return counts
+
+
+def summarize_counts(counts: Dict[str, float]) -> Dict[str, Optional[float]]:
+    """Layout F1, mean IoU of the matched clusters and table structure agreement"""
+    clusters = counts["reference_clusters"] + counts["candidate_clusters"]
+    tables = counts["reference_tables"] + counts["candidate_tables"]
+    return {
+        "layout_f1": round(2 * counts["matched_clusters"] / clusters, 4) if clusters else None,
+        "layout_mean_iou": round(counts["matched_iou"] / counts["matched_clusters"], 4) if counts["matched_clusters"] else None,
+        "table_agreement": round(2 * counts["matched_tables"] / tables, 4) if tables else None,
+    }
+
+
+def run_parity(
+    documents: List[CorpusDocument],
+    reference: ConverterSpec,
+    candidate: ConverterSpec,
+    artifacts_path: Optional[Path] = None,
+) -> dict:
+    """
+    Convert every document with both converters and report how far the
+    candidate drifts from the reference, and the speed of each.
+
+    The first document is converted once by each side before measuring, so
+    lazy initialization (TorchScript profiling runs, ONNX Runtime sessions)
+    does not count.
+    """
+    converters = {spec.name: _build(spec, artifacts_path) for spec in (reference, candidate)}
+    for converter in converters.values():
+        converter.convert(documents[0].path)
+
+    seconds = {name: 0.0 for name in converters}
+    totals: Dict[str, float] = {}
+    pages = 0
+    per_document = []
+    for document in documents:
+        results = {}
+        for name, converter in converters.items():
+            started = time.perf_counter()
+            results[name] = converter.convert(document.path)
+            seconds[name] += time.perf_counter() - started
+        ref, cand = results[reference.name], results[candidate.name]
+        counts = compare_results(ref, cand)
+        for key, value in counts.items():
+            totals[key] = totals.get(key, 0) + value
+        pages += len(ref.pages)
+        markdown = difflib.SequenceMatcher(
+            None, ref.document.export_to_markdown(), cand.document.export_to_markdown()
+        ).ratio()
+        per_document.append({
+            "document": f"{document.format}/{document.size}",
+            "pages": len(ref.pages),
+            **summarize_counts(counts),
+            "markdown_similarity": round(markdown, 4),
+        })
+
+    similarities = [d["markdown_similarity"] for d in per_document]
+    return {
+        "reference": reference.name,
+        "candidate": candidate.name,
+        "pages": pages,
+        **summarize_counts(totals),
+        "markdown_similarity": round(min(similarities), 4),
+        "pages_per_second": {name: round(pages / s, 3) if s else None for name, s in seconds.items()},
+        "speedup": round(seconds[reference.name] / seconds[candidate.name], 3) if seconds[candidate.name] else None,
+        "documents": per_document,
+    }
@@ -0,0 +1,618 @@
+import json
+import threading
+import time
+from contextlib import contextmanager
+from datetime import datetime, timezone
+from enum import Enum
+from io import BytesIO
+from pathlib import Path
+from typing import TYPE_CHECKING, Iterator, List, Optional, Tuple, Union
+
+from docling.datamodel.base_models import ConversionStatus, DocumentStream, InputFormat
+from docling.datamodel.pipeline_options import EasyOcrOptions, PdfPipelineOptions, TableFormerMode
+from pydantic import BaseModel, ConfigDict, Field
+
+from model_cache import easyocr_cache_path, enable_mmap, is_model_cache
+
+# docling.document_converter pulls in every pipeline and their models (torch
+# included) and pypdfium2 is only needed for page selection: both are imported
+# where they are used, so importing this module stays cheap.
+if TYPE_CHECKING:
+    import pypdfium2 as pdfium
+    from docling.document_converter import DocumentConverter
+
+
+class OutputFormat(str, Enum):
+    MARKDOWN = "markdown"
+    JSON = "json"
+    ALL = "all"
+
+
+class TableMode(str, Enum):
+    FAST = "fast"
+    ACCURATE = "accurate"
+
+
+class Precision(str, Enum):
+    FP32 = "fp32"
+    INT8 = "int8"
+
+
+# Options only read while converting, not when the models are loaded
+IMAGE_OPTIONS = ("images_scale", "generate_page_images")
+
+
+class ConversionOptions(BaseModel):
+    """
+    Pipeline options a request may choose for PDF and image inputs.
+
+    The result cache keys on every option (`profile`). Converters only
+    depend on the options that change which models are loaded
+    (`model_profile`): the page image options are applied per conversion with
+    `apply_image_options`.
+    """
+
+    model_config = ConfigDict(frozen=True)
+
+    do_ocr: bool = Field(default=True, description="Run OCR on bitmap content")
+    do_table_structure: bool = Field(default=True, description="Recover the structure of tables")
+    table_mode: TableMode = Field(default=TableMode.ACCURATE, description="TableFormer mode (fast, accurate)")
+    images_scale: float = Field(default=1.0, gt=0, le=4.0, description="Scale of the rendered page images")
+    generate_page_images: bool = Field(default=False, description="Keep page images in the output")
+    precision: Precision = Field(
+        default=Precision.FP32, description="Layout and TableFormer weights (fp32, int8: dynamically quantized)"
+    )
+
+    @property
+    def profile(self) -> str:
+        """Stable key identifying this combination of options"""
+        return json.dumps(self.model_dump(mode="json"), sort_keys=True)
+
+    @property
+    def model_profile(self) -> str:
+        """Stable key of the options a converter is built with (all but the page image options)"""
+        return json.dumps(self.model_dump(mode="json", exclude=set(IMAGE_OPTIONS)), sort_keys=True)
+
+    def pipeline_options(self, artifacts_path: Optional[Path] = None) -> PdfPipelineOptions:
+        pipeline_options = PdfPipelineOptions(artifacts_path=artifacts_path)
+        if is_model_cache(artifacts_path) and easyocr_cache_path(artifacts_path) is not None:
+            pipeline_options.ocr_options = EasyOcrOptions(
+                model_storage_directory=str(easyocr_cache_path(artifacts_path)), download_enabled=False
+            )
+        pipeline_options.do_ocr = self.do_ocr
+        pipeline_options.do_table_structure = self.do_table_structure
+        pipeline_options.table_structure_options.mode = (
+            TableFormerMode.FAST if self.table_mode == TableMode.FAST else TableFormerMode.ACCURATE
+        )
+        pipeline_options.images_scale = self.images_scale
+        pipeline_options.generate_page_images = self.generate_page_images
+        return pipeline_options
+
+
+DEFAULT_OPTIONS = ConversionOptions()
+
+
+def apply_image_options(converter: "DocumentConverter", options: ConversionOptions):
+    """
+    Render and keep page images in the PDF and image pipelines of `converter`
+    as `options` asks.
+
+    Those options are only read while converting, so a borrowed converter is
+    switched in place instead of being built per `images_scale`.
+    """
+    from docling.models.page_assemble_model import PageAssembleModel
+    from docling.models.page_preprocessing_model import PagePreprocessingModel
+
+    for format_option in converter.format_to_options.values():
+        pipeline_options = format_option.pipeline_options
+        if isinstance(pipeline_options, PdfPipelineOptions):
+            # Same object as the initialized pipelines hold, so they are not rebuilt
+            pipeline_options.images_scale = options.images_scale
+            pipeline_options.generate_page_images = options.generate_page_images
+    for pipeline in converter.initialized_pipelines.values():
+        pipeline_options = pipeline.pipeline_options
+        for stage in getattr(pipeline, "build_pipe", None) or []:
+            model = getattr(stage, "model", stage)
+            if isinstance(model, PagePreprocessingModel):
+                model.options.images_scale = pipeline_options.images_scale
+            elif isinstance(model, PageAssembleModel):
+                model.options.keep_images = (
+                    pipeline_options.generate_page_images
+                    or pipeline_options.generate_picture_images
+                    or pipeline_options.generate_table_images
+                )
+
+
+class PageSelectionError(ValueError):
+    """Raised for an invalid page selection or one that cannot be applied."""
+
+
+class InvalidDocumentError(ValueError):
+    """Raised for a document that cannot be read (missing file, corrupt PDF)."""
+
+
+# Failures caused by the request's input rather than by the converter
+INPUT_ERRORS = (PageSelectionError, InvalidDocumentError)
+
+
+class PageSelection(BaseModel):
+    """
+    Pages of a PDF to convert.
+
+    `ranges` holds 1-based inclusive (start, end) pairs, an end of None meaning
+    the last page; no ranges means every page. At most `max_pages` of the
+    selected pages are kept.
+    """
+
+    model_config = ConfigDict(frozen=True)
+
+    ranges: Tuple[Tuple[int, Optional[int]], ...] = ()
+    max_pages: Optional[int] = None
+
+    @classmethod
+    def parse(cls, page_range: Optional[str], max_pages: Optional[int] = None) -> "PageSelection":
+        """
+        Parse a page range such as "1-5", "3" or "1-3,7,10-".
+
+        Raises:
+            PageSelectionError: If the range is malformed
+        """
+        ranges = []
+        for part in (page_range or "").split(","):
+            part = part.strip()
+            if not part:
+                continue
+            start, sep, end = part.partition("-")
+            try:
+                first = int(start)
+                last = (int(end) if end.strip() else None) if sep else first
+            except ValueError:
+                raise PageSelectionError(f"Invalid page range: {part!r}")
+            if first < 1 or (last is not None and last < first):
+                raise PageSelectionError(f"Invalid page range: {part!r}")
+            ranges.append((first, last))
+        if max_pages is not None and max_pages < 1:
+            raise PageSelectionError("max_pages must be at least 1")
+        return cls(ranges=tuple(ranges), max_pages=max_pages)
+
+    def pages(self, page_count: int) -> List[int]:
+        """Selected 1-based page numbers of a document with `page_count` pages"""
+        if self.ranges:
+            selected = sorted({
+                page
+                for first, last in self.ranges
+                for page in range(first, min(last or page_count, page_count) + 1)
+            })
+        else:
+            selected = list(range(1, page_count + 1))
+        if self.max_pages is not None:
+            selected = selected[:self.max_pages]
+        return selected
+
+
+def _is_pdf(source: Union[str, Path, DocumentStream]) -> bool:
+    if isinstance(source, DocumentStream):
+        return source.stream.getvalue()[:5] == b"%PDF-"
+    with open(source, "rb") as f:
+        return f.read(5) == b"%PDF-"
+
+
+def _open_pdf(source: Union[str, Path, DocumentStream]) -> Tuple[str, "pdfium.PdfDocument"]:
+    import pypdfium2 as pdfium
+
+    if isinstance(source, DocumentStream):
+        return source.name, pdfium.PdfDocument(source.stream.getvalue())
+    return Path(source).name, pdfium.PdfDocument(str(source))
+
+
+def _pdf_subset(pdf: "pdfium.PdfDocument", name: str, pages: List[int]) -> DocumentStream:
+    """New in-memory PDF holding only the given 1-based pages"""
+    import pypdfium2 as pdfium
+
+    selected = pdfium.PdfDocument.new()
+    try:
+        selected.import_pages(pdf, pages=[page - 1 for page in pages])
+        stream = BytesIO()
+        selected.save(stream)
+    finally:
+        selected.close()
+    stream.seek(0)
+    return DocumentStream(name=name, stream=stream)
+
+
+IMAGE_EXTENSIONS = {".png", ".jpg", ".jpeg", ".tif", ".tiff", ".bmp"}
+
+
+def count_pages(source: Union[str, Path, DocumentStream], selection: Optional[PageSelection] = None) -> Optional[int]:
+    """
+    Number of pages the PDF and image pipelines will process for `source`.
+
+    Returns:
+        int: Selected page count of a PDF, 1 for an image, None for other formats
+    """
+    if _is_pdf(source):
+        _, pdf = _open_pdf(source)
+        try:
+            return len((selection or PageSelection()).pages(len(pdf)))
+        finally:
+            pdf.close()
+    name = source.name if isinstance(source, DocumentStream) else str(source)
+    return 1 if Path(name).suffix.lower() in IMAGE_EXTENSIONS else None
+
+
+def prepare_source(
+    source: Union[str, Path, DocumentStream], selection: Optional[PageSelection] = None
+) -> Tuple[Union[str, Path, DocumentStream], Optional[List[int]]]:
+    """
+    Check that `source` can be read and cut a PDF down to the selected pages,
+    before a converter is borrowed for it.
+
+    Pages that are not selected are dropped from the document, so they are
+    never rasterized or run through layout, OCR and table models. Bad input is
+    rejected here instead of failing inside a converter.
+
+    Returns:
+        tuple: The source to convert and the 1-based page numbers it contains
+               (None for formats without pages)
+
+    Raises:
+        InvalidDocumentError: If the file is missing or is not a readable PDF
+        PageSelectionError: If the selection cannot be applied
+    """
+    import pypdfium2 as pdfium
+
+    if not isinstance(source, DocumentStream) and not Path(source).is_file():
+        raise InvalidDocumentError(f"Document not found: {_source_name(source)}")
+    if not _is_pdf(source):
+        if selection is not None:
+            raise PageSelectionError("Page selection is only supported for PDF documents")
+        return source, None
+
+    try:
+        name, pdf = _open_pdf(source)
+    except pdfium.PdfiumError as e:
+        raise InvalidDocumentError(f"Cannot read PDF {_source_name(source)}: {e}")
+    try:
+        page_count = len(pdf)
+        pages = (selection or PageSelection()).pages(page_count)
+        if not pages:
+            raise PageSelectionError(f"No pages selected (the document has {page_count} pages)")
+        if len(pages) == page_count:
+            return source, pages
+        return _pdf_subset(pdf, name, pages), pages
+    finally:
+        pdf.close()
+
+
+class ConversionCancelledError(RuntimeError):
+    """Raised inside a conversion whose request was cancelled."""
+
+
+_cancellation = threading.local()
+
+
+@contextmanager
+def cancellable(event: threading.Event):
+    """Let conversions on this thread be cancelled by setting `event`"""
+    _cancellation.event = event
+    try:
+        yield
+    finally:
+        _cancellation.event = None
+
+
+def check_cancelled():
+    """Raise ConversionCancelledError if the conversion on this thread was cancelled"""
+    event = getattr(_cancellation, "event", None)
+    if event is not None and event.is_set():
+        raise ConversionCancelledError("Conversion was cancelled")
+
+
+def _cancellation_checkpoint(conv_res, page_batch):
+    for page in page_batch:
+        check_cancelled()
+        yield page
+
+
+def install_cancellation_checks(converter: "DocumentConverter"):
+    """
+    Make the paginated pipelines of `converter` check for cancellation before
+    every page.
+
+    Pages are pulled lazily through the `build_pipe` models, so a checkpoint in
+    front of the first model stops a cancelled conversion at the next page
+    instead of after the whole document.
+    """
+    for pipeline in converter.initialized_pipelines.values():
+        build_pipe = getattr(pipeline, "build_pipe", None)
+        models = [getattr(model, "model", model) for model in build_pipe or []]
+        if build_pipe is not None and _cancellation_checkpoint not in models:
+            build_pipe.insert(0, _cancellation_checkpoint)
+
+
+_record_spans = False
+
+
+def record_spans(enabled: bool = True):
+    """
+    Also turn the docling timings of every conversion into span records,
+    returned by `conversion_timings` under `spans`.
+
+    Records are `[name, start_ns, end_ns, attributes, parent]` lists (parent
+    being the index of the enclosing record), cheap to build and to send back
+    from a worker process; `tracing.record_conversion_spans` emits them.
+    Must be enabled before the worker processes are forked.
+    """
+    global _record_spans
+    _record_spans = enabled
+
+
+# Stage of the docling timings (ConversionResult.timings) that do not enclose
+# others: doc_build and pipeline_total span the whole conversion, and glm runs
+# inside doc_assemble.
+DOCLING_STAGES = {
+    "page_init": "parse",
+    "page_parse": "parse",
+    "ocr": "ocr",
+    "layout": "layout",
+    "table_structure": "table",
+    "page_assemble": "assemble",
+    "doc_assemble": "assemble",
+}
+
+
+def _time_ns(timestamp: datetime) -> int:
+    # docling records naive UTC timestamps
+    return int(timestamp.replace(tzinfo=timezone.utc).timestamp() * 1e9)
+
+
+def conversion_timings(result) -> dict:
+    """
+    Stage durations of a conversion, from the timings docling recorded on
+    `result` (see `build_converter`).
+
+    Returns:
+        dict: `{"stages": {stage: seconds}, "pages": n, "documents": 1, "spans": [...]}`
+    """
+    recorded = getattr(result, "timings", None) or {}
+    stages: dict = {}
+    for key, item in recorded.items():
+        stage = DOCLING_STAGES.get(key)
+        if stage is not None:
+            stages[stage] = stages.get(stage, 0.0) + sum(item.times)
+    total = recorded.get("pipeline_total")
+    if not stages and total is not None:
+        # Formats without pages: the backend does all the work
+        stages["parse"] = sum(total.times)
+    pages = recorded["page_init"].count if "page_init" in recorded else 0
+
+    spans = []
+    if _record_spans and total is not None and total.start_timestamps:
+        started = _time_ns(total.start_timestamps[0])
+        attributes = {"docling.source": result.input.file.name, "docling.pages": pages}
+        attributes.update({f"docling.{stage}_seconds": round(seconds, 6) for stage, seconds in stages.items()})
+        spans.append(["docling.convert", started, started + int(sum(total.times) * 1e9), attributes, None])
+        for key, item in recorded.items():
+            stage = DOCLING_STAGES.get(key)
+            if stage is None:
+                continue
+            for timestamp, seconds in zip(item.start_timestamps, item.times):
+                begin = _time_ns(timestamp)
+                spans.append([f"docling.{stage}", begin, begin + int(seconds * 1e9), {"docling.timing": key}, 0])
+    return {"stages": stages, "pages": pages, "documents": 1, "spans": spans}
+
+
+def _export(result, output_format: OutputFormat) -> Tuple[bytes, dict]:
+    """Export a conversion result, along with its timings (see `conversion_timings`)"""
+    started = time.perf_counter()
+    started_ns = time.time_ns() if _record_spans else 0
+    body = export_document(result.document, output_format)
+    timings = conversion_timings(result)
+    timings["stages"]["export"] = time.perf_counter() - started
+    if _record_spans:
+        attributes = {"docling.output_format": output_format.value, "docling.bytes": len(body)}
+        timings["spans"].append(["docling.export", started_ns, time.time_ns(), attributes, None])
+    return body, timings
+
+
+def build_converter(options: ConversionOptions = DEFAULT_OPTIONS, artifacts_path: Optional[Path] = None) -> "DocumentConverter":
+    """
+    Create a DocumentConverter whose PDF and image pipelines use `options`.
+
+    With an `artifacts_path` the models are loaded from there; otherwise every
+    pipeline checks the Hugging Face hub for its model snapshot when built.
+    When it is a model cache (see model_cache.py) its checkpoints are
+    memory-mapped and EasyOCR loads its weights from it too. docling records
+    the timings of every conversion (see `conversion_timings`).
+    """
+    from docling.datamodel.settings import settings
+    from docling.document_converter import DocumentConverter, ImageFormatOption, PdfFormatOption
+
+    settings.debug.profile_pipeline_timings = True
+    if is_model_cache(artifacts_path):
+        enable_mmap(artifacts_path)
+    pipeline_options = options.pipeline_options(artifacts_path)
+    return DocumentConverter(
+        format_options={
+            InputFormat.PDF: PdfFormatOption(pipeline_options=pipeline_options),
+            InputFormat.IMAGE: ImageFormatOption(pipeline_options=pipeline_options),
+        }
+    )
+
+
+def convert_and_export(
+    converter: "DocumentConverter",
+    source: Union[str, Path, DocumentStream],
+    output_format: OutputFormat,
+    pages_processed: Optional[List[int]] = None,
+) -> Tuple[bytes, dict]:
+    """
+    Convert a document and export it in the requested format.
+
+    This is the blocking unit of work handed to the conversion executor, so it
+    must stay a module-level function (process workers receive it by reference).
+
+    Args:
+        converter: Warm converter borrowed from the pool
+        source: Document prepared by `prepare_source`
+        output_format: Desired output format (markdown, json, or all)
+        pages_processed: Page numbers of the selected pages `source` holds,
+                         reported as `pages_processed`
+
+    Returns:
+        tuple: The markdown and/or JSON export of the document, as a JSON
+               object, and the conversion timings (see `conversion_timings`)
+    """
+    body, timings = _export(converter.convert(source), output_format)
+    if pages_processed is None:
+        return body, timings
+    return merge_json({"pages_processed": pages_processed}, body), timings
+
+
+def export_document(document, output_format: OutputFormat) -> bytes:
+    """
+    Export a DoclingDocument as markdown and/or JSON, encoded as a JSON object.
+
+    The document is serialized once, straight to bytes, by pydantic's
+    `model_dump_json` instead of going through `model_dump` and a second
+    encoding pass of the resulting dict.
+    """
+    parts = []
+    if output_format in (OutputFormat.MARKDOWN, OutputFormat.ALL):
+        markdown = json.dumps(document.export_to_markdown(), ensure_ascii=False)
+        parts.append(b'"markdown":' + markdown.encode("utf-8"))
+    if output_format in (OutputFormat.JSON, OutputFormat.ALL):
+        parts.append(b'"json":' + document.model_dump_json().encode("utf-8"))
+    return b"{" + b",".join(parts) + b"}"
+
+
+def merge_json(fields: dict, body: Optional[bytes]) -> bytes:
+    """
+    Prepend `fields` to an encoded JSON object without decoding it.
+
+    Used to add metadata (status, page number, ...) around an export produced
+    by `export_document`, which may be several megabytes large.
+    """
+    head = json.dumps(fields, ensure_ascii=False).encode("utf-8")
+    if not body or body == b"{}":
+        return head
+    if head == b"{}":
+        return body
+    return head[:-1] + b"," + body[1:]
+
+
+def convert_pages_and_export(
+    converter: "DocumentConverter",
+    source: Union[str, Path, DocumentStream],
+    output_format: OutputFormat,
+    page_numbers: Optional[List[int]] = None,
+) -> Iterator[dict]:
+    """
+    Convert a document page by page, yielding each page as soon as it is done.
+
+    PDF pages are converted one at a time, so the first page is available
+    after roughly one page worth of work. Structures spanning a page break
+    (e.g. a table continued on the next page) come out as separate pieces.
+    Other formats have no pages and are yielded as a single event. A final
+    summary event closes the stream.
+
+    Args:
+        converter: Warm converter borrowed from the pool
+        source: Document prepared by `prepare_source`
+        output_format: Desired output format (markdown, json, or all)
+        page_numbers: Page numbers of the pages of a PDF `source`, None for
+                      other formats (as returned by `prepare_source`)
+
+    Yields:
+        dict: `{"event": "page", "page": n, "body": export, "timings": ...}`
+              items (see `conversion_timings`), then
+              `{"event": "summary", "pages_processed": [...], "seconds": t}`
+    """
+    started = time.monotonic()
+    if page_numbers is None:
+        body, timings = _export(converter.convert(source), output_format)
+        yield {"event": "page", "page": None, "body": body, "timings": timings}
+        yield {"event": "summary", "pages_processed": None, "seconds": round(time.monotonic() - started, 3)}
+        return
+
+    name, pdf = _open_pdf(source)
+    try:
+        for index, page in enumerate(page_numbers, start=1):
+            check_cancelled()
+            page_started = time.monotonic()
+            body, timings = _export(converter.convert(_pdf_subset(pdf, name, [index])), output_format)
+            yield {
+                "event": "page",
+                "page": page,
+                "seconds": round(time.monotonic() - page_started, 3),
+                "body": body,
+                "timings": timings,
+            }
+    finally:
+        pdf.close()
+
+    yield {"event": "summary", "pages_processed": page_numbers, "seconds": round(time.monotonic() - started, 3)}
+
+
+def _source_name(source: Union[str, Path, DocumentStream]) -> str:
+    if isinstance(source, DocumentStream):
+        return source.name
+    return Path(source).name
+
+
+def convert_all_and_export(
+    converter: "DocumentConverter",
+    sources: List[Tuple[int, Union[str, Path, DocumentStream]]],
+    output_format: OutputFormat,
+) -> Iterator[dict]:
+    """
+    Convert several documents with `DocumentConverter.convert_all`.
+
+    Yields one item per source as soon as that document is done, tagged with
+    the caller's index and carrying the encoded export under `body` (see
+    `export_document`) and the conversion timings under `timings` (see
+    `conversion_timings`). Failed documents are yielded with an error instead
+    of aborting the rest of the batch; a cancelled batch raises
+    ConversionCancelledError.
+
+    Args:
+        converter: Warm converter borrowed from the pool
+        sources: (index, source) pairs to convert, in order
+        output_format: Desired output format (markdown, json, or all)
+    """
+    pending = list(sources)
+    try:
+        results = converter.convert_all([source for _, source in sources], raises_on_error=False)
+        for result in results:
+            # docling reports a document stopped by a cancellation checkpoint
+            # as failed and moves on: stop the whole shard instead
+            check_cancelled()
+            name = result.input.file.name
+            # Sources docling dropped without producing a result
+            while pending and _source_name(pending[0][1]) != name:
+                index, _ = pending.pop(0)
+                yield {"index": index, "status": "failure", "error": "No conversion result"}
+            if not pending:
+                break
+
+            index, _ = pending.pop(0)
+            if result.status in (ConversionStatus.SUCCESS, ConversionStatus.PARTIAL_SUCCESS):
+                body, timings = _export(result, output_format)
+                yield {"index": index, "status": result.status.value, "body": body, "timings": timings}
+            else:
+                errors = "; ".join(e.error_message for e in result.errors)
+                yield {
+                    "index": index,
+                    "status": result.status.value,
+                    "error": errors or "Conversion failed",
+                    "timings": conversion_timings(result),
+                }
+    except ConversionCancelledError:
+        raise
+    except Exception as e:
+        error = str(e)
+    else:
+        error = "No conversion result"
+
+    for index, _ in pending:
+        yield {"index": index, "status": "failure", "error": error}
@@ -0,0 +1,384 @@
+import os
+import queue
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from pathlib import Path
+from typing import TYPE_CHECKING, Dict, Iterable, Iterator, List, Optional, Set, Tuple
+
+from docling.datamodel.base_models import InputFormat
+
+from conversion import (
+    DEFAULT_OPTIONS,
+    IMAGE_OPTIONS,
+    INPUT_ERRORS,
+    ConversionCancelledError,
+    ConversionOptions,
+    Precision,
+    apply_image_options,
+    build_converter,
+    install_cancellation_checks,
+)
+
+if TYPE_CHECKING:
+    from docling.document_converter import DocumentConverter
+
+
+class PoolExhaustedError(RuntimeError):
+    """Raised when no converter becomes available within the acquire timeout."""
+
+
+class PooledConverter:
+    """
+    A single DocumentConverter slot managed by the ConverterPool.
+
+    The converter is built with its pipelines already initialized for every
+    configured InputFormat, so requests never pay the model loading cost.
+    """
+
+    def __init__(
+        self,
+        slot: int,
+        formats: Iterable[InputFormat],
+        options: ConversionOptions = DEFAULT_OPTIONS,
+        artifacts_path: Optional[Path] = None,
+        onnx_path: Optional[Path] = None,
+    ):
+        self.slot = slot
+        self.formats = list(formats)
+        self.options = options
+        self.artifacts_path = artifacts_path
+        self.onnx_path = onnx_path
+        self.converter: Optional["DocumentConverter"] = None
+        self.created_at = 0.0
+        self.uses = 0
+        self.consecutive_failures = 0
+        self.last_error: Optional[str] = None
+
+    def build(self):
+        """(Re)create the converter and warm the pipeline of every format"""
+        self.converter = None
+        converter = build_converter(self.options, self.artifacts_path)
+        for fmt in self.formats:
+            converter.initialize_pipeline(fmt)
+        if self.onnx_path is not None:
+            from onnx_backend import install_onnx_backend
+
+            install_onnx_backend(converter, self.onnx_path)
+        if self.options.precision == Precision.INT8:
+            from quantization import quantize_table_models
+
+            quantize_table_models(converter)
+        install_cancellation_checks(converter)
+        self.converter = converter
+        self.created_at = time.time()
+        self.uses = 0
+        self.consecutive_failures = 0
+
+    def is_healthy(self) -> bool:
+        """Cheap health check: the converter exists and all its pipelines are warm"""
+        if self.converter is None:
+            return False
+        format_options = getattr(self.converter, "format_to_options", {})
+        initialized = getattr(self.converter, "initialized_pipelines", {})
+        for fmt in self.formats:
+            option = format_options.get(fmt)
+            if option is None or option.pipeline_cls not in initialized:
+                return False
+        return True
+
+    def status(self) -> dict:
+        return {
+            "slot": self.slot,
+            "healthy": self.is_healthy(),
+            "uses": self.uses,
+            "consecutive_failures": self.consecutive_failures,
+            "age_seconds": round(time.time() - self.created_at, 1) if self.created_at else None,
+            "last_error": self.last_error,
+        }
+
+
+class _Profile:
+    """Converters sharing one set of model options (see ConversionOptions.model_profile)"""
+
+    def __init__(self, options: ConversionOptions):
+        self.options = options
+        self.slots: List[PooledConverter] = []
+        self.idle: "queue.Queue[PooledConverter]" = queue.Queue()
+
+    def in_use(self) -> bool:
+        """Whether a converter of the profile is borrowed or still being built"""
+        return self.idle.qsize() < len(self.slots)
+
+    def reserve(
+        self, formats: List[InputFormat], artifacts_path: Optional[Path], onnx_path: Optional[Path] = None
+    ) -> PooledConverter:
+        """Add a converter slot that is handed out once built and put in `idle`"""
+        slot = PooledConverter(len(self.slots), formats, self.options, artifacts_path, onnx_path)
+        self.slots.append(slot)
+        return slot
+
+
+class ConverterPool:
+    """
+    Process-wide pool of warmed DocumentConverter instances.
+
+    Converters are grouped by model profile (see ConversionOptions), the page
+    image options being applied to the borrowed converter. At startup the
+    default profile is filled with `size` converters and every profile in
+    `warm_profiles` with one, built in the background by up to
+    `warmup_workers` threads. Any other profile gets a single converter the
+    first time it is asked for, up to `max_profiles` profiles: past that the
+    least recently used idle one of those is dropped to make room. Models are
+    loaded from `artifacts_path` when set, and run on ONNX Runtime with the
+    exports in `onnx_path` when set (see onnx_backend.py). Profiles with int8
+    precision load the quantized models in `quantized_path` instead, on torch
+    (see quantization.py).
+
+    Requests borrow a converter with `pool.converter(options)` and give it back
+    when done. A converter that fails `max_failures` times in a row (errors
+    caused by the input aside; never when None), or that no longer passes its
+    health check, is recycled (rebuilt from scratch) before being handed out
+    again.
+    """
+
+    def __init__(
+        self,
+        size: int = 1,
+        formats: Optional[Iterable[InputFormat]] = None,
+        max_failures: Optional[int] = 3,
+        acquire_timeout: float = 60.0,
+        warm_profiles: Iterable[ConversionOptions] = (),
+        max_profiles: int = 8,
+        artifacts_path: Optional[Path] = None,
+        warmup_workers: Optional[int] = None,
+        onnx_path: Optional[Path] = None,
+        quantized_path: Optional[Path] = None,
+    ):
+        if size < 1:
+            raise ValueError("Converter pool size must be at least 1")
+        self.size = size
+        self.formats = list(formats) if formats is not None else list(InputFormat)
+        self.max_failures = max_failures
+        self.acquire_timeout = acquire_timeout
+        self.warm_profiles = list(warm_profiles)
+        self.max_profiles = max_profiles
+        self.artifacts_path = artifacts_path
+        self.warmup_workers = warmup_workers
+        self.onnx_path = onnx_path
+        self.quantized_path = quantized_path
+        self.recycled = 0
+        self.started = False
+        self.warming = 0
+        self._warmed = threading.Event()
+        # Least recently used first; the startup profiles are pinned
+        self._profiles: "OrderedDict[str, _Profile]" = OrderedDict()
+        self._pinned: Set[str] = set()
+        self._building: Set[PooledConverter] = set()
+        self._lock = threading.Lock()
+
+    def start(self):
+        """
+        Create the default and warm profiles and build their converters in the
+        background. Called once at application startup; returns right away.
+
+        Each converter is handed out as soon as it is built, so requests that
+        arrive while the pool is warming wait for the first warm converter
+        instead of failing. `ready()` tells when all of them are warm.
+        """
+        with self._lock:
+            if self.started:
+                return
+            slots: List[Tuple[_Profile, PooledConverter]] = []
+            default = _Profile(DEFAULT_OPTIONS)
+            slots += [(default, default.reserve(self.formats, *self._model_paths(DEFAULT_OPTIONS))) for _ in range(self.size)]
+            self._profiles[DEFAULT_OPTIONS.model_profile] = default
+            for options in self.warm_profiles:
+                if options.model_profile not in self._profiles:
+                    profile = _Profile(options)
+                    slots.append((profile, profile.reserve(self.formats, *self._model_paths(options))))
+                    self._profiles[options.model_profile] = profile
+            self._pinned = set(self._profiles)
+            self.warming = len(slots)
+            self.started = True
+
+        workers = self.warmup_workers or min(len(slots), os.cpu_count() or 1)
+        warmup = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="warmup")
+        for profile, slot in slots:
+            warmup.submit(self._warm, profile, slot)
+        warmup.shutdown(wait=False)
+
+    def _model_paths(self, options: ConversionOptions) -> Tuple[Optional[Path], Optional[Path]]:
+        """Artifacts and ONNX exports the converters of a profile load"""
+        if options.precision == Precision.INT8:
+            return self.quantized_path or self.artifacts_path, None
+        return self.artifacts_path, self.onnx_path
+
+    def _warm(self, profile: _Profile, slot: PooledConverter):
+        try:
+            slot.build()
+        except Exception as e:
+            # Handed out anyway: an unhealthy converter is rebuilt when borrowed
+            slot.last_error = str(e)
+            print(f"Error warming converter {slot.slot} of profile {profile.options.model_profile}: {e}")
+        finally:
+            profile.idle.put(slot)
+            with self._lock:
+                self.warming -= 1
+                if self.warming == 0:
+                    self._warmed.set()
+
+    def wait_ready(self, timeout: Optional[float] = None) -> bool:
+        """Block until the startup converters are built, return whether all are healthy"""
+        self._warmed.wait(timeout)
+        return self.ready()
+
+    def ready(self) -> bool:
+        """Whether every startup converter is warm and healthy"""
+        return self.started and self.warming == 0 and all(s.is_healthy() for s in self._slots())
+
+    def profile_count(self) -> int:
+        return len(self._profiles)
+
+    def capacity(self, options: ConversionOptions) -> int:
+        """Number of converters requests with `options` share (one for a profile built on demand)"""
+        profile = self._profiles.get(options.model_profile)
+        if profile is not None:
+            return len(profile.slots)
+        return self.size if options.model_profile == DEFAULT_OPTIONS.model_profile else 1
+
+    def _evict(self) -> bool:
+        """Drop the least recently used idle profile built on demand (call with the lock held)"""
+        for key, profile in self._profiles.items():
+            if key not in self._pinned and not profile.in_use():
+                # Borrowers that already looked it up still get its converter;
+                # the models are freed once the last one gives it back
+                del self._profiles[key]
+                print(f"Evicted converter profile {key}")
+                return True
+        return False
+
+    def _profile(self, options: ConversionOptions) -> _Profile:
+        key = options.model_profile
+        with self._lock:
+            profile = self._profiles.get(key)
+            if profile is not None:
+                self._profiles.move_to_end(key)
+                return profile
+            if len(self._profiles) >= self.max_profiles and not self._evict():
+                raise PoolExhaustedError(
+                    f"Too many distinct pipeline profiles in use (limit {self.max_profiles})"
+                )
+            profile = _Profile(options)
+            slot = profile.reserve(self.formats, *self._model_paths(options))
+            self._profiles[key] = profile
+            self._building.add(slot)
+        # Built outside the lock, like the startup converters: loading the
+        # models takes seconds. Other requests for the profile wait on `idle`.
+        try:
+            slot.build()
+        except Exception as e:
+            # Handed out anyway: the borrower rebuilds it and gets the error
+            slot.last_error = str(e)
+        finally:
+            with self._lock:
+                self._building.discard(slot)
+            profile.idle.put(slot)
+        return profile
+
+    def _recycle(self, slot: PooledConverter):
+        try:
+            slot.build()
+        finally:
+            with self._lock:
+                self.recycled += 1
+
+    @contextmanager
+    def converter(
+        self, options: Optional[ConversionOptions] = None, timeout: Optional[float] = None
+    ) -> Iterator["DocumentConverter"]:
+        """
+        Borrow a converter from the pool.
+
+        Args:
+            options: Pipeline options the converter must use (defaults to DEFAULT_OPTIONS)
+            timeout: Seconds to wait for a free converter (defaults to acquire_timeout)
+
+        Raises:
+            PoolExhaustedError: If no converter is released in time
+        """
+        if not self.started:
+            raise RuntimeError("Converter pool has not been started")
+        profile = self._profile(options or DEFAULT_OPTIONS)
+        timeout = self.acquire_timeout if timeout is None else timeout
+        try:
+            slot = profile.idle.get(timeout=timeout)
+        except queue.Empty:
+            raise PoolExhaustedError(f"No converter available after {timeout} seconds")
+
+        try:
+            if not slot.is_healthy():
+                self._recycle(slot)
+            apply_image_options(slot.converter, options or DEFAULT_OPTIONS)
+            try:
+                yield slot.converter
+            except (ConversionCancelledError, *INPUT_ERRORS):
+                # The request went away or sent bad input; the converter itself is fine
+                raise
+            except Exception as e:
+                slot.consecutive_failures += 1
+                slot.last_error = str(e)
+                if self.max_failures is not None and slot.consecutive_failures >= self.max_failures:
+                    self._recycle(slot)
+                raise
+            else:
+                slot.uses += 1
+                slot.consecutive_failures = 0
+        finally:
+            profile.idle.put(slot)
+
+    def _slots(self) -> List[PooledConverter]:
+        """Converters handed out by the pool (not those of a profile still being built on demand)"""
+        return [
+            slot for profile in list(self._profiles.values()) for slot in profile.slots if slot not in self._building
+        ]
+
+    def check(self) -> bool:
+        """Health check every idle converter and recycle the unhealthy ones"""
+        healthy = True
+        for profile in list(self._profiles.values()):
+            for _ in range(profile.idle.qsize()):
+                try:
+                    slot = profile.idle.get_nowait()
+                except queue.Empty:
+                    break
+                try:
+                    if not slot.is_healthy():
+                        self._recycle(slot)
+                except Exception as e:
+                    slot.last_error = str(e)
+                    healthy = False
+                finally:
+                    profile.idle.put(slot)
+        return healthy and all(s.is_healthy() for s in self._slots())
+
+    def status(self) -> dict:
+        return {
+            "started": self.started,
+            "warming": self.warming,
+            "size": self.size,
+            "recycled": self.recycled,
+            "backend": "onnx" if self.onnx_path is not None else "torch",
+            "quantized_models": str(self.quantized_path) if self.quantized_path is not None else None,
+            "healthy": self.started and all(s.is_healthy() for s in self._slots()),
+            "profiles": [
+                {
+                    "options": profile.options.model_dump(mode="json", exclude=set(IMAGE_OPTIONS)),
+                    "available": profile.idle.qsize(),
+                    "converters": [s.status() for s in profile.slots],
+                }
+                for profile in list(self._profiles.values())
+            ],
+        }
@@ -0,0 +1,135 @@
+import time
+from enum import Enum
+from typing import Dict, List, Optional, Tuple
+
+from pydantic import BaseModel
+
+from conversion import ConversionOptions, TableMode
+
+
+class Stage(str, Enum):
+    FETCH = "fetch"
+    PARSE = "parse"
+    LAYOUT = "layout"
+    OCR = "ocr"
+    TABLE = "table"
+    EXPORT = "export"
+
+
+# Estimated seconds per page of each pipeline stage on one worker
+DEFAULT_STAGE_COSTS = {
+    "parse": 0.1,
+    "layout": 0.6,
+    "ocr": 1.5,
+    "table_accurate": 1.2,
+    "table_fast": 0.5,
+    "export": 0.05,
+}
+
+
+class BudgetPlan(BaseModel):
+    """
+    How the time left for a document is split across the pipeline stages.
+
+    `stages` maps every stage that will run to its share of the budget in
+    seconds (the fetch entry is the time it actually took). `degraded` maps
+    the optional stages that were scaled down to what was done instead.
+    """
+
+    seconds: float
+    stages: Dict[str, float]
+    degraded: Dict[str, str]
+
+
+def _degradations(options: ConversionOptions) -> List[Tuple[ConversionOptions, Dict[str, str]]]:
+    """Ever cheaper variants of `options`, in the order they are tried"""
+    variants = []
+    degraded: Dict[str, str] = {}
+    if options.do_table_structure and options.table_mode == TableMode.ACCURATE:
+        options = options.model_copy(update={"table_mode": TableMode.FAST})
+        degraded = {**degraded, Stage.TABLE.value: "fast"}
+        variants.append((options, degraded))
+    if options.do_ocr:
+        options = options.model_copy(update={"do_ocr": False})
+        degraded = {**degraded, Stage.OCR.value: "skipped"}
+        variants.append((options, degraded))
+    if options.do_table_structure:
+        options = options.model_copy(update={"do_table_structure": False})
+        degraded = {**degraded, Stage.TABLE.value: "skipped"}
+        variants.append((options, degraded))
+    return variants
+
+
+def degraded_options(options: ConversionOptions) -> List[ConversionOptions]:
+    """Every profile `plan_stages` may switch `options` to, cheapest last"""
+    return [variant for variant, _ in _degradations(options)]
+
+
+def estimate_stages(options: ConversionOptions, pages: int, costs: Dict[str, float] = DEFAULT_STAGE_COSTS) -> Dict[str, float]:
+    """Estimated seconds of every stage that runs with `options` for `pages` pages"""
+    stages = {
+        Stage.PARSE.value: costs["parse"] * pages,
+        Stage.LAYOUT.value: costs["layout"] * pages,
+    }
+    if options.do_ocr:
+        stages[Stage.OCR.value] = costs["ocr"] * pages
+    if options.do_table_structure:
+        table_cost = costs["table_fast"] if options.table_mode == TableMode.FAST else costs["table_accurate"]
+        stages[Stage.TABLE.value] = table_cost * pages
+    stages[Stage.EXPORT.value] = costs["export"] * pages
+    return stages
+
+
+def plan_stages(
+    options: ConversionOptions,
+    deadline: float,
+    pages: Optional[int],
+    fetch_seconds: float = 0.0,
+    costs: Dict[str, float] = DEFAULT_STAGE_COSTS,
+    degrade: bool = True,
+) -> Tuple[ConversionOptions, BudgetPlan]:
+    """
+    Fit the pipeline of one document into the time left until `deadline`.
+
+    The required stages (parse, layout, export) always run. When the
+    estimated cost of all stages does not fit, the optional ones are
+    degraded one step at a time: TableFormer switches to fast mode, then OCR
+    is skipped, then table structure recovery is skipped. The remaining time
+    is split across the stages that run, in proportion to their estimates.
+
+    Args:
+        options: Pipeline options the client asked for
+        deadline: `time.monotonic()` by which the document must be done
+        pages: Number of pages to convert, None for formats without pages
+        fetch_seconds: Time already spent fetching the document
+        costs: Estimated seconds per page of each stage
+        degrade: Whether optional stages may be degraded at all
+
+    Returns:
+        tuple: The options to convert with and the budget plan
+    """
+    remaining = max(0.0, deadline - time.monotonic())
+    if pages is None:
+        # Formats without pages do not run the layout, OCR and table models
+        return options, BudgetPlan(
+            seconds=round(remaining, 3),
+            stages={Stage.FETCH.value: round(fetch_seconds, 3)},
+            degraded={},
+        )
+
+    chosen, degraded = options, {}
+    estimates = estimate_stages(chosen, pages, costs)
+    if degrade:
+        candidates = iter(_degradations(options))
+        while sum(estimates.values()) > remaining:
+            try:
+                chosen, degraded = next(candidates)
+            except StopIteration:
+                break
+            estimates = estimate_stages(chosen, pages, costs)
+
+    total = sum(estimates.values())
+    scale = remaining / total if total else 0.0
+    stages = {Stage.FETCH.value: round(fetch_seconds, 3)}
+    stages.update({stage: round(seconds * scale, 3) for stage, seconds in estimates.items()})
+    return chosen, BudgetPlan(seconds=round(remaining, 3), stages=stages, degraded=degraded)
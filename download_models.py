@@ -1,7 +1,12 @@
-from docling.document_converter import DocumentConverter, InputFormat
-from docling.datamodel.pipeline_options import PdfPipelineOptions
+from docling.document_converter import InputFormat
 from docling.pipeline.standard_pdf_pipeline import StandardPdfPipeline
 from pathlib import Path
+import os
+from conversion import build_converter
+from model_artifacts import easyocr_models_path
+from model_cache import build_model_cache
+from onnx_backend import export_onnx
+from quantization import quantize_models
 
 def download_models():
     """
@@ -11,15 +16,16 @@ def download_models():
     
     # First, download PDF/Image models (these are the heavy ones)
     print("Downloading PDF/Image processing models...")
-    pdf_pipeline = StandardPdfPipeline(pipeline_options=PdfPipelineOptions())
-    
-    # Force model downloads by accessing the models directory
-    models_path = pdf_pipeline.artifacts_path
+    # DOCLING_MODELS_PATH is where the API loads them from (see verify_models
+    # in main.py), the Hugging Face cache otherwise
+    local_dir = Path(os.environ["DOCLING_MODELS_PATH"]) if os.getenv("DOCLING_MODELS_PATH") else None
+    models_path = Path(StandardPdfPipeline.download_models_hf(local_dir=local_dir))
     print(f"Models downloaded to: {models_path}")
     
-    # Initialize converter with all formats to ensure other format handlers are ready
+    # Initialize converter with all formats to ensure other format handlers are ready.
+    # The PDF and image pipelines load the snapshot above instead of fetching it again.
     print("Initializing all document format handlers...")
-    converter = DocumentConverter()
+    converter = build_converter(artifacts_path=models_path)
     
     # Initialize pipelines for all formats
     for format in InputFormat:
@@ -28,5 +34,31 @@ def download_models():
     
     print("All models and format handlers are initialized!")
 
+    if os.getenv("DOCLING_MODEL_CACHE"):
+        # The pipelines above downloaded the EasyOCR weights too
+        cache_path = Path(os.environ["DOCLING_MODEL_CACHE"])
+        print(f"Building the model cache in {cache_path}...")
+        manifest = build_model_cache(Path(models_path), cache_path, easyocr_models_path())
+        print(
+            f"Model cache ready: layout model {'frozen' if manifest['frozen_layout'] else 'unchanged'}, "
+            f"{len(manifest['mmap'])} memory-mappable checkpoint(s), {len(manifest['easyocr'])} EasyOCR file(s)"
+        )
+
+    if os.getenv("DOCLING_ONNX_PATH"):
+        # Optional ONNX Runtime backend (INFERENCE_BACKEND=onnx), needs onnxruntime
+        onnx_path = Path(os.environ["DOCLING_ONNX_PATH"])
+        print(f"Exporting the layout and TableFormer encoder models to ONNX in {onnx_path}...")
+        manifest = export_onnx(Path(models_path), onnx_path)
+        for name, export in manifest["models"].items():
+            print(f"  {name}: max difference to torch {export['max_abs_difference']:.2e}")
+
+    if os.getenv("DOCLING_QUANTIZED_PATH"):
+        # int8 profile, served to requests with precision=int8
+        quantized_path = Path(os.environ["DOCLING_QUANTIZED_PATH"])
+        print(f"Quantizing the layout model to int8 in {quantized_path}...")
+        manifest = quantize_models(Path(models_path), quantized_path)
+        if manifest["quantized_layout"]:
+            print(f"  max detection score difference to fp32 {manifest['layout_max_score_difference']:.2e}")
+
 if __name__ == "__main__":
     download_models()
\ No newline at end of file
@@ -0,0 +1,201 @@
+import asyncio
+import contextvars
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, AsyncIterator, Callable, Dict, Optional
+
+from conversion import DEFAULT_OPTIONS, ConversionOptions, cancellable
+from converter_pool import ConverterPool
+
+
+_DONE = object()
+
+
+class _ProfileGate:
+    """Jobs of one converter profile: at most as many run as the profile has converters"""
+
+    def __init__(self, capacity: int):
+        self.semaphore = asyncio.Semaphore(capacity)
+        self.jobs = 0
+
+
+def _run_in_thread(
+    pool: ConverterPool,
+    options: Optional[ConversionOptions],
+    fn: Callable,
+    args: tuple,
+    cancel: threading.Event,
+) -> Any:
+    with cancellable(cancel), pool.converter(options) as converter:
+        return fn(converter, *args)
+
+
+def _produce(converter, fn: Callable, args: tuple, push: Callable):
+    for item in fn(converter, *args):
+        push(item)
+
+
+async def iterate_results(start: Callable[[Callable], "asyncio.Future"]) -> AsyncIterator:
+    """
+    Yield the items of a producer running in the background.
+
+    `start(push)` must launch the producer and return its future; the producer
+    calls `push(item)` (on the event loop) for every item. Once the producer
+    is done its exception, if any, is raised after the last item. If the
+    consumer goes away early the producer is cancelled.
+    """
+    items: asyncio.Queue = asyncio.Queue()
+    task = start(items.put_nowait)
+    task.add_done_callback(lambda _: items.put_nowait(_DONE))
+    try:
+        while True:
+            item = await items.get()
+            if item is _DONE:
+                break
+            yield item
+    finally:
+        if not task.done():
+            # Consumer went away early: stop the producer
+            task.cancel()
+            task.add_done_callback(lambda t: t.cancelled() or t.exception())
+    task.result()
+
+
+class ConversionExecutor:
+    """
+    Bounded thread executor that runs blocking conversions off the event loop.
+
+    `run(fn, *args, options=...)` calls `fn(converter, *args)` on a worker
+    thread with a converter borrowed from the pool for the given options. At most `max_workers` jobs are handed to
+    the underlying executor at once; the rest wait on a semaphore, so the
+    queue depth and the in-flight count are both known to the event loop.
+    A job only takes one of those slots once a converter of its profile is
+    free, so requests queued for a busy profile never hold worker threads
+    that idle converters of other profiles could use.
+
+    Cancelling the awaiting coroutine cancels the conversion cooperatively: it
+    stops at the next page checkpoint (see `install_cancellation_checks`).
+
+    Jobs run in a copy of the caller's context variables.
+
+    See WorkerFarm for the multi-process equivalent.
+    """
+
+    kind = "thread"
+
+    def __init__(self, pool: ConverterPool, max_workers: int = 1):
+        if max_workers < 1:
+            raise ValueError("Executor needs at least one worker")
+        self.pool = pool
+        self.max_workers = max_workers
+        self.queued = 0
+        self.in_flight = 0
+        self.completed = 0
+        self.failed = 0
+        self.cancelled = 0
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._slots: Optional[asyncio.Semaphore] = None
+        self._gates: Dict[str, _ProfileGate] = {}
+
+    def start(self):
+        if self._executor is not None:
+            return
+        self._executor = ThreadPoolExecutor(
+            max_workers=self.max_workers, thread_name_prefix="conversion"
+        )
+        self._slots = asyncio.Semaphore(self.max_workers)
+
+    def shutdown(self):
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
+    async def run(self, fn: Callable, *args, options: Optional[ConversionOptions] = None) -> Any:
+        """Run `fn(converter, *args)` on a worker and await its result"""
+        if self._executor is None:
+            raise RuntimeError("Conversion executor has not been started")
+        loop = asyncio.get_running_loop()
+        key = (options or DEFAULT_OPTIONS).model_profile
+        gate = self._gates.get(key)
+        if gate is None:
+            gate = self._gates[key] = _ProfileGate(self.pool.capacity(options or DEFAULT_OPTIONS))
+        gate.jobs += 1
+
+        def _leave(acquired: bool = True):
+            if acquired:
+                gate.semaphore.release()
+            gate.jobs -= 1
+            if gate.jobs == 0 and self._gates.get(key) is gate:
+                del self._gates[key]
+
+        self.queued += 1
+        try:
+            try:
+                await gate.semaphore.acquire()
+            except BaseException:
+                _leave(acquired=False)
+                raise
+            try:
+                await self._slots.acquire()
+            except BaseException:
+                _leave()
+                raise
+        finally:
+            self.queued -= 1
+
+        cancel = threading.Event()
+        try:
+            context = contextvars.copy_context()
+            future = self._executor.submit(
+                context.run, _run_in_thread, self.pool, options, fn, args, cancel
+            )
+        except BaseException:
+            self._slots.release()
+            _leave()
+            raise
+        self.in_flight += 1
+
+        def _done(f):
+            # The slot is only freed once the worker is really done, even if
+            # the awaiting request was cancelled in the meantime.
+            self.in_flight -= 1
+            if cancel.is_set():
+                self.cancelled += 1
+            elif f.cancelled() or f.exception() is not None:
+                self.failed += 1
+            else:
+                self.completed += 1
+            self._slots.release()
+            _leave()
+
+        future.add_done_callback(lambda f: loop.call_soon_threadsafe(_done, f))
+        try:
+            return await asyncio.wrap_future(future)
+        except asyncio.CancelledError:
+            cancel.set()
+            raise
+
+    def iterate(self, fn: Callable, *args, options: Optional[ConversionOptions] = None) -> AsyncIterator:
+        """Run the generator `fn(converter, *args)` on a worker and yield its items as they come"""
+        loop = asyncio.get_running_loop()
+
+        def start(push):
+            threadsafe_push = lambda item: loop.call_soon_threadsafe(push, item)
+            return asyncio.ensure_future(self.run(_produce, fn, args, threadsafe_push, options=options))
+
+        return iterate_results(start)
+
+    def ready(self) -> bool:
+        """Whether the pooled converters are warm"""
+        return self._executor is not None and self.pool.ready()
+
+    def stats(self) -> dict:
+        return {
+            "kind": self.kind,
+            "max_workers": self.max_workers,
+            "queued": self.queued,
+            "in_flight": self.in_flight,
+            "completed": self.completed,
+            "failed": self.failed,
+            "cancelled": self.cancelled,
+        }
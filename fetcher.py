@@ -0,0 +1,274 @@
+import asyncio
+import hashlib
+import json
+import os
+import threading
+import time
+import weakref
+from contextlib import asynccontextmanager
+from pathlib import Path
+from typing import TYPE_CHECKING, AsyncIterator, Dict, Optional, Tuple
+from urllib.parse import urlparse
+
+if TYPE_CHECKING:
+    from curl_cffi.requests import AsyncSession
+
+
+# Seconds between sweeps of the download directory for expired files
+SWEEP_INTERVAL = 3600
+
+
+class DownloadTooLargeError(ValueError):
+    """Raised when a remote document exceeds the download size cap."""
+
+
+class Fetcher:
+    """
+    Shared asynchronous HTTP client for remote documents.
+
+    A single curl_cffi AsyncSession is kept for the lifetime of the app, so
+    connections are pooled and kept alive across requests, every request
+    impersonates a real browser, and HTTP/2 is negotiated whenever the server
+    offers it. On top of that the fetcher adds:
+
+        - a concurrency limit per host (`per_host`)
+        - streaming downloads to disk with a size cap (`download`)
+        - conditional re-downloads: the ETag / Last-Modified of every
+          downloaded URL is remembered and sent back as If-None-Match /
+          If-Modified-Since, so an unchanged document is not transferred again
+        - a download directory bounded by total size (least recently used
+          documents go first) and by age, see `evict`
+
+    Downloaded documents are stored under the SHA-256 of their bytes and
+    never rewritten, so a re-download of a changed document cannot alter a
+    file another request is still converting.
+
+    curl_cffi is only imported, and the session created, on the first fetch.
+    """
+
+    def __init__(
+        self,
+        download_dir: Path,
+        impersonate: str = "chrome",
+        max_clients: int = 10,
+        per_host: int = 4,
+        timeout: float = 30,
+        max_size: Optional[int] = None,
+        disk_bytes: int = 2 * 1024 * 1024 * 1024,
+        max_age: float = 24 * 3600,
+    ):
+        self.download_dir = download_dir
+        self.impersonate = impersonate
+        self.max_clients = max_clients
+        self.per_host = per_host
+        self.timeout = timeout
+        self.max_size = max_size
+        self.disk_bytes = disk_bytes
+        self.max_age = max_age
+        self.downloads = 0
+        self.not_modified = 0
+        self.active = 0
+        self.started = False
+        self._session: Optional["AsyncSession"] = None
+        # Held by the requests using them only, so idle hosts and URLs are dropped
+        self._host_slots: "weakref.WeakValueDictionary[str, asyncio.Semaphore]" = weakref.WeakValueDictionary()
+        self._url_locks: "weakref.WeakValueDictionary[str, asyncio.Lock]" = weakref.WeakValueDictionary()
+        self._disk_size = 0
+        self._disk_lock = threading.Lock()
+        self._swept_at = 0.0
+        self.download_dir.mkdir(parents=True, exist_ok=True)
+        for path in self.download_dir.iterdir():
+            if path.is_file() and not path.name.endswith((".meta.json", ".tmp")):
+                self._disk_size += path.stat().st_size
+
+    async def start(self):
+        self.started = True
+        await asyncio.to_thread(self.evict)
+
+    async def close(self):
+        self.started = False
+        if self._session is not None:
+            await self._session.close()
+            self._session = None
+
+    def _client(self) -> "AsyncSession":
+        if self._session is None:
+            from curl_cffi.requests import AsyncSession
+
+            self._session = AsyncSession(
+                impersonate=self.impersonate,
+                max_clients=self.max_clients,
+                timeout=self.timeout,
+            )
+        return self._session
+
+    @asynccontextmanager
+    async def _host_slot(self, url: str):
+        if not self.started:
+            raise RuntimeError("Fetcher has not been started")
+        host = urlparse(url).netloc
+        slot = self._host_slots.get(host)
+        if slot is None:
+            slot = self._host_slots[host] = asyncio.Semaphore(self.per_host)
+        async with slot:
+            self.active += 1
+            try:
+                yield
+            finally:
+                self.active -= 1
+
+    async def _body(self, url: str, response) -> AsyncIterator[bytes]:
+        """Chunks of a streamed response, at most `max_size` bytes in all"""
+        length = response.headers.get("Content-Length")
+        if self.max_size and length and int(length) > self.max_size:
+            raise DownloadTooLargeError(f"{url} is larger than {self.max_size} bytes")
+        size = 0
+        async for chunk in response.aiter_content():
+            size += len(chunk)
+            if self.max_size and size > self.max_size:
+                raise DownloadTooLargeError(f"{url} is larger than {self.max_size} bytes")
+            yield chunk
+
+    async def fetch_bytes(self, url: str, timeout: Optional[float] = None) -> bytes:
+        """
+        Fetch a page and return its bytes as sent by the server.
+
+        Raises:
+            DownloadTooLargeError: If the page is larger than `max_size`
+        """
+        async with self._host_slot(url):
+            response = await self._client().get(url, stream=True, timeout=timeout or self.timeout)
+            try:
+                response.raise_for_status()
+                return b"".join([chunk async for chunk in self._body(url, response)])
+            finally:
+                await response.aclose()
+
+    def _meta_path(self, url: str) -> Path:
+        return self.download_dir / f"{hashlib.sha256(url.encode('utf-8')).hexdigest()}.meta.json"
+
+    async def download(self, url: str, timeout: Optional[float] = None) -> Tuple[Path, str]:
+        """
+        Stream a remote document to the download directory.
+
+        Args:
+            url: Document to download
+            timeout: Seconds the transfer may take (defaults to the fetcher timeout)
+
+        Returns:
+            tuple: Local path of the document and SHA-256 hex digest of its bytes
+
+        Raises:
+            DownloadTooLargeError: If the document is larger than `max_size`
+        """
+        meta_path = self._meta_path(url)
+        suffix = Path(urlparse(url).path).suffix.lower()
+        lock = self._url_locks.get(url)
+        if lock is None:
+            lock = self._url_locks[url] = asyncio.Lock()
+        async with lock:
+            meta = None
+            headers = {}
+            if meta_path.exists():
+                with open(meta_path, encoding="utf-8") as f:
+                    meta = json.load(f)
+                if not (self.download_dir / f"{meta['sha256']}{suffix}").exists():
+                    # Evicted: download it again
+                    meta = None
+            if meta is not None:
+                if meta.get("etag"):
+                    headers["If-None-Match"] = meta["etag"]
+                if meta.get("last_modified"):
+                    headers["If-Modified-Since"] = meta["last_modified"]
+
+            async with self._host_slot(url):
+                response = await self._client().get(url, headers=headers, stream=True, timeout=timeout or self.timeout)
+                try:
+                    if response.status_code == 304 and meta is not None:
+                        self.not_modified += 1
+                        path = self.download_dir / f"{meta['sha256']}{suffix}"
+                        # Refresh the access time used for least-recently-used eviction
+                        os.utime(path)
+                        return path, meta["sha256"]
+                    response.raise_for_status()
+
+                    digest = hashlib.sha256()
+                    size = 0
+                    tmp_path = self.download_dir / f"{meta_path.name}.{id(response)}.tmp"
+                    try:
+                        with open(tmp_path, "wb") as f:
+                            async for chunk in self._body(url, response):
+                                size += len(chunk)
+                                digest.update(chunk)
+                                f.write(chunk)
+                        path = self.download_dir / f"{digest.hexdigest()}{suffix}"
+                        if path.exists():
+                            os.utime(path)
+                        else:
+                            os.replace(tmp_path, path)
+                            with self._disk_lock:
+                                self._disk_size += size
+                    finally:
+                        if tmp_path.exists():
+                            tmp_path.unlink()
+                finally:
+                    await response.aclose()
+
+            meta = {
+                "url": url,
+                "etag": response.headers.get("ETag"),
+                "last_modified": response.headers.get("Last-Modified"),
+                "sha256": digest.hexdigest(),
+                "size": size,
+            }
+            tmp_meta_path = meta_path.with_name(f"{meta_path.name}.tmp")
+            with open(tmp_meta_path, "w", encoding="utf-8") as f:
+                json.dump(meta, f)
+            os.replace(tmp_meta_path, meta_path)
+            self.downloads += 1
+        if self._disk_size > self.disk_bytes or time.time() - self._swept_at > SWEEP_INTERVAL:
+            await asyncio.to_thread(self.evict)
+        return path, meta["sha256"]
+
+    def evict(self):
+        """
+        Drop downloads, URL metadata and leftover temporary files older than
+        `max_age`, then the least recently used downloads until the directory
+        is under `disk_bytes`. Blocking: called on a worker thread.
+        """
+        now = self._swept_at = time.time()
+        entries = []
+        for path in self.download_dir.iterdir():
+            try:
+                stat = path.stat()
+            except FileNotFoundError:
+                continue
+            if not path.is_file():
+                continue
+            document = not path.name.endswith((".meta.json", ".tmp"))
+            if now - stat.st_mtime > self.max_age:
+                self._delete(path, stat.st_size if document else 0)
+            elif document:
+                entries.append((stat.st_mtime, stat.st_size, path))
+
+        entries.sort()
+        for _, size, path in entries:
+            if self._disk_size <= self.disk_bytes:
+                break
+            self._delete(path, size)
+
+    def _delete(self, path: Path, size: int):
+        try:
+            path.unlink()
+        except FileNotFoundError:
+            return
+        with self._disk_lock:
+            self._disk_size -= size
+
+    def stats(self) -> dict:
+        return {
+            "downloads": self.downloads,
+            "not_modified": self.not_modified,
+            "active": self.active,
+            "disk_bytes": self._disk_size,
+        }
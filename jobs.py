@@ -0,0 +1,178 @@
+import asyncio
+import json
+import os
+import uuid
+from datetime import datetime, timezone
+from enum import Enum
+from pathlib import Path
+from typing import Awaitable, Callable, List, Optional
+
+
+class JobStatus(str, Enum):
+    QUEUED = "queued"
+    RUNNING = "running"
+    SUCCEEDED = "succeeded"
+    FAILED = "failed"
+
+
+def _now() -> str:
+    return datetime.now(timezone.utc).isoformat()
+
+
+class JobStore:
+    """
+    Durable job records persisted as JSON files.
+
+    Layout:
+        <queue_dir>/jobs/<job_id>.json      job metadata (status, progress, ...)
+        <queue_dir>/<job_id>_<filename>     uploaded input waiting to be converted
+        <results_dir>/<job_id>.json         conversion output of a finished job
+
+    Every metadata write goes through a temporary file and `os.replace`, so a
+    crash never leaves a half written record behind.
+    """
+
+    def __init__(self, queue_dir: Path, results_dir: Path):
+        self.queue_dir = queue_dir
+        self.jobs_dir = queue_dir / "jobs"
+        self.results_dir = results_dir
+        self.jobs_dir.mkdir(parents=True, exist_ok=True)
+        self.results_dir.mkdir(parents=True, exist_ok=True)
+
+    def _path(self, job_id: str) -> Path:
+        return self.jobs_dir / f"{job_id}.json"
+
+    def _write(self, job: dict):
+        path = self._path(job["id"])
+        tmp_path = path.with_suffix(".tmp")
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(job, f)
+        os.replace(tmp_path, path)
+
+    def new_id(self) -> str:
+        return uuid.uuid4().hex
+
+    def input_path(self, job_id: str, filename: str) -> Path:
+        return self.queue_dir / f"{job_id}_{Path(filename).name}"
+
+    def result_path(self, job_id: str) -> Path:
+        return self.results_dir / f"{job_id}.json"
+
+    def create(
+        self,
+        job_id: str,
+        source: str,
+        output_format: str,
+        filename: Optional[str] = None,
+        content_hash: Optional[str] = None,
+        options: Optional[dict] = None,
+    ) -> dict:
+        job = {
+            "id": job_id,
+            "status": JobStatus.QUEUED.value,
+            "progress": 0.0,
+            "source": source,
+            "filename": filename,
+            "content_hash": content_hash,
+            "output_format": output_format,
+            "options": options or {},
+            "error": None,
+            "created_at": _now(),
+            "started_at": None,
+            "finished_at": None,
+        }
+        self._write(job)
+        return job
+
+    def get(self, job_id: str) -> Optional[dict]:
+        # Job ids are uuid4 hex strings; anything else cannot name a job file
+        if not job_id.isalnum():
+            return None
+        try:
+            with open(self._path(job_id), encoding="utf-8") as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return None
+
+    def update(self, job_id: str, **fields) -> dict:
+        job = self.get(job_id)
+        if job is None:
+            raise KeyError(job_id)
+        job.update(fields)
+        self._write(job)
+        return job
+
+    def pending(self) -> List[dict]:
+        """Jobs that still have to run, oldest first (used to resume after a restart)"""
+        jobs = []
+        for path in self.jobs_dir.glob("*.json"):
+            try:
+                with open(path, encoding="utf-8") as f:
+                    job = json.load(f)
+            except (OSError, ValueError):
+                continue
+            if job["status"] in (JobStatus.QUEUED.value, JobStatus.RUNNING.value):
+                jobs.append(job)
+        return sorted(jobs, key=lambda job: job["created_at"])
+
+
+class JobRunner:
+    """
+    Background workers draining the durable job queue.
+
+    `convert(job)` is awaited for each job and must return the conversion output
+    as encoded JSON bytes, which are stored next to the other results.
+    """
+
+    def __init__(self, store: JobStore, convert: Callable[[dict], Awaitable[bytes]], concurrency: int = 1):
+        self.store = store
+        self.convert = convert
+        self.concurrency = concurrency
+        self._queue: Optional[asyncio.Queue] = None
+        self._tasks: List[asyncio.Task] = []
+
+    async def start(self):
+        self._queue = asyncio.Queue()
+        for job in self.store.pending():
+            # Jobs that were running when the server stopped start over
+            if job["status"] == JobStatus.RUNNING.value:
+                self.store.update(job["id"], status=JobStatus.QUEUED.value, progress=0.0, started_at=None)
+            self._queue.put_nowait(job["id"])
+        self._tasks = [asyncio.create_task(self._work()) for _ in range(self.concurrency)]
+
+    async def stop(self):
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+
+    def submit(self, job_id: str):
+        self._queue.put_nowait(job_id)
+
+    @property
+    def depth(self) -> int:
+        return self._queue.qsize() if self._queue is not None else 0
+
+    async def _work(self):
+        while True:
+            job_id = await self._queue.get()
+            try:
+                await self._run(job_id)
+            finally:
+                self._queue.task_done()
+
+    async def _run(self, job_id: str):
+        job = self.store.update(job_id, status=JobStatus.RUNNING.value, progress=0.1, started_at=_now())
+        try:
+            result = await self.convert(job)
+            result_path = self.store.result_path(job_id)
+            tmp_path = result_path.with_suffix(".tmp")
+            with open(tmp_path, "wb") as f:
+                f.write(result)
+            os.replace(tmp_path, result_path)
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            self.store.update(job_id, status=JobStatus.FAILED.value, error=str(e), finished_at=_now())
+        else:
+            self.store.update(job_id, status=JobStatus.SUCCEEDED.value, progress=1.0, finished_at=_now())
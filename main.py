@@ -1,73 +1,763 @@
-from typing import Union, Optional
+from typing import AsyncIterator, Awaitable, List, Tuple, Union, Optional
 from enum import Enum
-from docling.document_converter import DocumentConverter
-from fastapi import FastAPI, UploadFile, File, Query, HTTPException
-from fastapi.responses import JSONResponse
+from fastapi import Depends, FastAPI, UploadFile, File, Form, Header, Query, HTTPException
+from fastapi.responses import JSONResponse, FileResponse, PlainTextResponse, Response, StreamingResponse
 from pydantic import HttpUrl, BaseModel
 from io import BytesIO
 from docling.datamodel.base_models import DocumentStream
-from curl_cffi import requests
+from urllib.parse import urlparse
 import os
 from datetime import datetime
 import shutil
 from pathlib import Path
 import asyncio
-from starlette.middleware.base import BaseHTTPMiddleware
+import hashlib
+import json
+import time
+import uuid
+from contextlib import aclosing
+from importlib.metadata import version
 from fastapi import Request
-from docling.pipeline.standard_pdf_pipeline import StandardPdfPipeline
-from docling.datamodel.pipeline_options import PdfPipelineOptions
+from converter_pool import ConverterPool, PoolExhaustedError
+from model_artifacts import easyocr_models_path, easyocr_ready, missing_artifacts, resolve_models_path
+from model_cache import ModelCacheError, easyocr_cache_path, read_manifest
+from onnx_backend import OnnxBackendError, onnx_available, read_manifest as read_onnx_manifest
+from quantization import QuantizationError, read_manifest as read_quantized_manifest
+from conversion import (
+    DEFAULT_OPTIONS,
+    ConversionCancelledError,
+    ConversionOptions,
+    InvalidDocumentError,
+    OutputFormat,
+    PageSelection,
+    PageSelectionError,
+    Precision,
+    TableMode,
+    convert_all_and_export,
+    convert_and_export,
+    convert_pages_and_export,
+    count_pages,
+    merge_json,
+    prepare_source,
+    record_spans,
+)
+from executor import ConversionExecutor
+from worker_farm import WorkerFarm
+from jobs import JobRunner, JobStatus, JobStore
+from result_cache import ResultCache, file_sha256
+from fetcher import DownloadTooLargeError, Fetcher
+from admission import AdmissionController, AdmissionRejectedError, Ticket
+from deadline import DEFAULT_STAGE_COSTS, degraded_options, plan_stages
+from metrics import Metrics, MetricsMiddleware, process_rss
+from response_encoding import document_response, event_stream_response
+from tracing import TracingMiddleware, configure_tracing, record_conversion_spans, span
 
 
 # Add these constants at the top of the file with other imports
 UPLOAD_DIR = Path("./document_queue")
 PROCESSED_DIR = Path("./document_processed")
 MAX_FILE_SIZE = 20 * 1024 * 1024  # 20MB in bytes
+UPLOAD_CHUNK_SIZE = 1024 * 1024  # 1MB per read when streaming uploads to disk
 ALLOWED_EXTENSIONS = {
     '.pdf', '.docx', '.pptx', '.jpg', '.jpeg', '.png', '.html', 
     '.adoc', '.md', '.markdown'
 }
 UPLOAD_TIMEOUT = 120  # seconds
+DISCONNECT_POLL_INTERVAL = 0.5  # seconds between client disconnect checks during a conversion
+CONVERTER_POOL_SIZE = int(os.getenv("CONVERTER_POOL_SIZE", "2"))
+CONVERTER_MAX_FAILURES = int(os.getenv("CONVERTER_MAX_FAILURES", "3"))
+CONVERSION_EXECUTOR = os.getenv("CONVERSION_EXECUTOR", "thread")  # thread or process
+CONVERSION_WORKERS = int(os.getenv(
+    "CONVERSION_WORKERS",
+    str(CONVERTER_POOL_SIZE if CONVERSION_EXECUTOR == "thread" else os.cpu_count() or 1)
+))
+WORKER_TORCH_THREADS = int(os.getenv("WORKER_TORCH_THREADS", "0")) or None  # default: cores / workers
+# JSON list of option sets (see ConversionOptions) to warm at startup besides the default
+CONVERTER_WARM_PROFILES = [
+    ConversionOptions(**options) for options in json.loads(os.getenv("CONVERTER_WARM_PROFILES", "[]"))
+]
+CONVERTER_MAX_PROFILES = int(os.getenv("CONVERTER_MAX_PROFILES", "8"))
+# Profiles a worker process may build on demand besides those it inherits (process executor)
+WORKER_MAX_PROFILES = int(os.getenv("WORKER_MAX_PROFILES", "1"))
+JOB_WORKERS = int(os.getenv("JOB_WORKERS", str(CONVERSION_WORKERS)))
+RESULT_CACHE_ENABLED = os.getenv("RESULT_CACHE_ENABLED", "1") == "1"
+RESULT_CACHE_MEMORY_ITEMS = int(os.getenv("RESULT_CACHE_MEMORY_ITEMS", "128"))
+RESULT_CACHE_MEMORY_MB = int(os.getenv("RESULT_CACHE_MEMORY_MB", "256"))
+RESULT_CACHE_DISK_MB = int(os.getenv("RESULT_CACHE_DISK_MB", "2048"))
+RESULT_CACHE_MAX_AGE = int(os.getenv("RESULT_CACHE_MAX_AGE", str(7 * 24 * 3600)))  # seconds
+FETCH_MAX_CONNECTIONS = int(os.getenv("FETCH_MAX_CONNECTIONS", "10"))
+FETCH_MAX_PER_HOST = int(os.getenv("FETCH_MAX_PER_HOST", "4"))
+FETCH_MAX_SIZE = int(os.getenv("FETCH_MAX_SIZE_MB", "100")) * 1024 * 1024
+FETCH_TIMEOUT = 30  # seconds
+FETCH_CACHE_MB = int(os.getenv("FETCH_CACHE_MB", "2048"))  # downloaded documents kept for conditional re-downloads
+FETCH_CACHE_MAX_AGE = int(os.getenv("FETCH_CACHE_MAX_AGE", str(24 * 3600)))  # seconds
+BATCH_MAX_ITEMS = int(os.getenv("BATCH_MAX_ITEMS", "100"))
+BATCH_PARALLELISM = int(os.getenv("BATCH_PARALLELISM", str(CONVERSION_WORKERS)))
+COMPRESS_MIN_SIZE = int(os.getenv("COMPRESS_MIN_SIZE", "1024"))  # bytes, smaller responses are sent as is
+# Conversion requests running at once, and waiting for a slot, before new ones get a 429
+ADMISSION_MAX_IN_FLIGHT = int(os.getenv("ADMISSION_MAX_IN_FLIGHT", str(CONVERSION_WORKERS)))
+ADMISSION_MAX_QUEUE = int(os.getenv("ADMISSION_MAX_QUEUE", str(2 * CONVERSION_WORKERS)))
+ADMISSION_MAX_WAIT = float(os.getenv("ADMISSION_MAX_WAIT", "30"))  # seconds in the queue before a 429
+# Per-request deadlines (timeout parameter / X-Request-Timeout header) are capped at UPLOAD_TIMEOUT
+DEADLINE_DEGRADATION = os.getenv("DEADLINE_DEGRADATION", "1") == "1"  # degrade optional stages to meet it
+# JSON object overriding the estimated seconds per page of the stages, see deadline.DEFAULT_STAGE_COSTS.
+# Degraded profiles should be listed in CONVERTER_WARM_PROFILES so they are not built on demand
+# (the process executor warms them itself).
+DEADLINE_STAGE_COSTS = {**DEFAULT_STAGE_COSTS, **json.loads(os.getenv("DEADLINE_STAGE_COSTS", "{}"))}
+FETCH_BUDGET_SHARE = 0.25  # share of the remaining deadline a download may take
+# OpenTelemetry trace exporter: otlp (configured by the OTEL_EXPORTER_OTLP_* variables), file, or empty for none
+TRACING_EXPORTER = os.getenv("TRACING_EXPORTER", "")
+TRACING_FILE = os.getenv("TRACING_FILE", "./traces.jsonl")
+# Directory of the docling model snapshot (see download_models.py), or empty for the Hugging Face cache
+MODELS_PATH = Path(os.environ["DOCLING_MODELS_PATH"]) if os.getenv("DOCLING_MODELS_PATH") else None
+# Ready-to-load model cache built by download_models.py, preferred over the snapshot when valid
+MODEL_CACHE_PATH = Path(os.environ["DOCLING_MODEL_CACHE"]) if os.getenv("DOCLING_MODEL_CACHE") else None
+# Layout / TableFormer inference: torch, or onnx to run the exports in DOCLING_ONNX_PATH on ONNX Runtime
+INFERENCE_BACKEND = os.getenv("INFERENCE_BACKEND", "torch")
+ONNX_PATH = Path(os.getenv("DOCLING_ONNX_PATH", "./onnx_models"))
+# int8 model profile built by download_models.py, loaded by requests with precision=int8
+QUANTIZED_PATH = Path(os.getenv("DOCLING_QUANTIZED_PATH", "./quantized_models"))
 
 # Create directories if they don't exist
 UPLOAD_DIR.mkdir(parents=True, exist_ok=True)
 PROCESSED_DIR.mkdir(parents=True, exist_ok=True)
 
-class OutputFormat(str, Enum):
-    MARKDOWN = "markdown"
-    JSON = "json"
-    ALL = "all"
+class StreamMode(str, Enum):
+    NDJSON = "ndjson"
+    SSE = "sse"
+
+class TimeoutMiddleware:
+    """
+    Answer 408 when a request has not started its response within UPLOAD_TIMEOUT.
+
+    The endpoint is cancelled when the timeout fires, and with it the
+    conversion it is waiting on (see ConversionExecutor and WorkerFarm), so
+    a timed out request stops using CPU. Responses that have already started
+    streaming are left alone.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        # Start of the request, per-request deadlines count from here
+        scope.setdefault("state", {})["received_at"] = time.monotonic()
+        started = asyncio.Event()
 
-class TimeoutMiddleware(BaseHTTPMiddleware):
-    async def dispatch(self, request: Request, call_next):
+        async def send_wrapper(message):
+            if message["type"] == "http.response.start":
+                started.set()
+            await send(message)
+
+        app_task = asyncio.ensure_future(self.app(scope, receive, send_wrapper))
+        started_task = asyncio.ensure_future(started.wait())
         try:
-            return await asyncio.wait_for(call_next(request), timeout=UPLOAD_TIMEOUT)
-        except asyncio.TimeoutError:
-            return JSONResponse(
-                status_code=408,
-                content={"error": f"Request timeout after {UPLOAD_TIMEOUT} seconds"}
-            )
+            await asyncio.wait({app_task, started_task}, timeout=UPLOAD_TIMEOUT, return_when=asyncio.FIRST_COMPLETED)
+        except asyncio.CancelledError:
+            app_task.cancel()
+            raise
+        finally:
+            started_task.cancel()
+
+        if not app_task.done() and not started.is_set():
+            app_task.cancel()
+            await asyncio.gather(app_task, return_exceptions=True)
+            if not started.is_set():
+                response = JSONResponse(
+                    status_code=408,
+                    content={"error": f"Request timeout after {UPLOAD_TIMEOUT} seconds"}
+                )
+                await response(scope, receive, send)
+            return
+        await app_task
 
 app = FastAPI()
 app.add_middleware(TimeoutMiddleware)
+metrics = Metrics()
+app.add_middleware(MetricsMiddleware, metrics=metrics)
+# Outermost, so the request span is current in everything below
+app.add_middleware(TracingMiddleware)
+if TRACING_EXPORTER and configure_tracing(TRACING_EXPORTER, path=TRACING_FILE):
+    # Before the worker processes are forked, so they record spans too
+    record_spans()
+
+def observe_conversion(timings: Optional[dict]):
+    """Record the docling stage timings and spans of a finished conversion (see `conversion_timings`)"""
+    if not timings:
+        return
+    metrics.observe_conversion(timings)
+    record_conversion_spans(timings.get("spans"))
+
+converter_pool = ConverterPool(
+    size=CONVERTER_POOL_SIZE,
+    max_failures=CONVERTER_MAX_FAILURES,
+    acquire_timeout=UPLOAD_TIMEOUT,
+    warm_profiles=CONVERTER_WARM_PROFILES,
+    max_profiles=CONVERTER_MAX_PROFILES,
+)
+if CONVERSION_EXECUTOR == "process":
+    # Workers only share the converters built before the fork: warm the
+    # profiles the server switches to by itself (deadline degradations) too
+    conversion_executor = WorkerFarm(
+        size=CONVERSION_WORKERS,
+        torch_threads=WORKER_TORCH_THREADS,
+        max_failures=CONVERTER_MAX_FAILURES,
+        warm_profiles=CONVERTER_WARM_PROFILES + [
+            degraded
+            for options in [DEFAULT_OPTIONS, *CONVERTER_WARM_PROFILES] if DEADLINE_DEGRADATION
+            for degraded in degraded_options(options)
+        ],
+        max_profiles=CONVERTER_MAX_PROFILES,
+        worker_profiles=WORKER_MAX_PROFILES,
+    )
+else:
+    conversion_executor = ConversionExecutor(converter_pool, max_workers=CONVERSION_WORKERS)
+
+job_store = JobStore(UPLOAD_DIR, PROCESSED_DIR / "results")
+
+result_cache = ResultCache(
+    PROCESSED_DIR / "cache",
+    memory_items=RESULT_CACHE_MEMORY_ITEMS,
+    memory_bytes=RESULT_CACHE_MEMORY_MB * 1024 * 1024,
+    disk_bytes=RESULT_CACHE_DISK_MB * 1024 * 1024,
+    max_age=RESULT_CACHE_MAX_AGE,
+) if RESULT_CACHE_ENABLED else None
+admission_controller = AdmissionController(
+    max_in_flight=ADMISSION_MAX_IN_FLIGHT,
+    max_queue=ADMISSION_MAX_QUEUE,
+    max_wait=ADMISSION_MAX_WAIT,
+)
+fetcher = Fetcher(
+    UPLOAD_DIR / "downloads",
+    impersonate="chrome",
+    max_clients=FETCH_MAX_CONNECTIONS,
+    per_host=FETCH_MAX_PER_HOST,
+    timeout=FETCH_TIMEOUT,
+    max_size=FETCH_MAX_SIZE,
+    disk_bytes=FETCH_CACHE_MB * 1024 * 1024,
+    max_age=FETCH_CACHE_MAX_AGE,
+)
+
+# Everything besides the input bytes and output format that changes the result
+PIPELINE_FINGERPRINT = {"docling": version("docling")}
+
+# Background warm-up of the converters, kept referenced until it finishes
+warm_up_task: Optional[asyncio.Task] = None
 
 @app.on_event("startup")
 async def verify_models():
-    """Verify that all required models are present"""
+    """Verify that all required models are on disk, without loading them"""
+    models_path = None
+    if MODEL_CACHE_PATH is not None:
+        try:
+            manifest = read_manifest(MODEL_CACHE_PATH)
+            if not missing_artifacts(MODEL_CACHE_PATH):
+                models_path = MODEL_CACHE_PATH
+                # Frozen models may round differently: do not serve results cached from the snapshot
+                PIPELINE_FINGERPRINT["model_cache"] = manifest["created"]
+                print(f"Loading models from the model cache in {MODEL_CACHE_PATH}")
+        except ModelCacheError as e:
+            print(f"Warning: not using the model cache: {e}")
     try:
-        # Verify PDF/Image models
-        pipeline = StandardPdfPipeline(pipeline_options=PdfPipelineOptions())
-        models_path = pipeline.artifacts_path
-        
-        # Check if critical model directories exist
-        layout_path = models_path / StandardPdfPipeline._layout_model_path
-        table_path = models_path / StandardPdfPipeline._table_model_path
-        
-        if not layout_path.exists() or not table_path.exists():
-            raise RuntimeError("Required models are missing!")
-            
+        if models_path is None:
+            models_path = resolve_models_path(MODELS_PATH)
+        missing = missing_artifacts(models_path)
+        if missing:
+            raise RuntimeError(f"Required models are missing: {', '.join(missing)}")
     except Exception as e:
         print(f"Error verifying models: {e}")
         raise e
+    easyocr_path = easyocr_cache_path(models_path) if models_path == MODEL_CACHE_PATH else None
+    if not easyocr_ready(easyocr_path):
+        print(f"Warning: EasyOCR models not found in {easyocr_path or easyocr_models_path()}, they will be downloaded on first use")
+
+    # Point the pipelines at the checked models so they skip the per-build hub lookup
+    converter_pool.artifacts_path = models_path
+    if CONVERSION_EXECUTOR == "process":
+        conversion_executor.artifacts_path = models_path
+
+    if INFERENCE_BACKEND == "onnx":
+        try:
+            if not onnx_available():
+                raise OnnxBackendError("the onnxruntime package is not installed")
+            read_onnx_manifest(ONNX_PATH)
+        except OnnxBackendError as e:
+            print(f"ONNX backend disabled, using torch: {e}")
+        else:
+            PIPELINE_FINGERPRINT["backend"] = "onnx"
+            converter_pool.onnx_path = ONNX_PATH
+            if CONVERSION_EXECUTOR == "process":
+                conversion_executor.onnx_path = ONNX_PATH
+
+    try:
+        manifest = read_quantized_manifest(QUANTIZED_PATH)
+        missing = missing_artifacts(QUANTIZED_PATH)
+        if missing:
+            raise QuantizationError(f"missing {', '.join(missing)}")
+    except QuantizationError as e:
+        print(f"Quantized models not available, int8 requests quantize TableFormer only: {e}")
+    else:
+        # int8 results depend on the quantized models they were computed with
+        PIPELINE_FINGERPRINT["quantized_models"] = manifest["created"]
+        converter_pool.quantized_path = QUANTIZED_PATH
+        if CONVERSION_EXECUTOR == "process":
+            conversion_executor.quantized_path = QUANTIZED_PATH
+            # Shared by the workers instead of built in each of them
+            conversion_executor.warm_profiles.append(DEFAULT_OPTIONS.model_copy(update={"precision": Precision.INT8}))
+
+@app.on_event("startup")
+async def start_converter_pool():
+    """
+    Build the pooled converters in the background so requests reuse warm
+    pipelines; /ready reports when they are done. Requests that arrive
+    earlier wait for a converter.
+    """
+    global warm_up_task
+    started = time.perf_counter()
+
+    async def warm_up():
+        if CONVERSION_EXECUTOR == "thread":
+            await asyncio.to_thread(converter_pool.wait_ready)
+        else:
+            await asyncio.to_thread(conversion_executor.warm)
+            print(f"Forking {CONVERSION_WORKERS} conversion worker process(es)...")
+            conversion_executor.start()
+        print(f"Converters warm after {time.perf_counter() - started:.1f}s")
+
+    if CONVERSION_EXECUTOR == "thread":
+        print(f"Warming {CONVERTER_POOL_SIZE} pooled converter(s) in the background...")
+        converter_pool.start()
+        conversion_executor.start()
+    else:
+        print("Warming the worker template converters in the background...")
+    warm_up_task = asyncio.create_task(warm_up())
+
+@app.on_event("startup")
+async def start_fetcher():
+    await fetcher.start()
+
+@app.on_event("startup")
+async def start_job_runner():
+    """Resume jobs left in the queue by a previous run and start draining it"""
+    await job_runner.start()
+
+@app.on_event("shutdown")
+async def stop_conversion_executor():
+    await job_runner.stop()
+    await fetcher.close()
+    conversion_executor.shutdown()
+
+def worker_rss():
+    """RSS of this process and, with the process executor, of every worker"""
+    yield ("main",), process_rss(os.getpid())
+    if CONVERSION_EXECUTOR == "process":
+        for worker in conversion_executor.stats()["workers"]:
+            yield (str(worker["index"]),), process_rss(worker["pid"])
+
+metrics.gauge("queue_depth", "Requests and jobs waiting, by queue", lambda: [
+    (("admission",), admission_controller.queued),
+    (("executor",), conversion_executor.queued),
+    (("jobs",), job_runner.depth),
+], labels=("queue",))
+metrics.gauge("in_flight", "Admitted requests and running conversions", lambda: [
+    (("admission",), admission_controller.in_flight),
+    (("executor",), conversion_executor.in_flight),
+], labels=("component",))
+metrics.gauge("cache_hit_ratio", "Result cache hits per lookup", lambda: [
+    ((), result_cache.stats()["hit_ratio"] if result_cache else None),
+])
+metrics.gauge("worker_rss_bytes", "Resident memory of the server and worker processes", worker_rss, labels=("worker",))
+
+@app.get("/metrics", summary="Prometheus metrics", response_class=PlainTextResponse)
+async def prometheus_metrics():
+    """Expose the service metrics in the Prometheus text format"""
+    return PlainTextResponse(metrics.render(), media_type="text/plain; version=0.0.4")
+
+def input_format(name: str) -> str:
+    """Metrics label for the format of a document, from its file name or URL"""
+    suffix = Path(urlparse(name).path).suffix.lower().lstrip(".")
+    return suffix if f".{suffix}" in ALLOWED_EXTENSIONS else "other"
+
+@app.get("/live", summary="Liveness probe")
+async def live():
+    """Answer as soon as the server accepts requests, warm or not"""
+    return {"live": True}
+
+@app.get("/ready", summary="Readiness probe")
+async def ready():
+    """Whether the configured converters are warm and requests will not wait for a build"""
+    is_ready = conversion_executor.ready()
+    return JSONResponse(status_code=200 if is_ready else 503, content={"ready": is_ready})
+
+@app.get("/health", summary="Converter pool and executor health")
+async def health():
+    """Run the pool health check and report converter and executor state"""
+    if CONVERSION_EXECUTOR == "process":
+        healthy = await conversion_executor.check()
+    else:
+        healthy = converter_pool.check()
+    status = converter_pool.status()
+    status["executor"] = conversion_executor.stats()
+    status["jobs_queued"] = job_runner.depth
+    status["cache"] = result_cache.stats() if result_cache else None
+    status["fetcher"] = fetcher.stats()
+    status["admission"] = admission_controller.stats()
+    return JSONResponse(
+        status_code=200 if healthy else 503,
+        content=status
+    )
+
+class ClientDisconnectedError(Exception):
+    """Raised when the client went away while its document was being converted."""
+
+async def cancel_on_disconnect(request: Request, conversion: Awaitable, deadline: Optional[float] = None):
+    """
+    Await a conversion, cancelling it as soon as the client disconnects or
+    the request deadline passes.
+
+    The disconnect is polled every DISCONNECT_POLL_INTERVAL seconds, so an
+    abandoned conversion is stopped (at its next page, or by killing its
+    worker process) about a second after the client left.
+
+    Raises:
+        ClientDisconnectedError: If the client went away
+        asyncio.TimeoutError: If `deadline` (a `time.monotonic()` value) passed
+    """
+    task = asyncio.ensure_future(conversion)
+    try:
+        while True:
+            timeout = DISCONNECT_POLL_INTERVAL
+            if deadline is not None:
+                timeout = max(0.0, min(timeout, deadline - time.monotonic()))
+            done, _ = await asyncio.wait({task}, timeout=timeout)
+            if done:
+                return task.result()
+            if deadline is not None and time.monotonic() >= deadline:
+                raise asyncio.TimeoutError(f"Request deadline of {round(deadline - request_start(request), 1)} seconds exceeded")
+            if await request.is_disconnected():
+                raise ClientDisconnectedError("Client disconnected")
+    finally:
+        if not task.done():
+            task.cancel()
+
+def cache_key(
+    content_hash: Optional[str],
+    output_format: OutputFormat,
+    options: ConversionOptions,
+    pages: Optional[PageSelection] = None,
+) -> Optional[str]:
+    if result_cache is None or content_hash is None:
+        return None
+    fingerprint = {**PIPELINE_FINGERPRINT, "options": options.model_dump(mode="json")}
+    if pages is not None:
+        fingerprint["pages"] = pages.model_dump(mode="json")
+    return ResultCache.key(content_hash, output_format.value, fingerprint)
+
+async def convert_cached(
+    source: Union[str, DocumentStream],
+    output_format: OutputFormat,
+    content_hash: Optional[str],
+    options: ConversionOptions = DEFAULT_OPTIONS,
+    pages: Optional[PageSelection] = None,
+) -> bytes:
+    """
+    Serve a conversion from the result cache, or convert and cache it.
+
+    The source is checked and cut down to the selected pages (see
+    `prepare_source`) before a converter is borrowed for it.
+    """
+    key = cache_key(content_hash, output_format, options, pages)
+    with span("convert", profile=options.profile, output_format=output_format.value) as current:
+        if key is not None:
+            cached = await asyncio.to_thread(result_cache.get, key)
+            if current is not None:
+                current.set_attribute("cache.hit", cached is not None)
+            if cached is not None:
+                return cached
+
+        source, page_numbers = await asyncio.to_thread(prepare_source, source, pages)
+        pages_processed = page_numbers if pages is not None else None
+        result, timings = await conversion_executor.run(
+            convert_and_export, source, output_format, pages_processed, options=options
+        )
+        observe_conversion(timings)
+        if key is not None:
+            await asyncio.to_thread(result_cache.put, key, result)
+        return result
+
+async def resolve_source(
+    url: str, content_hash: Optional[str] = None, deadline: Optional[float] = None, hash_files: bool = True
+) -> Tuple[Union[str, DocumentStream], Optional[str]]:
+    """
+    Turn a URL or file path into something the converter can read locally.
+
+    Remote documents are downloaded by the shared fetcher, so the download
+    overlaps with other conversions; remote HTML pages are fetched into an
+    in-memory stream. Local files (uploads included) are converted in place. The content hash used by the result cache is returned alongside.
+    With a `deadline` the fetch may use FETCH_BUDGET_SHARE of the time left.
+    Without `hash_files` local files are not hashed (their result is not cached).
+    """
+    timeout = None
+    if deadline is not None:
+        timeout = min(FETCH_TIMEOUT, max(1.0, (deadline - time.monotonic()) * FETCH_BUDGET_SHARE))
+    is_remote = urlparse(url).scheme in ("http", "https")
+    if is_remote and not url.endswith(".html"):
+        with span("fetch", url=url):
+            path, content_hash = await fetcher.download(url, timeout=timeout)
+        return str(path), content_hash
+
+    if not is_remote:
+        if hash_files and content_hash is None and result_cache is not None and Path(url).is_file():
+            content_hash = await asyncio.to_thread(file_sha256, Path(url))
+        return str(url), content_hash
+
+    # HTML pages are fetched here and handed to docling as an in-memory stream
+    with span("fetch", url=url, html=True):
+        html_content = await fetcher.fetch_bytes(url, timeout=timeout)
+    content_hash = hashlib.sha256(html_content).hexdigest()
+    name = Path(urlparse(url).path).name or "page.html"
+    return DocumentStream(name=name, stream=BytesIO(html_content)), content_hash
+
+async def convert_source(
+    url: str,
+    output_format: OutputFormat,
+    content_hash: Optional[str] = None,
+    options: ConversionOptions = DEFAULT_OPTIONS,
+    pages: Optional[PageSelection] = None,
+    deadline: Optional[float] = None,
+) -> bytes:
+    """
+    Convert a document on the conversion executor, fetching remote documents first.
+
+    Shared by the synchronous endpoints and the job workers. Errors are raised
+    to the caller. Local files and fetched documents are looked up in the
+    result cache by content hash first. The result is returned as encoded
+    JSON bytes, ready to be sent or stored.
+
+    With a `deadline` the time left after the fetch is budgeted across the
+    pipeline stages (see `plan_stages`), optional stages are degraded when it
+    is too short and the plan is returned under `budget`. A cached result
+    of the requested options is still preferred over a degraded conversion.
+    """
+    started = time.monotonic()
+    source, content_hash = await resolve_source(url, content_hash, deadline)
+    if deadline is None:
+        return await convert_cached(source, output_format, content_hash, options, pages)
+
+    page_count = await asyncio.to_thread(count_pages, source, pages)
+    chosen, plan = plan_stages(
+        options, deadline, page_count, time.monotonic() - started, DEADLINE_STAGE_COSTS, DEADLINE_DEGRADATION
+    )
+    if chosen != options:
+        key = cache_key(content_hash, output_format, options, pages)
+        cached = await asyncio.to_thread(result_cache.get, key) if key else None
+        if cached is not None:
+            plan.degraded = {}
+            return merge_json({"budget": plan.model_dump()}, cached)
+
+    result = await convert_cached(source, output_format, content_hash, chosen, pages)
+    return merge_json({"budget": plan.model_dump()}, result)
+
+async def run_job(job: dict) -> bytes:
+    """Job runner hook: convert the job source and archive an uploaded input"""
+    options = ConversionOptions(**job.get("options", {}))
+    if not job["filename"]:
+        return await convert_source(job["source"], OutputFormat(job["output_format"]), options=options)
+
+    queue_filepath = Path(job["source"])
+    try:
+        result = await convert_source(
+            str(queue_filepath), OutputFormat(job["output_format"]), job.get("content_hash"), options
+        )
+    except Exception:
+        if queue_filepath.exists():
+            queue_filepath.unlink()
+        raise
+    shutil.move(str(queue_filepath), str(PROCESSED_DIR / queue_filepath.name))
+    return result
+
+job_runner = JobRunner(job_store, run_job, concurrency=JOB_WORKERS)
+
+def conversion_options(
+    do_ocr: bool = Query(default=DEFAULT_OPTIONS.do_ocr, description="Run OCR on bitmap content"),
+    do_table_structure: bool = Query(default=DEFAULT_OPTIONS.do_table_structure, description="Recover the structure of tables"),
+    table_mode: TableMode = Query(default=DEFAULT_OPTIONS.table_mode, description="TableFormer mode (fast, accurate)"),
+    images_scale: float = Query(default=DEFAULT_OPTIONS.images_scale, gt=0, le=4.0, description="Scale of the rendered page images"),
+    generate_page_images: bool = Query(default=DEFAULT_OPTIONS.generate_page_images, description="Keep page images in the output"),
+    precision: Precision = Query(default=DEFAULT_OPTIONS.precision, description="Layout and TableFormer weights (fp32, int8: dynamically quantized)")
+) -> ConversionOptions:
+    """Collect the per-request pipeline options from the query string"""
+    return ConversionOptions(
+        do_ocr=do_ocr,
+        do_table_structure=do_table_structure,
+        table_mode=table_mode,
+        images_scale=images_scale,
+        generate_page_images=generate_page_images,
+        precision=precision,
+    )
+
+def request_start(request: Request) -> float:
+    return getattr(request.state, "received_at", None) or time.monotonic()
+
+def request_deadline(
+    request: Request,
+    timeout: Optional[float] = Query(default=None, gt=0, description=f"Seconds the conversion may take (at most {UPLOAD_TIMEOUT})"),
+    x_request_timeout: Optional[float] = Header(default=None, gt=0, description="Same as the timeout parameter")
+) -> Optional[float]:
+    """
+    Deadline the client asked for as a `time.monotonic()` value, capped by the
+    server; None when it asked for none (the request timeout middleware is
+    then the only limit and nothing is degraded).
+    """
+    requested = timeout if timeout is not None else x_request_timeout
+    if requested is None:
+        return None
+    return request_start(request) + min(requested, UPLOAD_TIMEOUT)
+
+def encode_event(event: dict, mode: StreamMode) -> bytes:
+    """Serialize a streaming event as an NDJSON line or a Server-Sent Event"""
+    fields = {k: v for k, v in event.items() if k != "body"}
+    data = merge_json(fields, event.get("body"))
+    if mode == StreamMode.SSE:
+        return f"event: {event['event']}\ndata: ".encode("utf-8") + data + b"\n\n"
+    return data + b"\n"
+
+async def stream_pages(
+    url: str,
+    output_format: OutputFormat,
+    options: ConversionOptions,
+    pages: Optional[PageSelection],
+    mode: StreamMode,
+    queue_filepath: Optional[Path] = None,
+    deadline: Optional[float] = None,
+    processed_filepath: Optional[Path] = None,
+) -> AsyncIterator[bytes]:
+    """
+    Convert a document page by page and stream every page as it is done.
+
+    Errors are reported as a final `error` event, since the status code has
+    already been sent. An uploaded `queue_filepath` is archived on success (to
+    `processed_filepath`, by default under the same name) and removed on
+    failure, like /upload-convert does. With a `deadline` the stage
+    budget (see `convert_source`) is sent first as a `budget` event.
+    """
+    succeeded = False
+    try:
+        started = time.monotonic()
+        # Streamed pages bypass the result cache: don't hash uploads or local files again
+        source, _ = await resolve_source(url, deadline=deadline, hash_files=False)
+        source, page_numbers = await asyncio.to_thread(prepare_source, source, pages)
+        if deadline is not None:
+            page_count = len(page_numbers) if page_numbers is not None else await asyncio.to_thread(count_pages, source)
+            options, plan = plan_stages(
+                options, deadline, page_count, time.monotonic() - started, DEADLINE_STAGE_COSTS, DEADLINE_DEGRADATION
+            )
+            yield encode_event({"event": "budget", **plan.model_dump()}, mode)
+        events = conversion_executor.iterate(convert_pages_and_export, source, output_format, page_numbers, options=options)
+        async with aclosing(events):
+            async for event in events:
+                observe_conversion(event.pop("timings", None))
+                yield encode_event(event, mode)
+        succeeded = True
+    except Exception as e:
+        yield encode_event({"event": "error", "error": str(e)}, mode)
+    finally:
+        if queue_filepath is not None and queue_filepath.exists():
+            if succeeded:
+                shutil.move(str(queue_filepath), str(processed_filepath or PROCESSED_DIR / queue_filepath.name))
+            else:
+                queue_filepath.unlink()
+
+async def json_response(request: Request, body: bytes) -> Response:
+    """
+    Send already encoded JSON, bypassing FastAPI's jsonable_encoder.
+
+    The Accept / Accept-Encoding headers select msgpack or CBOR instead of
+    JSON and gzip, brotli or zstd compression.
+    """
+    with span("encode", bytes=len(body)):
+        return await document_response(request, body, min_size=COMPRESS_MIN_SIZE)
+
+async def admit_request() -> Ticket:
+    """
+    Take an in-flight conversion slot, waiting in the bounded admission queue.
+
+    Raises a 429 with a Retry-After header when the queue is full, so bursts
+    are turned away before any compute is spent on them.
+    """
+    try:
+        with span("admission"):
+            return await admission_controller.acquire()
+    except AdmissionRejectedError as e:
+        raise HTTPException(status_code=429, detail=str(e), headers={"Retry-After": str(e.retry_after)})
+
+async def release_after(events: AsyncIterator[bytes], ticket: Ticket) -> AsyncIterator[bytes]:
+    """Keep the admission slot of a streaming response until the stream ends"""
+    try:
+        async with aclosing(events):
+            async for event in events:
+                yield event
+    finally:
+        ticket.release()
+
+def streaming_response(request: Request, events: AsyncIterator[bytes], mode: StreamMode) -> StreamingResponse:
+    media_type = "text/event-stream" if mode == StreamMode.SSE else "application/x-ndjson"
+    return event_stream_response(request, events, media_type)
+
+def page_selection(
+    page_range: Optional[str] = Query(default=None, description="PDF pages to convert, e.g. 1-5 or 1-3,7,10-"),
+    max_pages: Optional[int] = Query(default=None, ge=1, description="Convert at most this many (selected) pages")
+) -> Optional[PageSelection]:
+    """Collect the page selection from the query string"""
+    if page_range is None and max_pages is None:
+        return None
+    try:
+        return PageSelection.parse(page_range, max_pages)
+    except PageSelectionError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+def validate_upload_filename(filename: Optional[str]):
+    """Reject uploads whose extension is not a supported document format"""
+    file_extension = Path(filename or "").suffix.lower()
+    if file_extension not in ALLOWED_EXTENSIONS:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Unsupported file format. Allowed formats: {', '.join(ALLOWED_EXTENSIONS)}"
+        )
+
+async def save_upload(file: UploadFile, destination: Path) -> str:
+    """
+    Stream an uploaded file to disk in fixed-size chunks.
+
+    The size limit is enforced as the chunks arrive and the SHA-256 is computed
+    on the fly, so memory use does not depend on the file size. A partially
+    written file is removed when the upload is rejected.
+
+    Returns:
+        str: SHA-256 hex digest of the uploaded bytes
+    """
+    digest = hashlib.sha256()
+    size = 0
+    try:
+        with span("save_upload", filename=file.filename or ""), open(destination, "wb") as temp_file:
+            while chunk := await file.read(UPLOAD_CHUNK_SIZE):
+                size += len(chunk)
+                if size > MAX_FILE_SIZE:
+                    raise HTTPException(
+                        status_code=400,
+                        detail=f"File size exceeds maximum limit of {MAX_FILE_SIZE // (1024 * 1024)}MB"
+                    )
+                digest.update(chunk)
+                temp_file.write(chunk)
+    except BaseException:
+        if destination.exists():
+            destination.unlink()
+        raise
+    return digest.hexdigest()
 
 @app.post(
     "/convert",
@@ -85,13 +775,26 @@ async def verify_models():
     
     The converter supports various document types and will attempt to preserve
     the document structure, including tables, lists, and formatting.
+
+    With `stream=ndjson` or `stream=sse` each PDF page is sent as soon as it is
+    converted (`page` events), followed by a `summary` event.
+
+    A request deadline (`timeout` parameter or `X-Request-Timeout` header,
+    capped by the server), when given, is split across the pipeline stages. When it is too
+    short, TableFormer is switched to fast mode, then OCR and table structure
+    are skipped; the plan and the degraded stages are reported under `budget`.
     """,
     response_description="Converted document content in the requested format"
 )
 
 async def convert_document(
+    request: Request,
     url: str = Query(..., description="URL or file path to the document to convert"),
-    output_format: OutputFormat = Query(default=OutputFormat.MARKDOWN, description="Output format (markdown, json, all)")
+    output_format: OutputFormat = Query(default=OutputFormat.MARKDOWN, description="Output format (markdown, json, all)"),
+    options: ConversionOptions = Depends(conversion_options),
+    pages: Optional[PageSelection] = Depends(page_selection),
+    stream: Optional[StreamMode] = Query(default=None, description="Stream pages as they are converted (ndjson, sse)"),
+    deadline: Optional[float] = Depends(request_deadline)
 ) -> dict:
     """
     Convert a document to structured format (markdown or JSON).
@@ -99,44 +802,52 @@ async def convert_document(
     Args:
         url: URL or file path to the document
         output_format: Desired output format (markdown or json)
+        options: Pipeline options for PDF and image inputs
+        pages: Pages to convert; the converted pages are reported as 'pages_processed'
+        stream: Stream the output page by page instead of returning it at once
+        deadline: When the response is due if the client set one, budgeted across the pipeline stages
         
     Returns:
         dict: Contains the converted content under the 'content' key
     """
-    converter = DocumentConverter()
-    
+    request.state.input_format = input_format(url)
+    ticket = await admit_request()
+    if stream is not None:
+        events = release_after(stream_pages(url, output_format, options, pages, stream, deadline=deadline), ticket)
+        return streaming_response(request, events, stream)
     try:
-        if not url.endswith(".html"):
-            result = converter.convert(str(url))
-        else:
-            try:
-                temp_file = False
-                html_content = requests.get(url, impersonate="chrome")
-                with open("tmp.html", "w", encoding='utf-8') as f:
-                    f.write(html_content.text)
-                    temp_file = True
-                result = converter.convert("tmp.html")
-            except Exception as e:
-                return JSONResponse(
-                    status_code=500,
-                    content={"error": str(e)}
-                )
-            finally:
-                if temp_file:
-                    os.remove("tmp.html")
-            
-        # Return based on requested format
-        if output_format == OutputFormat.MARKDOWN:
-            return {"markdown": result.document.export_to_markdown()}
-        elif output_format == OutputFormat.JSON:
-            return {"json": result.document.model_dump()}
-        elif output_format == OutputFormat.ALL:
-            return {"markdown": result.document.export_to_markdown(), "json": result.document.model_dump()}
+        result = await cancel_on_disconnect(
+            request, convert_source(url, output_format, options=options, pages=pages, deadline=deadline), deadline
+        )
+        return await json_response(request, result)
+    except (DownloadTooLargeError, PageSelectionError, InvalidDocumentError) as e:
+        return JSONResponse(
+            status_code=400,
+            content={"error": str(e)}
+        )
+    except asyncio.TimeoutError as e:
+        return JSONResponse(
+            status_code=408,
+            content={"error": str(e)}
+        )
+    except PoolExhaustedError as e:
+        return JSONResponse(
+            status_code=503,
+            content={"error": str(e)}
+        )
+    except ClientDisconnectedError as e:
+        # Only ends up in the access log, the client is gone
+        return JSONResponse(
+            status_code=499,
+            content={"error": str(e)}
+        )
     except Exception as e:
         return JSONResponse(
             status_code=500,
             content={"error": str(e)}
         )
+    finally:
+        ticket.release()
     
 @app.post(
     "/upload-convert",
@@ -155,12 +866,24 @@ async def convert_document(
     
     The converter supports various document types and will attempt to preserve
     the document structure, including tables, lists, and formatting.
+
+    With `stream=ndjson` or `stream=sse` each PDF page is sent as soon as it is
+    converted (`page` events), followed by a `summary` event.
+
+    A request deadline (`timeout` parameter or `X-Request-Timeout` header,
+    capped by the server), when given, is budgeted across the pipeline stages like for
+    /convert; degraded stages are reported under `budget`.
     """,
     response_description="Converted document content in the requested format"
 )
 async def upload_and_convert_document(
+    request: Request,
     file: UploadFile = File(...),
-    output_format: OutputFormat = Query(default=OutputFormat.MARKDOWN, description="Output format (markdown, json, all)")
+    output_format: OutputFormat = Query(default=OutputFormat.MARKDOWN, description="Output format (markdown, json, all)"),
+    options: ConversionOptions = Depends(conversion_options),
+    pages: Optional[PageSelection] = Depends(page_selection),
+    stream: Optional[StreamMode] = Query(default=None, description="Stream pages as they are converted (ndjson, sse)"),
+    deadline: Optional[float] = Depends(request_deadline)
 ) -> dict:
     """
     Convert an uploaded document to structured format (markdown or JSON).
@@ -168,50 +891,68 @@ async def upload_and_convert_document(
     Args:
         file: Uploaded document file
         output_format: Desired output format (markdown, json, or all)
+        options: Pipeline options for PDF and image inputs
+        pages: Pages to convert; the converted pages are reported as 'pages_processed'
+        stream: Stream the output page by page instead of returning it at once
+        deadline: When the response is due if the client set one, budgeted across the pipeline stages
         
     Returns:
         dict: Contains the converted content under the 'content' key
     """
     try:
+        request.state.input_format = input_format(file.filename or "")
+
         # Validate file extension
-        file_extension = Path(file.filename).suffix.lower()
-        if file_extension not in ALLOWED_EXTENSIONS:
-            raise HTTPException(
-                status_code=400,
-                detail=f"Unsupported file format. Allowed formats: {', '.join(ALLOWED_EXTENSIONS)}"
-            )
+        validate_upload_filename(file.filename)
 
-        # Check file size (read first chunk)
-        first_chunk = await file.read(MAX_FILE_SIZE + 1)
-        if len(first_chunk) > MAX_FILE_SIZE:
-            raise HTTPException(
-                status_code=400,
-                detail=f"File size exceeds maximum limit of {MAX_FILE_SIZE // (1024 * 1024)}MB"
-            )
-        
-        # Reset file pointer
-        await file.seek(0)
-        
-        # Generate timestamped filename
+        # Unique queue filename, so concurrent uploads of the same name never
+        # share a file; the processed copy keeps the timestamped original name
+        queue_filepath = UPLOAD_DIR / f"{uuid.uuid4().hex}{Path(file.filename).suffix}"
         timestamp = datetime.now().strftime("%Y%m%d")
-        new_filename = f"{timestamp}_{file.filename}"
-        queue_filepath = UPLOAD_DIR / new_filename
-        processed_filepath = PROCESSED_DIR / new_filename
-
-        # Save file to queue directory
-        with open(queue_filepath, "wb") as temp_file:
-            content = await file.read()
-            temp_file.write(content)
-        
+        processed_filepath = PROCESSED_DIR / f"{timestamp}_{Path(file.filename).name}"
+
+        # Wait for a conversion slot before taking the upload
+        ticket = await admit_request()
+        streaming = False
         try:
-            # Use existing convert_document function with the queue filepath
-            result = await convert_document(str(queue_filepath), output_format)
+            # Stream file to queue directory
+            content_hash = await save_upload(file, queue_filepath)
+
+            if stream is not None:
+                events = stream_pages(
+                    str(queue_filepath), output_format, options, pages, stream, queue_filepath, deadline,
+                    processed_filepath,
+                )
+                streaming = True
+                return streaming_response(request, release_after(events, ticket), stream)
+
+            # Convert the queue filepath; errors propagate so the file is cleaned up
+            result = await cancel_on_disconnect(
+                request,
+                convert_source(str(queue_filepath), output_format, content_hash, options, pages, deadline),
+                deadline,
+            )
             
             # Move file to processed directory after successful conversion
             shutil.move(str(queue_filepath), str(processed_filepath))
             
-            return result
+            return await json_response(request, result)
             
+        except (PageSelectionError, InvalidDocumentError) as e:
+            if queue_filepath.exists():
+                queue_filepath.unlink()
+            raise HTTPException(status_code=400, detail=str(e))
+        except HTTPException:
+            raise
+        except asyncio.TimeoutError as e:
+            if queue_filepath.exists():
+                queue_filepath.unlink()
+            raise HTTPException(status_code=408, detail=str(e))
+        except (asyncio.CancelledError, ClientDisconnectedError, ConversionCancelledError):
+            # Timed out or abandoned by the client: nobody is waiting for a response
+            if queue_filepath.exists():
+                queue_filepath.unlink()
+            raise
         except Exception as e:
             # Clean up file from queue directory if conversion fails
             if queue_filepath.exists():
@@ -220,11 +961,267 @@ async def upload_and_convert_document(
                 status_code=500,
                 detail=f"Error processing document: {str(e)}"
             )
+        finally:
+            # A streaming response releases the slot once the stream is done
+            if not streaming:
+                ticket.release()
             
     except HTTPException as he:
         raise he
+    except ClientDisconnectedError as e:
+        raise HTTPException(status_code=499, detail=str(e))
     except Exception as e:
         raise HTTPException(
             status_code=500,
             detail=f"Unexpected error: {str(e)}"
-        )
\ No newline at end of file
+        )
+
+@app.post(
+    "/jobs",
+    status_code=202,
+    summary="Submit an Asynchronous Conversion Job",
+    description="""
+    Queue a document for conversion and return immediately with a job id.
+
+    Provide either an uploaded file or the URL / file path of the document.
+    The job is persisted under the document queue, so it survives restarts.
+    Poll `GET /jobs/{job_id}` for its status and fetch the output from
+    `GET /jobs/{job_id}/result` once it has succeeded.
+    """,
+    response_description="The queued job"
+)
+async def submit_job(
+    file: Optional[UploadFile] = File(None),
+    url: Optional[str] = Query(None, description="URL or file path to the document to convert"),
+    output_format: OutputFormat = Query(default=OutputFormat.MARKDOWN, description="Output format (markdown, json, all)"),
+    options: ConversionOptions = Depends(conversion_options)
+) -> dict:
+    """
+    Submit a conversion job.
+
+    Args:
+        file: Uploaded document file
+        url: URL or file path to the document (when no file is uploaded)
+        output_format: Desired output format (markdown, json, or all)
+        options: Pipeline options for PDF and image inputs
+
+    Returns:
+        dict: The job record, including its id
+    """
+    if (file is None) == (url is None):
+        raise HTTPException(status_code=400, detail="Provide exactly one of 'file' or 'url'")
+
+    job_id = job_store.new_id()
+    if file is not None:
+        validate_upload_filename(file.filename)
+        queue_filepath = job_store.input_path(job_id, file.filename)
+        content_hash = await save_upload(file, queue_filepath)
+        job = job_store.create(
+            job_id, str(queue_filepath), output_format.value,
+            filename=file.filename, content_hash=content_hash,
+            options=options.model_dump(mode="json")
+        )
+    else:
+        job = job_store.create(job_id, url, output_format.value, options=options.model_dump(mode="json"))
+
+    job_runner.submit(job_id)
+    return job
+
+@app.get("/jobs/{job_id}", summary="Get Conversion Job Status")
+async def get_job(job_id: str) -> dict:
+    """Report the status and progress of a job"""
+    job = job_store.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail=f"Unknown job: {job_id}")
+    return job
+
+@app.get("/jobs/{job_id}/result", summary="Get Conversion Job Result")
+async def get_job_result(job_id: str):
+    """Return the converted document of a finished job"""
+    job = job_store.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail=f"Unknown job: {job_id}")
+    if job["status"] == JobStatus.FAILED.value:
+        return JSONResponse(
+            status_code=500,
+            content={"error": job["error"]}
+        )
+    if job["status"] != JobStatus.SUCCEEDED.value:
+        return JSONResponse(
+            status_code=409,
+            content={"error": f"Job is {job['status']}", "progress": job["progress"]}
+        )
+    return FileResponse(job_store.result_path(job_id), media_type="application/json")
+
+async def stream_batch(
+    entries: List[dict], output_format: OutputFormat, options: ConversionOptions, parallelism: int
+) -> AsyncIterator[bytes]:
+    """
+    Convert batch entries and yield one NDJSON line per document as it finishes.
+
+    Sources are resolved (downloaded, hashed) concurrently and cache hits are
+    emitted right away. The remaining documents are split into `parallelism`
+    shards, each converted with `convert_all` on its own worker.
+
+    Uploads still in the queue when the stream ends (client gone, or an
+    error) are removed.
+    """
+    try:
+        async with aclosing(_stream_batch(entries, output_format, options, parallelism)) as events:
+            async for event in events:
+                yield event
+    finally:
+        for entry in entries:
+            if entry.get("upload"):
+                Path(entry["url"]).unlink(missing_ok=True)
+
+async def _stream_batch(
+    entries: List[dict], output_format: OutputFormat, options: ConversionOptions, parallelism: int
+) -> AsyncIterator[bytes]:
+    def line(entry: dict, item: dict) -> bytes:
+        if entry.get("upload"):
+            # Same lifecycle as /upload-convert: archive on success, drop on failure
+            queue_filepath = Path(entry["url"])
+            if queue_filepath.exists():
+                if "error" in item:
+                    queue_filepath.unlink()
+                else:
+                    shutil.move(str(queue_filepath), str(PROCESSED_DIR / queue_filepath.name))
+        body = item.pop("body", None)
+        return merge_json({"index": entry["index"], "name": entry["name"], **item}, body) + b"\n"
+
+    async def prepare(entry: dict):
+        if "error" in entry:
+            return entry, None, None, {"status": "failure", "error": entry["error"]}
+        try:
+            source, content_hash = await resolve_source(entry["url"], entry.get("content_hash"))
+        except Exception as e:
+            return entry, None, None, {"status": "failure", "error": str(e)}
+        key = cache_key(content_hash, output_format, options)
+        cached = await asyncio.to_thread(result_cache.get, key) if key else None
+        if cached is not None:
+            return entry, None, None, {"status": "success", "cached": True, "body": cached}
+        return entry, source, key, None
+
+    pending = []
+    for prepared in asyncio.as_completed([prepare(entry) for entry in entries]):
+        entry, source, key, item = await prepared
+        if item is not None:
+            yield line(entry, item)
+        else:
+            pending.append((entry, source, key))
+    if not pending:
+        return
+
+    by_index = {entry["index"]: (entry, key) for entry, _, key in pending}
+    finished: asyncio.Queue = asyncio.Queue()
+
+    async def run_shard(shard: List[tuple]):
+        reported = set()
+        try:
+            sources = [(entry["index"], source) for entry, source, _ in shard]
+            items = conversion_executor.iterate(convert_all_and_export, sources, output_format, options=options)
+            async with aclosing(items):
+                async for item in items:
+                    observe_conversion(item.pop("timings", None))
+                    reported.add(item["index"])
+                    finished.put_nowait(item)
+        except Exception as e:
+            for entry, _, _ in shard:
+                if entry["index"] not in reported:
+                    finished.put_nowait({"index": entry["index"], "status": "failure", "error": str(e)})
+
+    shards = [pending[i::parallelism] for i in range(min(parallelism, len(pending)))]
+    tasks = [asyncio.create_task(run_shard(shard)) for shard in shards]
+    try:
+        for _ in range(len(pending)):
+            item = await finished.get()
+            entry, key = by_index[item.pop("index")]
+            if key and "error" not in item:
+                await asyncio.to_thread(result_cache.put, key, item["body"])
+            yield line(entry, item)
+    finally:
+        for task in tasks:
+            task.cancel()
+
+@app.post(
+    "/convert/batch",
+    summary="Convert Many Documents in One Request",
+    description="""
+    Convert several documents (uploaded files and/or URLs or file paths) in one request.
+
+    The documents are converted with docling's `convert_all`, split over
+    `parallelism` workers. Results are streamed back as newline-delimited JSON,
+    one line per document as soon as it is done (in completion order):
+
+    - `index`: position of the document in the request (files first, then urls)
+    - `name`: file name or URL
+    - `status`: docling conversion status, or `failure`
+    - `markdown` / `json`: the converted content, or `error` if it failed
+    """,
+    response_description="NDJSON stream with one result per document"
+)
+async def convert_batch(
+    request: Request,
+    files: Optional[List[UploadFile]] = File(None),
+    urls: Optional[List[str]] = Form(None, description="URLs or file paths of documents to convert"),
+    output_format: OutputFormat = Query(default=OutputFormat.MARKDOWN, description="Output format (markdown, json, all)"),
+    options: ConversionOptions = Depends(conversion_options),
+    parallelism: int = Query(default=BATCH_PARALLELISM, ge=1, le=CONVERSION_WORKERS, description="Number of documents converted concurrently")
+) -> StreamingResponse:
+    """
+    Convert a batch of documents.
+
+    Args:
+        files: Uploaded document files
+        urls: URLs or file paths of documents
+        output_format: Desired output format (markdown, json, or all)
+        options: Pipeline options for PDF and image inputs
+        parallelism: Number of workers the batch is spread over
+
+    Returns:
+        StreamingResponse: NDJSON lines with the per-document results
+    """
+    files = files or []
+    urls = urls or []
+    if not files and not urls:
+        raise HTTPException(status_code=400, detail="Provide at least one file or url")
+    if len(files) + len(urls) > BATCH_MAX_ITEMS:
+        raise HTTPException(status_code=400, detail=f"A batch can hold at most {BATCH_MAX_ITEMS} documents")
+
+    # The whole batch holds one admission slot; its own parallelism is
+    # bounded by the conversion workers.
+    request.state.input_format = "batch"
+    ticket = await admit_request()
+
+    # Uploads are written to the queue before streaming starts, since the
+    # request body is no longer readable once the response is under way.
+    batch_id = uuid.uuid4().hex[:8]
+    timestamp = datetime.now().strftime("%Y%m%d")
+    entries = []
+    try:
+        for file in files:
+            entry = {"index": len(entries), "name": file.filename}
+            try:
+                validate_upload_filename(file.filename)
+                queue_filepath = UPLOAD_DIR / f"{timestamp}_{batch_id}_{entry['index']}_{Path(file.filename).name}"
+                entry["content_hash"] = await save_upload(file, queue_filepath)
+                entry["url"] = str(queue_filepath)
+                entry["upload"] = True
+            except HTTPException as he:
+                entry["error"] = he.detail
+            entries.append(entry)
+    except BaseException:
+        ticket.release()
+        for entry in entries:
+            if entry.get("upload"):
+                Path(entry["url"]).unlink(missing_ok=True)
+        raise
+    for url in urls:
+        entries.append({"index": len(entries), "name": url, "url": url})
+
+    return event_stream_response(
+        request,
+        release_after(stream_batch(entries, output_format, options, parallelism), ticket),
+        media_type="application/x-ndjson"
+    )
@@ -0,0 +1,208 @@
+import bisect
+import os
+import threading
+import time
+from collections import deque
+from typing import Callable, Dict, Iterable, List, Optional, Sequence, Tuple
+
+# Request latency buckets in seconds, conversions take from milliseconds (cache hits) to minutes
+LATENCY_BUCKETS = (0.005, 0.025, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 20, 30, 60, 120, 300)
+STAGE_BUCKETS = (0.001, 0.005, 0.025, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120)
+
+Labels = Tuple[str, ...]
+
+
+def _format_labels(names: Sequence[str], values: Labels, extra: str = "") -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _escape(value: str) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+class Counter:
+    def __init__(self, name: str, documentation: str, labels: Sequence[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labels = tuple(labels)
+        self._values: Dict[Labels, float] = {}
+        self._lock = threading.Lock()
+
+    def inc(self, *labels: str, amount: float = 1.0):
+        with self._lock:
+            self._values[labels] = self._values.get(labels, 0.0) + amount
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} counter"]
+        with self._lock:
+            values = list(self._values.items())
+        for labels, value in values:
+            lines.append(f"{self.name}{_format_labels(self.labels, labels)} {value}")
+        return lines
+
+
+class Histogram:
+    def __init__(self, name: str, documentation: str, labels: Sequence[str] = (), buckets: Sequence[float] = LATENCY_BUCKETS):
+        self.name = name
+        self.documentation = documentation
+        self.labels = tuple(labels)
+        self.buckets = tuple(buckets)
+        # labels -> (per-bucket counts, sum, count)
+        self._values: Dict[Labels, list] = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value: float, *labels: str):
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            entry = self._values.get(labels)
+            if entry is None:
+                entry = self._values[labels] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+            entry[0][index] += 1
+            entry[1] += value
+            entry[2] += 1
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} histogram"]
+        with self._lock:
+            values = [(labels, list(counts), total, count) for labels, (counts, total, count) in self._values.items()]
+        for labels, counts, total, count in values:
+            cumulative = 0
+            for bound, bucket_count in zip(self.buckets, counts):
+                cumulative += bucket_count
+                bucket_labels = _format_labels(self.labels, labels, f'le="{bound}"')
+                lines.append(f"{self.name}_bucket{bucket_labels} {cumulative}")
+            bucket_labels = _format_labels(self.labels, labels, 'le="+Inf"')
+            lines.append(f"{self.name}_bucket{bucket_labels} {count}")
+            lines.append(f"{self.name}_sum{_format_labels(self.labels, labels)} {total}")
+            lines.append(f"{self.name}_count{_format_labels(self.labels, labels)} {count}")
+        return lines
+
+
+class Gauge:
+    """A value read from `collect()` at scrape time, as (labels, value) pairs"""
+
+    def __init__(self, name: str, documentation: str, collect: Callable[[], Iterable[Tuple[Labels, Optional[float]]]], labels: Sequence[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labels = tuple(labels)
+        self.collect = collect
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} gauge"]
+        for labels, value in self.collect():
+            if value is not None:
+                lines.append(f"{self.name}{_format_labels(self.labels, labels)} {value}")
+        return lines
+
+
+def process_rss(pid: int) -> Optional[int]:
+    """Resident set size of a process in bytes (Linux only, None elsewhere)"""
+    try:
+        with open(f"/proc/{pid}/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, IndexError):
+        return None
+
+
+class Metrics:
+    """
+    Prometheus metrics of the service, rendered in the text exposition format.
+
+    Everything recorded per request is a dictionary update under a lock, so
+    instrumentation costs a few microseconds. Values owned by other components
+    (queue depth, cache hit ratio, worker RSS, ...) are gauges read when
+    `/metrics` is scraped.
+    """
+
+    def __init__(self, prefix: str = "docling_api", pages_window: float = 60.0):
+        self.prefix = prefix
+        self.pages_window = pages_window
+        self.requests = Counter(f"{prefix}_requests_total", "HTTP requests by endpoint and status", ("endpoint", "status"))
+        self.latency = Histogram(
+            f"{prefix}_request_duration_seconds", "HTTP request latency by endpoint and input format",
+            ("endpoint", "input_format"),
+        )
+        self.stages = Histogram(
+            f"{prefix}_stage_duration_seconds", "Time spent per document in each pipeline stage",
+            ("stage",), STAGE_BUCKETS,
+        )
+        self.documents = Counter(f"{prefix}_documents_converted_total", "Documents run through the pipeline")
+        self.pages = Counter(f"{prefix}_pages_converted_total", "Pages run through the pipeline")
+        self.gauges: List[Gauge] = []
+        self._recent_pages: deque = deque()
+        self._lock = threading.Lock()
+        self.gauge("pages_per_second", "Pages converted per second over the last minute", lambda: [((), self.pages_per_second())])
+
+    def gauge(self, name: str, documentation: str, collect: Callable, labels: Sequence[str] = ()):
+        self.gauges.append(Gauge(f"{self.prefix}_{name}", documentation, collect, labels))
+
+    def observe_request(self, endpoint: str, status: int, input_format: str, seconds: float):
+        self.requests.inc(endpoint, str(status))
+        self.latency.observe(seconds, endpoint, input_format)
+
+    def observe_conversion(self, timings: dict):
+        """Record the stage timings of a conversion (see `conversion.conversion_timings`)"""
+        for stage, seconds in timings.get("stages", {}).items():
+            self.stages.observe(seconds, stage)
+        pages = timings.get("pages", 0)
+        self.documents.inc(amount=timings.get("documents", 0))
+        if pages:
+            self.pages.inc(amount=pages)
+            with self._lock:
+                self._recent_pages.append((time.monotonic(), pages))
+
+    def pages_per_second(self) -> float:
+        now = time.monotonic()
+        with self._lock:
+            while self._recent_pages and now - self._recent_pages[0][0] > self.pages_window:
+                self._recent_pages.popleft()
+            pages = sum(count for _, count in self._recent_pages)
+        return round(pages / self.pages_window, 4)
+
+    def render(self) -> str:
+        lines = []
+        for metric in (self.requests, self.latency, self.stages, self.documents, self.pages, *self.gauges):
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+
+class MetricsMiddleware:
+    """
+    ASGI middleware recording the count and latency of every HTTP request.
+
+    The endpoint label is the name of the endpoint function the request was
+    routed to. Endpoints may set `request.state.input_format` to label the
+    latency with the format of the converted document.
+    """
+
+    def __init__(self, app, metrics: Metrics):
+        self.app = app
+        self.metrics = metrics
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        started = time.perf_counter()
+        status = 500
+
+        async def send_wrapper(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            endpoint = scope.get("endpoint")
+            self.metrics.observe_request(
+                getattr(endpoint, "__name__", "unmatched"),
+                status,
+                scope.get("state", {}).get("input_format", ""),
+                time.perf_counter() - started,
+            )
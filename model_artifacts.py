@@ -0,0 +1,106 @@
+import json
+import os
+import shutil
+from importlib.metadata import PackageNotFoundError, version
+from pathlib import Path
+from typing import List, Optional
+
+# Model snapshot StandardPdfPipeline.download_models_hf fetches in docling 2.3.1
+DOCLING_MODELS_REPO = "ds4sd/docling-models"
+DOCLING_MODELS_REVISION = "v2.0.1"
+# Relative to the snapshot, see StandardPdfPipeline._layout_model_path / _table_model_path
+LAYOUT_MODEL_PATH = "model_artifacts/layout/beehive_v0.0.5_pt"
+TABLE_MODEL_PATH = "model_artifacts/tableformer"
+# Text detection model EasyOCR needs whatever the languages
+EASYOCR_DETECTOR = "craft_mlt_25k.pth"
+
+
+class ModelArtifactsError(RuntimeError):
+    """Raised when the model artifacts cannot be found on disk."""
+
+
+def resolve_models_path(models_path: Optional[Path] = None) -> Path:
+    """
+    Directory holding the docling model snapshot, without any network access.
+
+    Args:
+        models_path: Configured artifacts directory; when None the snapshot is
+                     looked up in the local Hugging Face cache
+
+    Raises:
+        ModelArtifactsError: If the snapshot is not in the cache
+    """
+    if models_path is not None:
+        return Path(models_path)
+
+    from huggingface_hub import snapshot_download
+    from huggingface_hub.errors import LocalEntryNotFoundError
+
+    try:
+        return Path(snapshot_download(
+            repo_id=DOCLING_MODELS_REPO, revision=DOCLING_MODELS_REVISION, local_files_only=True
+        ))
+    except LocalEntryNotFoundError:
+        raise ModelArtifactsError(
+            f"{DOCLING_MODELS_REPO}@{DOCLING_MODELS_REVISION} is not in the Hugging Face cache, "
+            "run download_models.py first"
+        )
+
+
+def missing_artifacts(models_path: Path) -> List[str]:
+    """Model directories under `models_path` that are missing or empty"""
+    missing = []
+    for relative in (LAYOUT_MODEL_PATH, TABLE_MODEL_PATH):
+        path = models_path / relative
+        if not path.is_dir() or not any(path.iterdir()):
+            missing.append(str(path))
+    return missing
+
+
+def package_version(name: str) -> Optional[str]:
+    """Installed version of a distribution, None when it is not installed"""
+    try:
+        return version(name)
+    except PackageNotFoundError:
+        return None
+
+
+def link_or_copy(source: Path, target: Path):
+    """Hard link `source` to `target` (no extra space in the image), copy across filesystems"""
+    source = source.resolve()
+    if target.exists():
+        target.unlink()
+    try:
+        os.link(source, target)
+    except OSError:
+        shutil.copy2(source, target)
+
+
+def remove_manifest(manifest_path: Path):
+    """Invalidate a derived model directory before rebuilding it, see write_manifest"""
+    if manifest_path.exists():
+        manifest_path.unlink()
+
+
+def write_manifest(manifest_path: Path, manifest: dict):
+    """
+    Write the manifest of a derived model directory (model cache, ONNX
+    exports, quantized models).
+
+    Builders remove the manifest first and write it last, atomically, and
+    readers refuse a directory without one, so an interrupted build is never
+    used.
+    """
+    tmp_path = manifest_path.with_name(f"{manifest_path.name}.tmp")
+    tmp_path.write_text(json.dumps(manifest, indent=2))
+    os.replace(tmp_path, manifest_path)
+
+
+def easyocr_models_path() -> Path:
+    """Where EasyOCR keeps its weights (its own default, overridable by EASYOCR_MODULE_PATH)"""
+    return Path(os.getenv("EASYOCR_MODULE_PATH", Path.home() / ".EasyOCR")) / "model"
+
+
+def easyocr_ready(directory: Optional[Path] = None) -> bool:
+    """Whether EasyOCR can start without downloading its detection model"""
+    return ((directory or easyocr_models_path()) / EASYOCR_DETECTOR).is_file()
@@ -0,0 +1,184 @@
+import functools
+import json
+import os
+import threading
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Optional, Set
+
+from model_artifacts import (
+    DOCLING_MODELS_REPO,
+    DOCLING_MODELS_REVISION,
+    LAYOUT_MODEL_PATH,
+    link_or_copy,
+    package_version,
+    remove_manifest,
+    write_manifest,
+)
+
+MANIFEST_NAME = "model_cache.json"
+MANIFEST_FORMAT = 1
+# EasyOCR weights, relative to the cache directory
+EASYOCR_DIR = "easyocr"
+LAYOUT_CHECKPOINT = "model.pt"
+# Largest difference allowed between the frozen and the original layout model outputs
+LAYOUT_PARITY_TOLERANCE = 1e-3
+
+
+class ModelCacheError(RuntimeError):
+    """Raised when a model cache is missing, incomplete or built for another torch."""
+
+
+def _freeze_layout_model(source: Path, target: Path) -> bool:
+    """
+    Save a frozen copy of the TorchScript layout model, with its weights
+    folded into the graph, if it gives the same detections as the original.
+    Falls back to the original model otherwise.
+    """
+    import torch
+
+    model = torch.jit.load(str(source)).eval()
+    try:
+        frozen = torch.jit.freeze(model)
+        image = torch.rand(1, 3, 640, 640, generator=torch.Generator().manual_seed(0))
+        size = torch.tensor([[612, 792]])
+        with torch.no_grad():
+            expected, actual = model(image, size), frozen(image, size)
+        for e, a in zip(expected, actual):
+            if not torch.allclose(e.float(), a.float(), atol=LAYOUT_PARITY_TOLERANCE):
+                raise ValueError("frozen model outputs differ from the original")
+    except Exception as e:
+        print(f"Keeping the layout model unfrozen: {e}")
+        link_or_copy(source, target)
+        return False
+    torch.jit.save(frozen, str(target))
+    return True
+
+
+def _slim_checkpoint(source: Path, target: Path):
+    """Re-save a TableFormer checkpoint without its training state, in a format torch can mmap"""
+    import torch
+
+    saved = torch.load(source, map_location="cpu", weights_only=False)
+    torch.save({key: value for key, value in saved.items() if key != "optimizers"}, target)
+
+
+def build_model_cache(models_path: Path, cache_path: Path, easyocr_path: Optional[Path] = None) -> dict:
+    """
+    Write a ready-to-load copy of the model snapshot to `cache_path`.
+
+    The cache mirrors the snapshot layout, so it is used as the pipelines'
+    `artifacts_path` as is:
+
+        - the TorchScript layout model is frozen (see _freeze_layout_model)
+        - TableFormer checkpoints lose their optimizer state and are saved in
+          torch's zip format, which `torch.load` can memory-map
+        - EasyOCR weights are copied from `easyocr_path` to `easyocr/`
+        - every other file is hard linked
+
+    Returns:
+        dict: The cache manifest
+    """
+    cache_path.mkdir(parents=True, exist_ok=True)
+    remove_manifest(cache_path / MANIFEST_NAME)
+
+    frozen_layout = False
+    mmap = []
+    for source in sorted(models_path.rglob("*")):
+        relative = source.relative_to(models_path)
+        # Hugging Face download metadata
+        if not source.is_file() or relative.parts[0] == ".cache":
+            continue
+        target = cache_path / relative
+        target.parent.mkdir(parents=True, exist_ok=True)
+        if relative == Path(LAYOUT_MODEL_PATH) / LAYOUT_CHECKPOINT:
+            frozen_layout = _freeze_layout_model(source, target)
+        elif source.suffix == ".check":
+            _slim_checkpoint(source, target)
+            mmap.append(relative.as_posix())
+        else:
+            link_or_copy(source, target)
+
+    easyocr_files = []
+    if easyocr_path is not None and easyocr_path.is_dir():
+        (cache_path / EASYOCR_DIR).mkdir(exist_ok=True)
+        for source in sorted(easyocr_path.glob("*.pth")):
+            # Copied byte for byte: EasyOCR checks the MD5 of its weights
+            link_or_copy(source, cache_path / EASYOCR_DIR / source.name)
+            easyocr_files.append(source.name)
+
+    manifest = {
+        "format": MANIFEST_FORMAT,
+        "source": f"{DOCLING_MODELS_REPO}@{DOCLING_MODELS_REVISION}",
+        "created": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "torch": package_version("torch"),
+        "docling_ibm_models": package_version("docling-ibm-models"),
+        "frozen_layout": frozen_layout,
+        "mmap": mmap,
+        "easyocr": easyocr_files,
+    }
+    write_manifest(cache_path / MANIFEST_NAME, manifest)
+    return manifest
+
+
+def read_manifest(cache_path: Path) -> dict:
+    """
+    Manifest of a model cache, checked against the installed packages.
+
+    Raises:
+        ModelCacheError: If there is no complete cache at `cache_path`, or it
+                         was built with another torch or docling-ibm-models
+    """
+    try:
+        manifest = json.loads((cache_path / MANIFEST_NAME).read_text())
+    except (OSError, ValueError) as e:
+        raise ModelCacheError(f"No model cache in {cache_path}: {e}")
+    if manifest.get("format") != MANIFEST_FORMAT:
+        raise ModelCacheError(f"Unsupported model cache format {manifest.get('format')}")
+    for package in ("torch", "docling_ibm_models"):
+        installed = package_version(package.replace("_", "-"))
+        if manifest.get(package) != installed:
+            raise ModelCacheError(f"Model cache built with {package} {manifest.get(package)}, {installed} is installed")
+    return manifest
+
+
+def is_model_cache(path: Optional[Path]) -> bool:
+    return path is not None and (Path(path) / MANIFEST_NAME).is_file()
+
+
+def easyocr_cache_path(cache_path: Path) -> Optional[Path]:
+    """Directory of the cached EasyOCR weights, if the cache has them"""
+    path = Path(cache_path) / EASYOCR_DIR
+    return path if path.is_dir() and any(path.glob("*.pth")) else None
+
+
+_mmap_files: Set[str] = set()
+_mmap_lock = threading.Lock()
+
+
+def enable_mmap(cache_path: Path):
+    """
+    Memory-map the cached checkpoints when torch loads them.
+
+    Wraps `torch.load` (once per process) so that the files listed in the
+    cache manifest are opened with `mmap=True`: their tensors are read from
+    the page cache instead of being copied into fresh buffers, which cuts
+    load time and the memory held while a converter is built.
+    """
+    import torch
+
+    files = {os.path.realpath(Path(cache_path) / relative) for relative in read_manifest(Path(cache_path))["mmap"]}
+    with _mmap_lock:
+        _mmap_files.update(files)
+        if getattr(torch.load, "_model_cache_mmap", False):
+            return
+        load = torch.load
+
+        @functools.wraps(load)
+        def mmap_load(f, *args, **kwargs):
+            if isinstance(f, (str, os.PathLike)) and "mmap" not in kwargs and os.path.realpath(f) in _mmap_files:
+                kwargs["mmap"] = True
+            return load(f, *args, **kwargs)
+
+        mmap_load._model_cache_mmap = True
+        torch.load = mmap_load
@@ -0,0 +1,281 @@
+import json
+import os
+import threading
+from importlib.util import find_spec
+from pathlib import Path
+from typing import TYPE_CHECKING, Dict, Iterable, List, Union
+
+from model_artifacts import LAYOUT_MODEL_PATH, TABLE_MODEL_PATH, package_version, remove_manifest, write_manifest
+
+if TYPE_CHECKING:
+    import numpy as np
+    from docling.document_converter import DocumentConverter
+    from PIL import Image
+
+MANIFEST_NAME = "onnx_models.json"
+MANIFEST_FORMAT = 1
+ONNX_OPSET = 17
+# File names of the exports, in the directory of the model they replace
+LAYOUT_ONNX = "model.onnx"
+TABLE_ENCODER_ONNX = "encoder.onnx"
+# Largest difference allowed between the torch and ONNX Runtime outputs of an export
+EXPORT_PARITY_TOLERANCE = 1e-3
+
+
+class OnnxBackendError(RuntimeError):
+    """Raised when the ONNX backend cannot be used."""
+
+
+def onnx_available() -> bool:
+    """Whether onnxruntime is installed (without importing it)"""
+    return find_spec("onnxruntime") is not None
+
+
+def read_manifest(onnx_path: Path) -> dict:
+    """
+    Manifest of the exports in `onnx_path`.
+
+    Raises:
+        OnnxBackendError: If there are no complete exports
+    """
+    try:
+        manifest = json.loads((onnx_path / MANIFEST_NAME).read_text())
+    except (OSError, ValueError) as e:
+        raise OnnxBackendError(f"No ONNX models in {onnx_path}: {e}")
+    if manifest.get("format") != MANIFEST_FORMAT:
+        raise OnnxBackendError(f"Unsupported ONNX export format {manifest.get('format')}")
+    missing = [name for name in manifest["models"] if not (onnx_path / name).is_file()]
+    if missing:
+        raise OnnxBackendError(f"Missing ONNX models: {', '.join(missing)}")
+    return manifest
+
+
+class _Session:
+    """
+    ONNX Runtime session of one exported model, created on first use in each
+    process.
+
+    Converters are built before the worker processes are forked and the
+    runtime does not survive a fork once initialized, so every process opens
+    its own session, and nothing may run inference in the parent before it
+    forks. The session gets as many threads as torch has in its process.
+    """
+
+    def __init__(self, path: Path):
+        if not path.is_file():
+            raise OnnxBackendError(f"Missing ONNX model: {path}")
+        self.path = path
+        self._session = None
+        self._pid = None
+        self._lock = threading.Lock()
+
+    def run(self, feeds: Dict[str, "np.ndarray"]) -> list:
+        if self._pid != os.getpid():
+            with self._lock:
+                if self._pid != os.getpid():
+                    import onnxruntime as ort
+                    import torch
+
+                    options = ort.SessionOptions()
+                    options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+                    options.intra_op_num_threads = torch.get_num_threads()
+                    self._session = ort.InferenceSession(
+                        str(self.path), sess_options=options, providers=["CPUExecutionProvider"]
+                    )
+                    self._pid = os.getpid()
+        return self._session.run(None, feeds)
+
+
+class OnnxLayoutPredictor:
+    """
+    Drop-in replacement of docling_ibm_models' LayoutPredictor running the
+    exported layout model. Classes, blacklist and threshold are taken from the
+    torch predictor it replaces; pre- and post-processing are the same.
+    """
+
+    def __init__(self, predictor, session: _Session):
+        self._classes_map = predictor._classes_map
+        self._black_classes = predictor._black_classes
+        self._threshold = predictor._threshold
+        self._image_size = predictor._image_size
+        self._session = session
+
+    def info(self) -> dict:
+        return {"onnx_file": str(self._session.path), "image_size": self._image_size, "threshold": self._threshold}
+
+    def predict(self, orig_img: Union["Image.Image", "np.ndarray"]) -> Iterable[dict]:
+        import numpy as np
+        from PIL import Image
+
+        if isinstance(orig_img, Image.Image):
+            page_img = orig_img.convert("RGB")
+        elif isinstance(orig_img, np.ndarray):
+            page_img = Image.fromarray(orig_img).convert("RGB")
+        else:
+            raise TypeError("Not supported input image format")
+
+        w, h = page_img.size
+        # Same as torchvision's Resize + ToTensor on a PIL image
+        resized = page_img.resize((self._image_size, self._image_size), Image.BILINEAR)
+        img = (np.asarray(resized, dtype=np.float32) / 255.0).transpose(2, 0, 1)[None]
+        labels, boxes, scores = self._session.run(
+            {"images": img, "orig_target_sizes": np.asarray([[w, h]], dtype=np.int64)}
+        )
+
+        for label_idx, box, score in zip(labels[0], boxes[0], scores[0]):
+            label = self._classes_map[int(label_idx) + 1]
+            if label in self._black_classes:
+                continue
+            if score > self._threshold:
+                yield {
+                    "l": min(w, max(0.0, float(box[0]))),
+                    "t": min(h, max(0.0, float(box[1]))),
+                    "r": min(w, max(0.0, float(box[2]))),
+                    "b": min(h, max(0.0, float(box[3]))),
+                    "label": label,
+                    "confidence": float(score),
+                }
+
+
+_encoder_class = None
+
+
+def _onnx_encoder(session: _Session):
+    """torch module running the TableFormer image encoder on ONNX Runtime"""
+    global _encoder_class
+    import torch
+
+    if _encoder_class is None:
+
+        class OnnxEncoder(torch.nn.Module):
+            def __init__(self, session: _Session):
+                super().__init__()
+                self.session = session
+
+            def forward(self, images):
+                (features,) = self.session.run({"images": images.detach().cpu().numpy()})
+                return torch.from_numpy(features)
+
+        _encoder_class = OnnxEncoder
+    return _encoder_class(session)
+
+
+def install_onnx_backend(converter: "DocumentConverter", onnx_path: Path) -> int:
+    """
+    Run the layout model and the TableFormer image encoder of the paginated
+    pipelines of `converter` on ONNX Runtime.
+
+    The exports in `onnx_path` mirror the model snapshot, so each torch model
+    is replaced by the export at the same relative path. TableFormer decodes
+    its structure tag by tag in Python, so its decoders stay on torch.
+
+    Returns:
+        int: Number of models replaced
+
+    Raises:
+        OnnxBackendError: If an export is missing
+    """
+    from docling.models.layout_model import LayoutModel
+    from docling.models.table_structure_model import TableStructureModel
+
+    replaced = 0
+    for pipeline in converter.initialized_pipelines.values():
+        artifacts_path = getattr(pipeline, "artifacts_path", None)
+        if artifacts_path is None:
+            continue
+        for stage in getattr(pipeline, "build_pipe", None) or []:
+            model = getattr(stage, "model", stage)
+            if isinstance(model, LayoutModel) and not isinstance(model.layout_predictor, OnnxLayoutPredictor):
+                relative = Path(model.layout_predictor._torch_fn).parent.relative_to(artifacts_path)
+                session = _Session(onnx_path / relative / LAYOUT_ONNX)
+                model.layout_predictor = OnnxLayoutPredictor(model.layout_predictor, session)
+                replaced += 1
+            elif isinstance(model, TableStructureModel) and getattr(model, "tf_predictor", None) is not None:
+                table_model = model.tf_predictor._model
+                if _encoder_class is None or not isinstance(table_model._encoder, _encoder_class):
+                    relative = Path(model.tm_config["model"]["save_dir"]).relative_to(artifacts_path)
+                    table_model._encoder = _onnx_encoder(_Session(onnx_path / relative / TABLE_ENCODER_ONNX))
+                    replaced += 1
+    return replaced
+
+
+def _max_difference(expected: list, actual: list) -> float:
+    import numpy as np
+
+    return max(
+        float(np.max(np.abs(np.asarray(e, dtype=np.float64) - np.asarray(a, dtype=np.float64)), initial=0.0))
+        for e, a in zip(expected, actual)
+    )
+
+
+def export_onnx(models_path: Path, onnx_path: Path, opset: int = ONNX_OPSET) -> dict:
+    """
+    Export the layout model and the TableFormer image encoders of the
+    snapshot in `models_path` to ONNX, under the same relative paths in
+    `onnx_path`.
+
+    Every export is run on ONNX Runtime next to torch on a fixed input and
+    rejected if the outputs differ by more than EXPORT_PARITY_TOLERANCE. The
+    manifest records the differences.
+
+    Returns:
+        dict: The export manifest
+
+    Raises:
+        OnnxBackendError: If onnxruntime is missing or an export does not match
+    """
+    if not onnx_available():
+        raise OnnxBackendError("The onnxruntime package is not installed")
+    import docling_ibm_models.tableformer.common as c
+    import torch
+    from docling_ibm_models.tableformer.data_management.tf_predictor import TFPredictor
+
+    onnx_path.mkdir(parents=True, exist_ok=True)
+    remove_manifest(onnx_path / MANIFEST_NAME)
+    generator = torch.Generator().manual_seed(0)
+    exports: List[tuple] = []
+
+    layout = torch.jit.load(str(models_path / LAYOUT_MODEL_PATH / "model.pt")).eval()
+    exports.append((
+        Path(LAYOUT_MODEL_PATH) / LAYOUT_ONNX, layout,
+        {"images": torch.rand(1, 3, 640, 640, generator=generator), "orig_target_sizes": torch.tensor([[612, 792]])},
+        ["labels", "boxes", "scores"], None,
+    ))
+    for config_path in sorted((models_path / TABLE_MODEL_PATH).rglob("tm_config.json")):
+        config = c.read_config(str(config_path))
+        config["model"]["save_dir"] = str(config_path.parent)
+        encoder = TFPredictor(config)._model._encoder.eval()
+        size = config["dataset"]["resized_image"]
+        exports.append((
+            config_path.parent.relative_to(models_path) / TABLE_ENCODER_ONNX, encoder,
+            {"images": torch.rand(1, 3, size, size, generator=generator)},
+            ["features"], {"images": {0: "batch"}, "features": {0: "batch"}},
+        ))
+
+    models = {}
+    for relative, model, inputs, output_names, dynamic_axes in exports:
+        target = onnx_path / relative
+        target.parent.mkdir(parents=True, exist_ok=True)
+        with torch.no_grad():
+            torch.onnx.export(
+                model, tuple(inputs.values()), str(target),
+                input_names=list(inputs), output_names=output_names, dynamic_axes=dynamic_axes,
+                opset_version=opset,
+            )
+            expected = model(*inputs.values())
+        expected = [expected] if isinstance(expected, torch.Tensor) else list(expected)
+        actual = _Session(target).run({name: tensor.numpy() for name, tensor in inputs.items()})
+        difference = _max_difference([e.numpy() for e in expected], actual)
+        if difference > EXPORT_PARITY_TOLERANCE:
+            raise OnnxBackendError(f"ONNX export of {relative} differs from torch by {difference}")
+        models[relative.as_posix()] = {"max_abs_difference": difference}
+
+    manifest = {
+        "format": MANIFEST_FORMAT,
+        "opset": opset,
+        "torch": package_version("torch"),
+        "onnxruntime": package_version("onnxruntime"),
+        "models": models,
+    }
+    write_manifest(onnx_path / MANIFEST_NAME, manifest)
+    return manifest
@@ -0,0 +1,138 @@
+import json
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import TYPE_CHECKING, Optional
+
+from model_artifacts import LAYOUT_MODEL_PATH, link_or_copy, package_version, remove_manifest, write_manifest
+
+if TYPE_CHECKING:
+    from docling.document_converter import DocumentConverter
+
+MANIFEST_NAME = "quantized_models.json"
+MANIFEST_FORMAT = 1
+LAYOUT_CHECKPOINT = "model.pt"
+
+
+class QuantizationError(RuntimeError):
+    """Raised when the quantized models are missing or were built for another torch."""
+
+
+def _quantize_layout_model(source: Path, target: Path) -> Optional[float]:
+    """
+    Save the TorchScript layout model with its linear layers dynamically
+    quantized to int8 (weights stored as int8, activations quantized on the
+    fly). Falls back to the original model if graph-mode quantization fails.
+
+    Returns:
+        Optional[float]: Largest difference of the detection scores to the
+                         original on a fixed input, None if not quantized
+    """
+    import torch
+    from torch.ao.quantization import default_dynamic_qconfig, quantize_dynamic_jit
+
+    model = torch.jit.load(str(source)).eval()
+    try:
+        quantized = quantize_dynamic_jit(model, {"": default_dynamic_qconfig})
+        image = torch.rand(1, 3, 640, 640, generator=torch.Generator().manual_seed(0))
+        size = torch.tensor([[612, 792]])
+        with torch.no_grad():
+            (_, _, expected), (_, _, actual) = model(image, size), quantized(image, size)
+        difference = float((expected.float() - actual.float()).abs().max())
+    except Exception as e:
+        print(f"Keeping the layout model in fp32: {e}")
+        link_or_copy(source, target)
+        return None
+    torch.jit.save(quantized, str(target))
+    return difference
+
+
+def quantize_models(models_path: Path, quantized_path: Path) -> dict:
+    """
+    Write the int8 model profile of the snapshot in `models_path` to
+    `quantized_path`.
+
+    The directory mirrors the snapshot, so it is used as the pipelines'
+    `artifacts_path` as is: the TorchScript layout model is replaced by its
+    dynamically quantized version and every other file is hard linked.
+    TableFormer checkpoints only load into the fp32 model, so TableFormer is
+    quantized when a converter is built (see quantize_table_models).
+
+    Returns:
+        dict: The manifest
+    """
+    quantized_path.mkdir(parents=True, exist_ok=True)
+    remove_manifest(quantized_path / MANIFEST_NAME)
+
+    layout_difference = None
+    for source in sorted(models_path.rglob("*")):
+        relative = source.relative_to(models_path)
+        if not source.is_file() or relative.parts[0] == ".cache":
+            continue
+        target = quantized_path / relative
+        target.parent.mkdir(parents=True, exist_ok=True)
+        if relative == Path(LAYOUT_MODEL_PATH) / LAYOUT_CHECKPOINT:
+            layout_difference = _quantize_layout_model(source, target)
+        else:
+            link_or_copy(source, target)
+
+    manifest = {
+        "format": MANIFEST_FORMAT,
+        "created": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "torch": package_version("torch"),
+        "quantized_layout": layout_difference is not None,
+        "layout_max_score_difference": layout_difference,
+    }
+    write_manifest(quantized_path / MANIFEST_NAME, manifest)
+    return manifest
+
+
+def read_manifest(quantized_path: Path) -> dict:
+    """
+    Manifest of the int8 models, checked against the installed torch.
+
+    Raises:
+        QuantizationError: If there are no complete int8 models at
+                           `quantized_path`, or they were built with another torch
+    """
+    try:
+        manifest = json.loads((quantized_path / MANIFEST_NAME).read_text())
+    except (OSError, ValueError) as e:
+        raise QuantizationError(f"No quantized models in {quantized_path}: {e}")
+    if manifest.get("format") != MANIFEST_FORMAT:
+        raise QuantizationError(f"Unsupported quantized models format {manifest.get('format')}")
+    installed = package_version("torch")
+    if manifest.get("torch") != installed:
+        raise QuantizationError(f"Quantized models built with torch {manifest.get('torch')}, {installed} is installed")
+    return manifest
+
+
+def quantize_table_models(converter: "DocumentConverter") -> int:
+    """
+    Dynamically quantize the linear layers of the TableFormer tag transformer
+    and cell bounding box decoder of the paginated pipelines of `converter`.
+
+    Those run once per generated tag, so they dominate TableFormer on CPU; the
+    convolutional image encoder is left in fp32.
+
+    Returns:
+        int: Number of table models quantized
+    """
+    import torch
+    from docling.models.table_structure_model import TableStructureModel
+
+    quantized = 0
+    for pipeline in converter.initialized_pipelines.values():
+        for stage in getattr(pipeline, "build_pipe", None) or []:
+            model = getattr(stage, "model", stage)
+            if not isinstance(model, TableStructureModel) or getattr(model, "tf_predictor", None) is None:
+                continue
+            table_model = model.tf_predictor._model
+            if getattr(table_model, "_quantized", False):
+                continue
+            for name in ("_tag_transformer", "_bbox_decoder"):
+                torch.ao.quantization.quantize_dynamic(
+                    getattr(table_model, name), {torch.nn.Linear}, dtype=torch.qint8, inplace=True
+                )
+            table_model._quantized = True
+            quantized += 1
+    return quantized
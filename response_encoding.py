@@ -0,0 +1,217 @@
+import asyncio
+import json
+import zlib
+from typing import AsyncIterable, AsyncIterator, Dict, List, Optional
+
+from fastapi import Request
+from fastapi.responses import Response, StreamingResponse
+
+from tracing import span
+
+# Optional encoders: a coding or media type is only offered when its package is installed
+try:
+    import brotli
+except ImportError:
+    brotli = None
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+try:
+    import msgpack
+except ImportError:
+    msgpack = None
+try:
+    import cbor2
+except ImportError:
+    cbor2 = None
+
+
+JSON = "application/json"
+MSGPACK = "application/msgpack"
+CBOR = "application/cbor"
+
+# Chunk size used to feed a complete body through the compressor
+COMPRESS_CHUNK_SIZE = 256 * 1024
+
+
+class _Compressor:
+    """Incremental compressor with a common interface for every content coding"""
+
+    def __init__(self, coding: str):
+        self.coding = coding
+        if coding == "gzip":
+            self._obj = zlib.compressobj(6, zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+        elif coding == "br":
+            self._obj = brotli.Compressor(quality=5)
+        elif coding == "zstd":
+            self._obj = zstandard.ZstdCompressor(level=3).compressobj()
+        else:
+            raise ValueError(f"Unsupported content coding: {coding}")
+
+    def compress(self, data: bytes) -> bytes:
+        if self.coding == "br":
+            return self._obj.process(data)
+        return self._obj.compress(data)
+
+    def flush(self) -> bytes:
+        """Emit everything compressed so far, keeping the stream open"""
+        if self.coding == "gzip":
+            return self._obj.flush(zlib.Z_SYNC_FLUSH)
+        if self.coding == "br":
+            return self._obj.flush()
+        return self._obj.flush(zstandard.COMPRESSOBJ_FLUSH_BLOCK)
+
+    def finish(self) -> bytes:
+        if self.coding == "br":
+            return self._obj.finish()
+        return self._obj.flush()
+
+
+def available_codings() -> List[str]:
+    """Content codings this server can produce, most preferred first"""
+    codings = []
+    if zstandard is not None:
+        codings.append("zstd")
+    if brotli is not None:
+        codings.append("br")
+    codings.append("gzip")
+    return codings
+
+
+def available_media_types() -> List[str]:
+    """Media types a converted document can be sent as, most preferred first"""
+    media_types = [JSON]
+    if msgpack is not None:
+        media_types.append(MSGPACK)
+    if cbor2 is not None:
+        media_types.append(CBOR)
+    return media_types
+
+
+def _parse_header(value: Optional[str]) -> Dict[str, float]:
+    """Parse an Accept / Accept-Encoding header into {token: quality}"""
+    preferences = {}
+    for part in (value or "").split(","):
+        token, *params = [p.strip() for p in part.split(";")]
+        if not token:
+            continue
+        quality = 1.0
+        for param in params:
+            name, _, q = param.partition("=")
+            if name.strip().lower() == "q":
+                try:
+                    quality = float(q)
+                except ValueError:
+                    quality = 0.0
+        preferences[token.lower()] = quality
+    return preferences
+
+
+def _negotiate(preferences: Dict[str, float], offers: List[str], wildcard: str) -> Optional[str]:
+    best, best_quality = None, 0.0
+    for offer in offers:
+        quality = preferences.get(offer, preferences.get(wildcard, 0.0))
+        if quality > best_quality:
+            best, best_quality = offer, quality
+    return best
+
+
+def negotiate_coding(accept_encoding: Optional[str]) -> Optional[str]:
+    """Best content coding for an Accept-Encoding header, None for identity"""
+    return _negotiate(_parse_header(accept_encoding), available_codings(), "*")
+
+
+def negotiate_media_type(accept: Optional[str]) -> str:
+    """
+    Media type for an Accept header.
+
+    JSON wins unless the client explicitly prefers a binary encoding that is
+    available; an unsatisfiable Accept header falls back to JSON as well.
+    """
+    preferences = _parse_header(accept)
+    if "application/x-msgpack" in preferences:
+        preferences.setdefault(MSGPACK, preferences["application/x-msgpack"])
+    if not preferences:
+        return JSON
+    # Wildcards only ever select JSON, the binary encodings must be asked for
+    preferences.setdefault(JSON, max(preferences.get("*/*", 0.0), preferences.get("application/*", 0.0)))
+    return _negotiate(preferences, available_media_types(), "") or JSON
+
+
+def encode_binary(body: bytes, media_type: str) -> bytes:
+    """Re-encode a JSON document as msgpack or CBOR"""
+    value = json.loads(body)
+    if media_type == MSGPACK:
+        return msgpack.packb(value, use_bin_type=True)
+    if media_type == CBOR:
+        return cbor2.dumps(value)
+    raise ValueError(f"Unsupported media type: {media_type}")
+
+
+async def compress_stream(chunks: AsyncIterable[bytes], coding: str, flush_each: bool = False) -> AsyncIterator[bytes]:
+    """
+    Compress a stream of chunks on the fly.
+
+    Every input chunk is compressed as it arrives, so neither the plain nor the
+    compressed body is ever held in full. With `flush_each` the compressor is
+    flushed after every chunk, so each streamed event reaches the client
+    immediately instead of waiting for the compression window to fill.
+    """
+    compressor = _Compressor(coding)
+    plain = compressed = 0
+    with span("compress", attach=False, coding=coding) as current:
+        async for chunk in chunks:
+            if len(chunk) >= COMPRESS_CHUNK_SIZE:
+                data = await asyncio.to_thread(compressor.compress, chunk)
+            else:
+                data = compressor.compress(chunk)
+            if flush_each:
+                data += compressor.flush()
+            plain += len(chunk)
+            compressed += len(data)
+            if data:
+                yield data
+        data = compressor.finish()
+        if current is not None:
+            current.set_attributes({"bytes": plain, "compressed_bytes": compressed + len(data)})
+        yield data
+
+
+async def _slices(body: bytes) -> AsyncIterator[bytes]:
+    view = memoryview(body)
+    for offset in range(0, len(body), COMPRESS_CHUNK_SIZE):
+        yield bytes(view[offset:offset + COMPRESS_CHUNK_SIZE])
+
+
+def _headers(coding: Optional[str]) -> Dict[str, str]:
+    headers = {"Vary": "Accept, Accept-Encoding"}
+    if coding is not None:
+        headers["Content-Encoding"] = coding
+    return headers
+
+
+async def document_response(request: Request, body: bytes, min_size: int = 1024) -> Response:
+    """
+    Send an encoded JSON document using the encoding the client negotiated.
+
+    The body is converted to msgpack / CBOR when the Accept header asks for
+    it, and compressed with zstd, brotli or gzip (by Accept-Encoding) when it
+    is at least `min_size` bytes. Compression is streamed chunk by chunk.
+    """
+    media_type = negotiate_media_type(request.headers.get("accept"))
+    if media_type != JSON:
+        body = await asyncio.to_thread(encode_binary, body, media_type)
+
+    coding = negotiate_coding(request.headers.get("accept-encoding")) if len(body) >= min_size else None
+    if coding is None:
+        return Response(content=body, media_type=media_type, headers=_headers(None))
+    return StreamingResponse(compress_stream(_slices(body), coding), media_type=media_type, headers=_headers(coding))
+
+
+def event_stream_response(request: Request, events: AsyncIterable[bytes], media_type: str) -> StreamingResponse:
+    """Stream NDJSON / SSE events, compressed and flushed per event when negotiated"""
+    coding = negotiate_coding(request.headers.get("accept-encoding"))
+    if coding is not None:
+        events = compress_stream(events, coding, flush_each=True)
+    return StreamingResponse(events, media_type=media_type, headers=_headers(coding))
@@ -0,0 +1,195 @@
+import hashlib
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+from pathlib import Path
+from typing import Optional
+
+
+def file_sha256(path: Path, chunk_size: int = 1024 * 1024) -> str:
+    """SHA-256 hex digest of a file, read in chunks"""
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        while chunk := f.read(chunk_size):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+class ResultCache:
+    """
+    Content-addressed cache of conversion results.
+
+    Entries are keyed by the SHA-256 of the input bytes combined with everything
+    else that influences the output (pipeline options, output format, docling
+    version), see `key()`. Two tiers:
+
+        memory: LRU bounded by entry count, total encoded size and age
+        disk:   one file per entry under `directory` (a header line holding its
+                creation time, then the value), bounded by total size (least
+                recently used files, by modification time, go first) and by age
+
+    Entries expire `max_age` seconds after they were put, however often they
+    are read.
+
+    Values are the encoded JSON bytes of a result and are stored and returned
+    as is, so a hit is served without decoding or re-encoding the document.
+
+    All methods are thread-safe; the disk methods block and should be called
+    from a worker thread.
+    """
+
+    def __init__(
+        self,
+        directory: Path,
+        memory_items: int = 128,
+        memory_bytes: int = 256 * 1024 * 1024,
+        disk_bytes: int = 2 * 1024 * 1024 * 1024,
+        max_age: float = 7 * 24 * 3600,
+    ):
+        self.directory = directory
+        self.memory_items = memory_items
+        self.memory_bytes = memory_bytes
+        self.disk_bytes = disk_bytes
+        self.max_age = max_age
+        self.hits_memory = 0
+        self.hits_disk = 0
+        self.misses = 0
+        self._memory: "OrderedDict[str, tuple]" = OrderedDict()
+        self._memory_size = 0
+        self._disk_size = 0
+        self._lock = threading.Lock()
+        self.directory.mkdir(parents=True, exist_ok=True)
+        for path in self.directory.glob("*/*.json"):
+            self._disk_size += path.stat().st_size
+
+    @staticmethod
+    def key(content_hash: str, output_format: str, options: Optional[dict] = None) -> str:
+        """Cache key for an input hash, output format and effective pipeline options"""
+        material = json.dumps(
+            {"input": content_hash, "format": output_format, "options": options or {}},
+            sort_keys=True,
+        )
+        return hashlib.sha256(material.encode("utf-8")).hexdigest()
+
+    def _path(self, key: str) -> Path:
+        return self.directory / key[:2] / f"{key}.json"
+
+    @staticmethod
+    def _read_created(f) -> float:
+        """Creation time from the header line of an open disk entry, 0 if it has none"""
+        try:
+            return float(f.readline(64))
+        except ValueError:
+            return 0.0
+
+    def _remember(self, key: str, value: bytes, size: int, created: Optional[float] = None):
+        if size > self.memory_bytes:
+            return
+        with self._lock:
+            if key in self._memory:
+                self._memory_size -= self._memory.pop(key)[1]
+            self._memory[key] = (value, size, created or time.time())
+            self._memory_size += size
+            while len(self._memory) > self.memory_items or self._memory_size > self.memory_bytes:
+                _, (_, evicted_size, _) = self._memory.popitem(last=False)
+                self._memory_size -= evicted_size
+
+    def get(self, key: str) -> Optional[bytes]:
+        with self._lock:
+            entry = self._memory.get(key)
+            if entry is not None and time.time() - entry[2] > self.max_age:
+                self._memory_size -= self._memory.pop(key)[1]
+                entry = None
+            if entry is not None:
+                self._memory.move_to_end(key)
+                self.hits_memory += 1
+                return entry[0]
+
+        path = self._path(key)
+        value = None
+        try:
+            size = path.stat().st_size
+            with open(path, "rb") as f:
+                created = self._read_created(f)
+                if time.time() - created <= self.max_age:
+                    value = f.read()
+            if value is None:
+                self._delete(path, size)
+            else:
+                # Refresh the modification time used for least-recently-used
+                # disk eviction; expiry goes by the creation time in the header
+                os.utime(path)
+        except FileNotFoundError:
+            value = None
+        if value is None:
+            with self._lock:
+                self.misses += 1
+            return None
+
+        self._remember(key, value, len(value), created)
+        with self._lock:
+            self.hits_disk += 1
+        return value
+
+    def put(self, key: str, value: bytes):
+        created = time.time()
+        self._remember(key, value, len(value), created)
+
+        path = self._path(key)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = path.with_suffix(f".{threading.get_ident()}.tmp")
+        header = f"{created}\n".encode("ascii")
+        with open(tmp_path, "wb") as f:
+            f.write(header)
+            f.write(value)
+        previous = path.stat().st_size if path.exists() else 0
+        os.replace(tmp_path, path)
+        with self._lock:
+            self._disk_size += len(header) + len(value) - previous
+            over_budget = self._disk_size > self.disk_bytes
+        if over_budget:
+            self.evict()
+
+    def _delete(self, path: Path, size: int):
+        try:
+            path.unlink()
+        except FileNotFoundError:
+            return
+        with self._lock:
+            self._disk_size -= size
+
+    def evict(self):
+        """Drop expired disk entries, then the least recently used ones until under budget"""
+        now = time.time()
+        entries = []
+        for path in self.directory.glob("*/*.json"):
+            try:
+                stat = path.stat()
+                with open(path, "rb") as f:
+                    created = self._read_created(f)
+            except FileNotFoundError:
+                continue
+            if now - created > self.max_age:
+                self._delete(path, stat.st_size)
+            else:
+                entries.append((stat.st_mtime, stat.st_size, path))
+
+        entries.sort()
+        for _, size, path in entries:
+            if self._disk_size <= self.disk_bytes:
+                break
+            self._delete(path, size)
+
+    def stats(self) -> dict:
+        lookups = self.hits_memory + self.hits_disk + self.misses
+        return {
+            "memory_entries": len(self._memory),
+            "memory_bytes": self._memory_size,
+            "disk_bytes": self._disk_size,
+            "hits_memory": self.hits_memory,
+            "hits_disk": self.hits_disk,
+            "misses": self.misses,
+            "hit_ratio": round((self.hits_memory + self.hits_disk) / lookups, 4) if lookups else None,
+        }
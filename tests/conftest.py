@@ -0,0 +1,29 @@
+import os
+from pathlib import Path
+
+import pytest
+
+
+@pytest.fixture(scope="session")
+def models_path() -> Path:
+    """docling model snapshot (DOCLING_MODELS_PATH or the Hugging Face cache); skips the test without it"""
+    pytest.importorskip("docling")
+    from model_artifacts import ModelArtifactsError, missing_artifacts, resolve_models_path
+
+    configured = os.getenv("DOCLING_MODELS_PATH")
+    try:
+        path = resolve_models_path(Path(configured) if configured else None)
+    except ModelArtifactsError as e:
+        pytest.skip(str(e))
+    missing = missing_artifacts(path)
+    if missing:
+        pytest.skip(f"Missing models in {path}: {', '.join(missing)}")
+    return path
+
+
+@pytest.fixture(scope="session")
+def model_corpus(tmp_path_factory) -> list:
+    """Small PDFs and image of the benchmark corpus, the documents that go through the layout and table models"""
+    from benchmarks.corpus import generate_corpus
+
+    return generate_corpus(tmp_path_factory.mktemp("corpus"), formats=("pdf", "scanned_pdf", "png"), sizes=("small",))
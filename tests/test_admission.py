@@ -0,0 +1,73 @@
+import asyncio
+
+import pytest
+
+from admission import AdmissionController, AdmissionRejectedError
+
+
+def test_rejects_beyond_the_queue_limit():
+    async def scenario():
+        controller = AdmissionController(max_in_flight=1, max_queue=1)
+        ticket = await controller.acquire()
+        waiting = asyncio.ensure_future(controller.acquire())
+        await asyncio.sleep(0)
+        assert controller.queued == 1
+
+        with pytest.raises(AdmissionRejectedError) as rejected:
+            await controller.acquire()
+        assert rejected.value.retry_after >= 1
+
+        ticket.release()
+        (await waiting).release()
+        return controller.stats()
+
+    stats = asyncio.run(scenario())
+    assert stats["admitted"] == 2
+    assert stats["rejected"] == 1
+    assert stats["in_flight"] == 0 and stats["queued"] == 0
+
+
+def test_rejects_when_the_wait_exceeds_max_wait():
+    async def scenario():
+        controller = AdmissionController(max_in_flight=1, max_queue=5, max_wait=0.01)
+        async with controller.admit():
+            with pytest.raises(AdmissionRejectedError):
+                await controller.acquire()
+        return controller
+
+    controller = asyncio.run(scenario())
+    assert controller.queued == 0
+    assert controller.rejected == 1
+
+
+def test_release_is_idempotent():
+    async def scenario():
+        controller = AdmissionController(max_in_flight=1)
+        ticket = await controller.acquire()
+        ticket.release()
+        ticket.release()
+        return controller
+
+    assert asyncio.run(scenario()).in_flight == 0
+
+
+def test_retry_after_without_history():
+    assert AdmissionController(max_in_flight=2).retry_after() == 1
+
+
+def test_retry_after_follows_the_throughput():
+    controller = AdmissionController(max_in_flight=2, max_queue=10, max_retry_after=300)
+    # Two slots busy for 10 seconds a request drain 0.2 requests per second
+    controller._mean_duration = 10.0
+    controller.queued = 3
+
+    assert controller.throughput() == pytest.approx(0.2)
+    assert controller.retry_after() == 20
+
+    controller.queued = 1000
+    assert controller.retry_after() == 300
+
+
+def test_needs_a_slot():
+    with pytest.raises(ValueError):
+        AdmissionController(max_in_flight=0)
@@ -0,0 +1,73 @@
+import time
+
+import pytest
+
+pytest.importorskip("docling")
+
+from conversion import ConversionOptions, TableMode
+from deadline import DEFAULT_STAGE_COSTS, degraded_options, estimate_stages, plan_stages
+
+FULL = ConversionOptions(do_ocr=True, do_table_structure=True, table_mode=TableMode.ACCURATE)
+
+
+def test_degraded_options_get_cheaper_step_by_step():
+    variants = degraded_options(FULL)
+
+    assert [(o.table_mode, o.do_ocr, o.do_table_structure) for o in variants] == [
+        (TableMode.FAST, True, True),
+        (TableMode.FAST, False, True),
+        (TableMode.FAST, False, False),
+    ]
+
+
+def test_degraded_options_of_the_cheapest_profile():
+    assert degraded_options(ConversionOptions(do_ocr=False, do_table_structure=False)) == []
+
+
+def test_plan_keeps_the_options_when_they_fit():
+    options, plan = plan_stages(FULL, time.monotonic() + 3600, pages=2, fetch_seconds=0.5)
+
+    assert options == FULL
+    assert plan.degraded == {}
+    assert plan.stages["fetch"] == 0.5
+    assert set(plan.stages) == {"fetch", "parse", "layout", "ocr", "table", "export"}
+    # The time left is split across the stages in proportion to their estimates
+    assert sum(seconds for stage, seconds in plan.stages.items() if stage != "fetch") == pytest.approx(plan.seconds, abs=0.01)
+
+
+def test_plan_degrades_until_the_estimate_fits():
+    estimate = sum(estimate_stages(degraded_options(FULL)[1], 10).values())
+    options, plan = plan_stages(FULL, time.monotonic() + estimate + 0.5, pages=10)
+
+    assert (options.table_mode, options.do_ocr, options.do_table_structure) == (TableMode.FAST, False, True)
+    assert plan.degraded == {"table": "fast", "ocr": "skipped"}
+    assert "ocr" not in plan.stages
+
+
+def test_plan_stops_at_the_cheapest_profile():
+    options, plan = plan_stages(FULL, time.monotonic(), pages=10)
+
+    assert not options.do_ocr and not options.do_table_structure
+    assert plan.degraded == {"table": "skipped", "ocr": "skipped"}
+    assert plan.seconds == 0
+
+
+def test_plan_without_degradation():
+    options, plan = plan_stages(FULL, time.monotonic(), pages=10, degrade=False)
+
+    assert options == FULL
+    assert plan.degraded == {}
+
+
+def test_plan_for_formats_without_pages():
+    options, plan = plan_stages(FULL, time.monotonic() + 10, pages=None, fetch_seconds=1.0)
+
+    assert options == FULL
+    assert plan.stages == {"fetch": 1.0}
+
+
+def test_estimate_uses_the_table_mode_cost():
+    fast = estimate_stages(FULL.model_copy(update={"table_mode": TableMode.FAST}), 2)
+
+    assert fast["table"] == DEFAULT_STAGE_COSTS["table_fast"] * 2
+    assert estimate_stages(FULL, 2)["table"] == DEFAULT_STAGE_COSTS["table_accurate"] * 2
@@ -0,0 +1,29 @@
+import json
+
+import pytest
+
+pytest.importorskip("docling")
+
+from conversion import merge_json
+
+
+def test_prepends_fields_to_the_body():
+    merged = merge_json({"status": "success", "page": 2}, b'{"markdown":"# T\\u00e9"}')
+
+    assert merged.startswith(b'{"status":')
+    assert json.loads(merged) == {"status": "success", "page": 2, "markdown": "# Té"}
+
+
+@pytest.mark.parametrize("body", [None, b"", b"{}"])
+def test_empty_body(body):
+    assert json.loads(merge_json({"status": "failure"}, body)) == {"status": "failure"}
+
+
+def test_no_fields_returns_the_body_as_is():
+    body = b'{"json": {"pages": {}}}'
+
+    assert merge_json({}, body) is body
+
+
+def test_non_ascii_fields():
+    assert json.loads(merge_json({"filename": "résumé.pdf"}, b'{"a":1}')) == {"filename": "résumé.pdf", "a": 1}
@@ -0,0 +1,55 @@
+from metrics import Counter, Histogram, Metrics
+
+
+def test_counter_renders_labels_escaped():
+    counter = Counter("requests_total", "Requests", ("endpoint",))
+    counter.inc('say "hi"\n')
+    counter.inc('say "hi"\n', amount=2)
+
+    assert counter.render() == [
+        "# HELP requests_total Requests",
+        "# TYPE requests_total counter",
+        'requests_total{endpoint="say \\"hi\\"\\n"} 3.0',
+    ]
+
+
+def test_histogram_buckets_are_cumulative():
+    histogram = Histogram("latency_seconds", "Latency", buckets=(0.1, 1))
+    for value in (0.05, 0.1, 0.5, 5):
+        histogram.observe(value)
+
+    assert histogram.render()[2:] == [
+        'latency_seconds_bucket{le="0.1"} 2',
+        'latency_seconds_bucket{le="1"} 3',
+        'latency_seconds_bucket{le="+Inf"} 4',
+        "latency_seconds_sum 5.65",
+        "latency_seconds_count 4",
+    ]
+
+
+def test_render_includes_requests_stages_and_gauges():
+    metrics = Metrics(prefix="test", pages_window=10.0)
+    metrics.gauge("queue_depth", "Queued requests", lambda: [((), 3), (("idle",), None)])
+    metrics.observe_request("convert", 200, "pdf", 0.3)
+    metrics.observe_conversion({"stages": {"layout": 0.2, "ocr": 1.5}, "pages": 4, "documents": 1})
+
+    lines = metrics.render().splitlines()
+
+    assert 'test_requests_total{endpoint="convert",status="200"} 1.0' in lines
+    assert 'test_request_duration_seconds_count{endpoint="convert",input_format="pdf"} 1' in lines
+    assert 'test_stage_duration_seconds_count{stage="layout"} 1' in lines
+    assert 'test_stage_duration_seconds_sum{stage="ocr"} 1.5' in lines
+    assert "test_documents_converted_total 1.0" in lines
+    assert "test_pages_converted_total 4.0" in lines
+    assert "test_pages_per_second 0.4" in lines
+    assert "test_queue_depth 3" in lines
+    assert "# TYPE test_queue_depth gauge" in lines
+    # Gauges without a value are left out
+    assert not any(line.startswith("test_queue_depth{") for line in lines)
+
+
+def test_empty_conversion_timings():
+    metrics = Metrics()
+    metrics.observe_conversion({})
+
+    assert metrics.pages_per_second() == 0
@@ -0,0 +1,33 @@
+import os
+from pathlib import Path
+
+import pytest
+
+from benchmarks.parity import MIN_LAYOUT_F1, MIN_TABLE_AGREEMENT, ConverterSpec, run_parity
+
+pytest.importorskip("onnxruntime")
+
+
+@pytest.fixture(scope="module")
+def onnx_path(models_path, tmp_path_factory) -> Path:
+    """Exports in DOCLING_ONNX_PATH, or exported from the snapshot for the test"""
+    from onnx_backend import OnnxBackendError, export_onnx, read_manifest
+
+    configured = os.getenv("DOCLING_ONNX_PATH")
+    if configured:
+        try:
+            read_manifest(Path(configured))
+        except OnnxBackendError as e:
+            pytest.skip(str(e))
+        return Path(configured)
+    path = tmp_path_factory.mktemp("onnx")
+    export_onnx(models_path, path)
+    return path
+
+
+def test_onnx_layout_and_tables_match_torch(models_path, onnx_path, model_corpus):
+    results = run_parity(model_corpus, ConverterSpec("torch", {}), ConverterSpec("onnx", {}, onnx_path), models_path)
+
+    assert results["layout_f1"] >= MIN_LAYOUT_F1, results["documents"]
+    if results["table_agreement"] is not None:
+        assert results["table_agreement"] >= MIN_TABLE_AGREEMENT, results["documents"]
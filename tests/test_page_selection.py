@@ -0,0 +1,47 @@
+import pytest
+
+pytest.importorskip("docling")
+
+from conversion import PageSelection, PageSelectionError
+
+
+@pytest.mark.parametrize(
+    "page_range, ranges",
+    [
+        (None, ()),
+        ("", ()),
+        ("3", ((3, 3),)),
+        ("1-5", ((1, 5),)),
+        ("1-3, 7,10-", ((1, 3), (7, 7), (10, None))),
+    ],
+)
+def test_parse(page_range, ranges):
+    assert PageSelection.parse(page_range).ranges == ranges
+
+
+@pytest.mark.parametrize("page_range", ["a", "0", "5-2", "1-x", "-3"])
+def test_parse_rejects_malformed_ranges(page_range):
+    with pytest.raises(PageSelectionError):
+        PageSelection.parse(page_range)
+
+
+def test_parse_rejects_max_pages_below_one():
+    with pytest.raises(PageSelectionError):
+        PageSelection.parse("1-3", max_pages=0)
+
+
+def test_pages_without_ranges_selects_every_page():
+    assert PageSelection().pages(4) == [1, 2, 3, 4]
+
+
+def test_pages_merges_overlapping_ranges_and_clamps_to_the_document():
+    assert PageSelection.parse("8-,2-3,3,12").pages(10) == [2, 3, 8, 9, 10]
+
+
+def test_pages_keeps_at_most_max_pages():
+    assert PageSelection.parse("2-", max_pages=3).pages(10) == [2, 3, 4]
+    assert PageSelection.parse(None, max_pages=2).pages(1) == [1]
+
+
+def test_pages_out_of_range_selects_nothing():
+    assert PageSelection.parse("5-").pages(3) == []
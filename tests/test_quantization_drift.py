@@ -0,0 +1,38 @@
+import os
+from pathlib import Path
+
+import pytest
+
+from benchmarks.parity import MIN_LAYOUT_F1, MIN_TABLE_AGREEMENT, ConverterSpec, run_parity
+
+pytest.importorskip("torch")
+
+
+@pytest.fixture(scope="module")
+def quantized_path(models_path, tmp_path_factory) -> Path:
+    """int8 models in DOCLING_QUANTIZED_PATH, or quantized from the snapshot for the test"""
+    from quantization import QuantizationError, quantize_models, read_manifest
+
+    configured = os.getenv("DOCLING_QUANTIZED_PATH")
+    if configured:
+        try:
+            read_manifest(Path(configured))
+        except QuantizationError as e:
+            pytest.skip(str(e))
+        return Path(configured)
+    path = tmp_path_factory.mktemp("quantized")
+    quantize_models(models_path, path)
+    return path
+
+
+def test_int8_layout_and_tables_stay_close_to_fp32(models_path, quantized_path, model_corpus):
+    results = run_parity(
+        model_corpus,
+        ConverterSpec("fp32", {}),
+        ConverterSpec("int8", {"precision": "int8"}, artifacts_path=quantized_path),
+        models_path,
+    )
+
+    assert results["layout_f1"] >= MIN_LAYOUT_F1, results["documents"]
+    if results["table_agreement"] is not None:
+        assert results["table_agreement"] >= MIN_TABLE_AGREEMENT, results["documents"]
@@ -0,0 +1,68 @@
+import pytest
+
+pytest.importorskip("fastapi")
+
+import response_encoding
+from response_encoding import CBOR, JSON, MSGPACK, negotiate_coding, negotiate_media_type
+
+
+@pytest.fixture
+def all_encoders(monkeypatch):
+    """Negotiate as if every optional encoder was installed"""
+    for name in ("brotli", "zstandard", "msgpack", "cbor2"):
+        monkeypatch.setattr(response_encoding, name, object())
+
+
+@pytest.fixture
+def no_encoders(monkeypatch):
+    for name in ("brotli", "zstandard", "msgpack", "cbor2"):
+        monkeypatch.setattr(response_encoding, name, None)
+
+
+@pytest.mark.parametrize(
+    "accept_encoding, coding",
+    [
+        (None, None),
+        ("", None),
+        ("identity", None),
+        ("gzip", "gzip"),
+        ("gzip, br", "br"),
+        ("gzip, br, zstd", "zstd"),
+        ("br;q=0.5, gzip", "gzip"),
+        ("*", "zstd"),
+        ("*, zstd;q=0", "br"),
+        ("GZIP;q=0.1", "gzip"),
+        ("gzip;q=0", None),
+        ("gzip;q=oops", None),
+    ],
+)
+def test_negotiate_coding(all_encoders, accept_encoding, coding):
+    assert negotiate_coding(accept_encoding) == coding
+
+
+def test_negotiate_coding_only_offers_installed_encoders(no_encoders):
+    assert negotiate_coding("zstd, br, gzip;q=0.5") == "gzip"
+    assert negotiate_coding("zstd, br") is None
+
+
+@pytest.mark.parametrize(
+    "accept, media_type",
+    [
+        (None, JSON),
+        ("*/*", JSON),
+        ("application/*", JSON),
+        ("application/json", JSON),
+        ("application/msgpack", MSGPACK),
+        ("application/x-msgpack", MSGPACK),
+        ("application/cbor", CBOR),
+        ("application/json;q=0.5, application/cbor", CBOR),
+        ("application/msgpack;q=0.5, */*", JSON),
+        ("text/html", JSON),
+    ],
+)
+def test_negotiate_media_type(all_encoders, accept, media_type):
+    assert negotiate_media_type(accept) == media_type
+
+
+def test_negotiate_media_type_falls_back_to_json(no_encoders):
+    assert negotiate_media_type("application/msgpack") == JSON
@@ -0,0 +1,83 @@
+import os
+import time
+
+import pytest
+
+from result_cache import ResultCache
+
+
+@pytest.fixture
+def cache(tmp_path) -> ResultCache:
+    return ResultCache(tmp_path / "cache", memory_items=2, disk_bytes=1024 * 1024)
+
+
+def test_key_depends_on_every_input():
+    key = ResultCache.key("abc", "markdown", {"do_ocr": True})
+
+    assert key == ResultCache.key("abc", "markdown", {"do_ocr": True})
+    assert key != ResultCache.key("abd", "markdown", {"do_ocr": True})
+    assert key != ResultCache.key("abc", "json", {"do_ocr": True})
+    assert key != ResultCache.key("abc", "markdown", {"do_ocr": False})
+
+
+def test_memory_hit(cache):
+    cache.put("a" * 64, b'{"markdown":"a"}')
+
+    assert cache.get("a" * 64) == b'{"markdown":"a"}'
+    assert cache.stats()["hits_memory"] == 1
+
+
+def test_memory_lru_evicts_the_least_recently_used(cache):
+    a, b, c = ("a" * 64, "b" * 64, "c" * 64)
+    cache.put(a, b"1")
+    cache.put(b, b"2")
+    cache.get(a)
+    cache.put(c, b"3")
+
+    assert list(cache._memory) == [a, c]
+    # Evicted from memory, still served from disk
+    assert cache.get(b) == b"2"
+    assert cache.stats()["hits_disk"] == 1
+
+
+def test_miss(cache):
+    assert cache.get("d" * 64) is None
+    assert cache.stats()["misses"] == 1
+    assert cache.stats()["hit_ratio"] == 0
+
+
+def test_disk_tier_survives_a_restart(cache):
+    cache.put("e" * 64, b"value")
+    restarted = ResultCache(cache.directory)
+
+    assert restarted.get("e" * 64) == b"value"
+    assert restarted.stats()["hits_disk"] == 1
+    assert restarted.stats()["disk_bytes"] == cache.stats()["disk_bytes"]
+
+
+def test_entries_expire_by_creation_time_even_when_read(tmp_path):
+    cache = ResultCache(tmp_path, max_age=60)
+    key = "f" * 64
+    cache.put(key, b"value")
+    entry = cache._memory[key]
+    cache._memory[key] = (entry[0], entry[1], time.time() - 120)
+    cache._path(key).write_bytes(f"{time.time() - 120}\n".encode("ascii") + b"value")
+
+    assert cache.get(key) is None
+    assert not cache._path(key).exists()
+
+
+def test_disk_budget_evicts_the_least_recently_used_files(tmp_path):
+    cache = ResultCache(tmp_path, memory_items=0, disk_bytes=250)
+    keys = [str(i) * 64 for i in range(3)]
+    for age, key in zip((30, 20), keys):
+        cache.put(key, b"x" * 100)
+        os.utime(cache._path(key), (time.time() - age, time.time() - age))
+    # A read makes the oldest file the most recently used
+    assert cache.get(keys[0]) == b"x" * 100
+    cache.put(keys[2], b"x" * 100)
+
+    assert cache._path(keys[0]).exists()
+    assert not cache._path(keys[1]).exists()
+    assert cache._path(keys[2]).exists()
+    assert cache.stats()["disk_bytes"] <= 250
@@ -0,0 +1,147 @@
+import os
+from contextlib import contextmanager
+from typing import Iterator, List, Optional
+
+# Optional: tracing is only available when the OpenTelemetry SDK is installed
+try:
+    from opentelemetry import propagate, trace
+    from opentelemetry.sdk.resources import Resource
+    from opentelemetry.sdk.trace import TracerProvider
+    from opentelemetry.sdk.trace.export import BatchSpanProcessor, ConsoleSpanExporter
+except ImportError:
+    trace = None
+try:
+    from opentelemetry.exporter.otlp.proto.http.trace_exporter import OTLPSpanExporter
+except ImportError:
+    OTLPSpanExporter = None
+
+
+_tracer = None
+
+
+def configure_tracing(exporter: str, service_name: str = "docling-api", path: Optional[str] = None) -> bool:
+    """
+    Set up the tracer provider and its exporter.
+
+    Args:
+        exporter: "otlp" to send spans to a collector (OTEL_EXPORTER_OTLP_*
+                  variables apply), "file" to append them as JSON lines to `path`
+        service_name: Service name the spans are reported under
+        path: Trace file of the "file" exporter
+
+    Returns:
+        bool: Whether tracing is enabled
+    """
+    global _tracer
+    if trace is None:
+        print("Tracing disabled: the opentelemetry-sdk package is not installed")
+        return False
+    if exporter == "otlp":
+        if OTLPSpanExporter is None:
+            print("Tracing disabled: the opentelemetry-exporter-otlp-proto-http package is not installed")
+            return False
+        span_exporter = OTLPSpanExporter()
+    elif exporter == "file":
+        span_exporter = ConsoleSpanExporter(
+            out=open(path, "a", encoding="utf-8"),
+            formatter=lambda span: span.to_json(indent=None) + os.linesep,
+        )
+    else:
+        raise ValueError(f"Unsupported trace exporter: {exporter}")
+
+    provider = TracerProvider(resource=Resource.create({"service.name": service_name}))
+    provider.add_span_processor(BatchSpanProcessor(span_exporter))
+    trace.set_tracer_provider(provider)
+    _tracer = trace.get_tracer(__name__)
+    return True
+
+
+def tracing_enabled() -> bool:
+    return _tracer is not None
+
+
+@contextmanager
+def span(name: str, attach: bool = True, **attributes) -> Iterator[Optional["trace.Span"]]:
+    """
+    Trace the block as a span, a no-op when tracing is disabled.
+
+    With `attach` the span becomes the parent of the spans started inside the
+    block. Pass `attach=False` in async generators, whose body may resume in
+    another context than the one the span was started in.
+    """
+    if _tracer is None:
+        yield None
+    elif attach:
+        with _tracer.start_as_current_span(name, attributes=attributes) as current:
+            yield current
+    else:
+        detached = _tracer.start_span(name, attributes=attributes)
+        try:
+            yield detached
+        except BaseException as e:
+            detached.record_exception(e)
+            raise
+        finally:
+            detached.end()
+
+
+def record_conversion_spans(records: List[list]):
+    """
+    Emit the spans recorded during a conversion (see `conversion.record_spans`).
+
+    Conversions run on worker threads or processes, so their spans are
+    recorded there as plain `[name, start_ns, end_ns, attributes, parent]`
+    lists and turned into real spans here, under the current span. `parent`
+    is the index of the enclosing record, if any.
+    """
+    if _tracer is None or not records:
+        return
+    spans = []
+    for name, start, end, attributes, parent in records:
+        context = trace.set_span_in_context(spans[parent]) if parent is not None else None
+        spans.append(_tracer.start_span(name, context=context, attributes=attributes, start_time=start))
+    for emitted, record in zip(spans, records):
+        emitted.end(end_time=record[2])
+
+
+class TracingMiddleware:
+    """
+    ASGI middleware tracing every HTTP request as a server span.
+
+    The trace context of the incoming headers (W3C `traceparent` by default)
+    is continued, so the spans join the caller's trace. The span is named
+    after the route once the request has been routed.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or _tracer is None:
+            await self.app(scope, receive, send)
+            return
+
+        headers = {key.decode("latin-1"): value.decode("latin-1") for key, value in scope.get("headers", [])}
+        context = propagate.extract(headers)
+        attributes = {"http.request.method": scope["method"], "url.path": scope["path"]}
+        with _tracer.start_as_current_span(
+            f"{scope['method']} {scope['path']}", context=context, kind=trace.SpanKind.SERVER, attributes=attributes
+        ) as server_span:
+
+            async def send_wrapper(message):
+                if message["type"] == "http.response.start":
+                    server_span.set_attribute("http.response.status_code", message["status"])
+                    if message["status"] >= 500:
+                        server_span.set_status(trace.StatusCode.ERROR)
+                await send(message)
+
+            try:
+                await self.app(scope, receive, send_wrapper)
+            finally:
+                route = getattr(scope.get("route"), "path", None)
+                if route is not None:
+                    server_span.update_name(f"{scope['method']} {route}")
+                    server_span.set_attribute("http.route", route)
+                endpoint = scope.get("endpoint")
+                if endpoint is not None:
+                    server_span.set_attribute("code.function", endpoint.__name__)
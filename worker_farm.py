@@ -0,0 +1,345 @@
+import asyncio
+import gc
+import multiprocessing
+import os
+import pickle
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Any, AsyncIterator, Callable, Iterable, List, Optional
+
+from docling.datamodel.base_models import InputFormat
+
+from conversion import INPUT_ERRORS, ConversionCancelledError, ConversionOptions
+from converter_pool import ConverterPool
+from executor import iterate_results
+
+
+# Warm converters built in the parent before forking. Children inherit them, so
+# the model weights live on copy-on-write pages shared by every worker.
+_template: Optional[ConverterPool] = None
+
+
+class WorkerCrashedError(RuntimeError):
+    """Raised when a worker process dies while converting a document."""
+
+
+def _worker_main(conn, torch_threads: Optional[int]):
+    """
+    Worker loop.
+
+    Receives `(mode, fn, args, options)` jobs, run on the inherited converter
+    for `options`. For mode "call" the worker replies with
+    `("result", value)`; for mode "iter" `fn` is a generator and every item is
+    sent as `("item", value)` followed by `("result", None)`. Failures are
+    replied as `("error", exception)`.
+    """
+    if torch_threads:
+        import torch
+        torch.set_num_threads(torch_threads)
+
+    pool = _template
+    # A worker failing max_failures times in a row is re-forked from the warm
+    # template by the parent, instead of rebuilding its models in here
+    pool.max_failures = None
+    while True:
+        try:
+            message = conn.recv()
+        except (EOFError, KeyboardInterrupt):
+            break
+        if message is None:
+            break
+
+        mode, fn, args, options = message
+        try:
+            with pool.converter(options) as converter:
+                if mode == "iter":
+                    for item in fn(converter, *args):
+                        conn.send(("item", item))
+                    result = None
+                else:
+                    result = fn(converter, *args)
+        except Exception as e:
+            try:
+                conn.send(("error", e))
+            except Exception:
+                # Exception is not picklable, ship its message instead
+                conn.send(("error", RuntimeError(f"{type(e).__name__}: {e}")))
+        else:
+            conn.send(("result", result))
+
+
+class _Worker:
+    def __init__(self, index: int, process, conn):
+        self.index = index
+        self.process = process
+        self.conn = conn
+        self.jobs = 0
+        self.consecutive_failures = 0
+        self.cancelled = False
+
+    def status(self) -> dict:
+        return {
+            "index": self.index,
+            "pid": self.process.pid,
+            "alive": self.process.is_alive(),
+            "jobs": self.jobs,
+            "consecutive_failures": self.consecutive_failures,
+        }
+
+
+class WorkerFarm:
+    """
+    Pre-forked pool of conversion worker processes.
+
+    The parent builds warm converters (one per warm profile, all pipelines
+    initialized), freezes
+    the garbage collector so the loaded objects are not touched again, then
+    forks `size` workers. Each worker reuses the inherited converters, so the
+    model weights are loaded once and shared copy-on-write instead of being
+    duplicated per process. Profiles first requested later are built inside
+    the worker, with private copies of the models, so each worker keeps at
+    most `worker_profiles` of them at a time (within `max_profiles` in all),
+    dropping the least recently used idle one for a new one. Jobs
+    travel over one local pipe per worker.
+
+    Exposes the same `start/run/stats/shutdown` interface as ConversionExecutor.
+    `fn` and its arguments/results must be picklable. `warm()` builds the
+    converters without forking, so it can run off the event loop before
+    `start()`; jobs submitted in the meantime wait for the first worker.
+
+    Cancelling the awaiting coroutine kills the worker running the conversion,
+    which frees its CPU at once; a fresh worker is forked in its place.
+    """
+
+    kind = "process"
+
+    def __init__(
+        self,
+        size: int,
+        formats: Optional[Iterable[InputFormat]] = None,
+        torch_threads: Optional[int] = None,
+        max_failures: int = 3,
+        warm_profiles: Iterable[ConversionOptions] = (),
+        max_profiles: int = 8,
+        artifacts_path: Optional[Path] = None,
+        onnx_path: Optional[Path] = None,
+        quantized_path: Optional[Path] = None,
+        worker_profiles: int = 1,
+    ):
+        if size < 1:
+            raise ValueError("Worker farm needs at least one worker")
+        self.size = size
+        self.max_workers = size
+        self.formats = list(formats) if formats is not None else list(InputFormat)
+        self.torch_threads = torch_threads or max(1, (os.cpu_count() or 1) // size)
+        self.max_failures = max_failures
+        self.warm_profiles = list(warm_profiles)
+        self.max_profiles = max_profiles
+        self.artifacts_path = artifacts_path
+        self.onnx_path = onnx_path
+        self.quantized_path = quantized_path
+        self.worker_profiles = worker_profiles
+        self.queued = 0
+        self.in_flight = 0
+        self.completed = 0
+        self.failed = 0
+        self.cancelled = 0
+        self.restarts = 0
+        self._workers: List[_Worker] = []
+        self._idle: asyncio.Queue = asyncio.Queue()
+        # One thread per worker waits for its replies, so round trips never
+        # hold threads of the default executor other to_thread calls need
+        self._receiver: Optional[ThreadPoolExecutor] = None
+        self._context = multiprocessing.get_context("fork")
+
+    def warm(self):
+        """Build the converters the workers will inherit (blocking, idempotent)"""
+        global _template
+        if _template is not None:
+            return
+        template = ConverterPool(
+            size=1,
+            formats=self.formats,
+            max_failures=self.max_failures,
+            warm_profiles=self.warm_profiles,
+            max_profiles=self.max_profiles,
+            artifacts_path=self.artifacts_path,
+            onnx_path=self.onnx_path,
+            quantized_path=self.quantized_path,
+        )
+        template.start()
+        template.wait_ready()
+        inherited = template.profile_count()
+        template.max_profiles = max(inherited, min(self.max_profiles, inherited + self.worker_profiles))
+        # Move everything allocated so far into the permanent generation so
+        # the collector never writes to (and un-shares) those pages.
+        gc.freeze()
+        _template = template
+
+    def start(self):
+        if self._workers:
+            return
+        self.warm()
+        self._receiver = ThreadPoolExecutor(max_workers=self.size, thread_name_prefix="worker-recv")
+        for i in range(self.size):
+            worker = self._spawn(i)
+            self._workers.append(worker)
+            self._idle.put_nowait(worker)
+
+    def _spawn(self, index: int) -> _Worker:
+        parent_conn, child_conn = self._context.Pipe()
+        process = self._context.Process(
+            target=_worker_main,
+            args=(child_conn, self.torch_threads),
+            name=f"conversion-worker-{index}",
+            daemon=True,
+        )
+        process.start()
+        child_conn.close()
+        return _Worker(index, process, parent_conn)
+
+    async def _restart(self, worker: _Worker) -> _Worker:
+        """Replace a worker; reaping the old process and forking block, so both run off the event loop"""
+        return await asyncio.to_thread(self._replace, worker)
+
+    def _replace(self, worker: _Worker) -> _Worker:
+        self._stop_worker(worker)
+        replacement = self._spawn(worker.index)
+        self._workers[worker.index] = replacement
+        self.restarts += 1
+        return replacement
+
+    @staticmethod
+    def _stop_worker(worker: _Worker):
+        if worker.process.is_alive():
+            worker.process.kill()
+        worker.process.join(timeout=5)
+        worker.conn.close()
+
+    def shutdown(self):
+        for worker in self._workers:
+            try:
+                worker.conn.send(None)
+            except (BrokenPipeError, OSError):
+                pass
+        for worker in self._workers:
+            worker.process.join(timeout=5)
+            self._stop_worker(worker)
+        self._workers = []
+        if self._receiver is not None:
+            self._receiver.shutdown(wait=False)
+            self._receiver = None
+
+    async def check(self) -> bool:
+        """Replace idle workers whose process has died"""
+        for _ in range(self._idle.qsize()):
+            worker = self._idle.get_nowait()
+            if not worker.process.is_alive():
+                worker = await self._restart(worker)
+            self._idle.put_nowait(worker)
+        return all(w.process.is_alive() for w in self._workers)
+
+    async def _roundtrip(
+        self,
+        worker: _Worker,
+        mode: str,
+        fn: Callable,
+        args: tuple,
+        options: Optional[ConversionOptions],
+        push: Optional[Callable] = None,
+    ) -> Any:
+        loop = asyncio.get_running_loop()
+        try:
+            worker.conn.send((mode, fn, args, options))
+            while True:
+                kind, payload = await loop.run_in_executor(self._receiver, worker.conn.recv)
+                if kind != "item":
+                    break
+                push(payload)
+        except (EOFError, BrokenPipeError, ConnectionResetError, OSError, pickle.UnpicklingError):
+            self._idle.put_nowait(await self._restart(worker))
+            if worker.cancelled:
+                self.cancelled += 1
+                raise ConversionCancelledError("Conversion was cancelled")
+            self.failed += 1
+            raise WorkerCrashedError(f"Conversion worker {worker.index} exited unexpectedly")
+
+        worker.jobs += 1
+        if worker.cancelled:
+            # Killed just after it replied
+            self.cancelled += 1
+            self._idle.put_nowait(await self._restart(worker))
+            raise ConversionCancelledError("Conversion was cancelled")
+        if kind == "result":
+            worker.consecutive_failures = 0
+            self.completed += 1
+            self._idle.put_nowait(worker)
+            return payload
+
+        self.failed += 1
+        if not isinstance(payload, INPUT_ERRORS):
+            worker.consecutive_failures += 1
+            if worker.consecutive_failures >= self.max_failures:
+                worker = await self._restart(worker)
+        self._idle.put_nowait(worker)
+        raise payload
+
+    def _finished(self, task: asyncio.Task):
+        self.in_flight -= 1
+        if not task.cancelled():
+            # Mark the exception as retrieved when the awaiting request is gone
+            task.exception()
+
+    async def _submit(
+        self,
+        mode: str,
+        fn: Callable,
+        args: tuple,
+        options: Optional[ConversionOptions],
+        push: Optional[Callable] = None,
+    ) -> Any:
+        self.queued += 1
+        try:
+            worker = await self._idle.get()
+        finally:
+            self.queued -= 1
+
+        self.in_flight += 1
+        task = asyncio.ensure_future(self._roundtrip(worker, mode, fn, args, options, push))
+        task.add_done_callback(self._finished)
+        # Shield the round trip: a cancelled request must not hand a busy worker
+        # back to the idle queue before it has replied. Instead the worker is
+        # killed, which ends the round trip and replaces the worker.
+        try:
+            return await asyncio.shield(task)
+        except asyncio.CancelledError:
+            if not task.done():
+                worker.cancelled = True
+                worker.process.kill()
+            raise
+
+    async def run(self, fn: Callable, *args, options: Optional[ConversionOptions] = None) -> Any:
+        """Run `fn(converter, *args)` on a worker process and await its result"""
+        return await self._submit("call", fn, args, options)
+
+    def iterate(self, fn: Callable, *args, options: Optional[ConversionOptions] = None) -> AsyncIterator:
+        """Run the generator `fn(converter, *args)` on a worker process and yield its items as they come"""
+        return iterate_results(lambda push: asyncio.ensure_future(self._submit("iter", fn, args, options, push)))
+
+    def ready(self) -> bool:
+        """Whether every worker has been forked from warm converters and is alive"""
+        return len(self._workers) == self.size and all(w.process.is_alive() for w in self._workers)
+
+    def stats(self) -> dict:
+        return {
+            "kind": self.kind,
+            "max_workers": self.size,
+            "torch_threads": self.torch_threads,
+            "queued": self.queued,
+            "in_flight": self.in_flight,
+            "completed": self.completed,
+            "failed": self.failed,
+            "cancelled": self.cancelled,
+            "restarts": self.restarts,
+            "workers": [w.status() for w in self._workers],
+        }